@@ -9,14 +9,19 @@ st.set_page_config(page_title="DefaidX", layout="wide")
 # ── Make src/ importable ──────────────────────────────────────────────────
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
-# ── Import page modules (each must expose the shown function) ─────────────
-from pages import Home, About, Explore, Insights, Contact  # noqa: E402
+# ── Copy-on-write for the shared dataset's views (default from pandas 3;
+#    read by pandas 2.x at import, so set before any page imports it) ──────
+os.environ.setdefault("PANDAS_COPY_ON_WRITE", "1")
+
+# ── Pages are imported on first navigation (see src/page_registry.py) ─────
+from instrumentation import finish_run, show_diagnostics, start_run, timed  # noqa: E402
+from page_registry import PAGES, show_page  # noqa: E402
 
 # ── Initialise / sync navigation state ────────────────────────────────────
 if "page" not in st.session_state:
     st.session_state["page"] = "Home"
 
-sidebar_options = ["Home", "About", "Explore", "Insights", "Contact"]
+sidebar_options = list(PAGES)
 
 selected = st.sidebar.radio(
     "Select a Section",
@@ -32,13 +37,14 @@ if selected != st.session_state["page"]:
 # ── Render the chosen page ────────────────────────────────────────────────
 page = st.session_state["page"]
 
-if page == "Home":
-    Home.show_home()
-elif page == "About":
-    About.show_about()
-elif page == "Explore":
-    Explore.show_explore()
-elif page == "Insights":
-    Insights.show_insights()
-elif page == "Contact":
-    Contact.show_contact()
+# Every rerun is recorded (see src/instrumentation.py); ?diagnostics=1 shows it.
+start_run(page)
+status = "error"
+try:
+    with timed("page", page):
+        show_page(page)
+    status = "ok"
+finally:
+    run = finish_run(status)
+
+show_diagnostics(run)
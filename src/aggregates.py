@@ -0,0 +1,272 @@
+"""
+aggregates.py
+-------------
+Pre-aggregated tables derived from the merged long table.
+
+The visualisation builders used to group, rank and filter the full merged
+frame on every render. This module computes those tables once:
+
+- ``continent_totals`` – Defense_USD summed per Year × Continent
+- ``country_ranks``    – Defense_USD per Year × Country with its yearly rank
+- ``top20_per_year``   – the top 20 spenders of every year
+- ``gdp_scatter``      – rows with Defense_USD, GDP and Continent all present
+- ``base_index``       – Defense_USD / GDP indexed to each country's first
+                         complete year (base 100)
+
+and, from other clean files (:data:`SOURCE_AGGREGATES`):
+
+- ``arms_trade``       – SIPRI arms exports / imports (TIV, millions) per
+                         Year × Country × Flow with the yearly share and rank,
+                         melted from the wide World Bank tables
+- ``aid_donors``       – net ODA per donor and year (millions USD, % of GNI)
+                         with its rank, 5-year rolling mean and the ratio to
+                         the donor's defense spending
+
+``python src/aggregates.py`` materializes them as CSV under
+``data/clean/agg/`` (mirrored to Parquet by ``src/data_store.py``). When a
+table has not been materialized it is computed from the merged frame at load.
+When a new year is ingested, :func:`append_year` appends only that year's rows.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+
+import pandas as pd
+
+from cleaning import CONTINENTS, MERGE_RENAMES, WB_NON_COUNTRIES
+from data_store import CLEAN_DIR, FIRST_YEAR, MERGED_LONG, ROOT_DIR, append_csv, apply_schema, read_table
+
+AGG_SUBDIR = "agg"
+TOP_N = 20
+
+ARMS_EXPORTS = "wb/Arms_ExpSIPRI_TIVs_complete.csv"
+ARMS_IMPORTS = "wb/Arms_ImpSIPRI_TIVs_complete.csv"
+ODA_USD = "wb/Net_ODA_Provided_USD_complete.csv"
+ODA_GNI = "wb/Net_ODA_Provided_pct_of_GNI_complete.csv"
+ROLLING_YEARS = 5
+
+
+# ------------------------------------------------------------------ #
+# 🧮  Table definitions
+# ------------------------------------------------------------------ #
+def continent_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Defense_USD summed per Year and Continent."""
+    return df.groupby(["Year", "Continent"], as_index=False, observed=True)["Defense_USD"].sum()
+
+
+def country_ranks(df: pd.DataFrame) -> pd.DataFrame:
+    """Defense_USD per Year and Country, ranked within each year (1 = largest)."""
+    ranked = (
+        df.groupby(["Year", "Country"], as_index=False, observed=True)["Defense_USD"].sum()
+        .sort_values(["Year", "Defense_USD"], ascending=[True, False])
+    )
+    ranked["Rank"] = ranked.groupby("Year")["Defense_USD"].rank(ascending=False, method="first").astype("int16")
+    return ranked.reset_index(drop=True)
+
+
+def top_n_per_year(ranks: pd.DataFrame, n: int = TOP_N) -> pd.DataFrame:
+    """The *n* largest spenders of every year, taken from :func:`country_ranks`."""
+    return ranks[ranks["Rank"] <= n].reset_index(drop=True)
+
+
+def gdp_scatter(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows usable in the Defense vs GDP scatter (no missing values in the plotted columns)."""
+    return df.dropna(subset=["Defense_USD", "GDP", "Year", "Country", "Continent"]).reset_index(drop=True)
+
+
+def base_index(df: pd.DataFrame) -> pd.DataFrame:
+    """Defense_USD and GDP indexed to 100 at each country's first year with both values."""
+    sub = (
+        df.dropna(subset=["Defense_USD", "GDP"])
+        .sort_values(["Country", "Year"])[["Year", "Country", "Defense_USD", "GDP"]]
+        .reset_index(drop=True)
+    )
+    first = sub.groupby("Country", observed=True)
+    sub["Base_Year"] = first["Year"].transform("first")
+    sub["Defense_Indexed"] = sub["Defense_USD"] / first["Defense_USD"].transform("first") * 100
+    sub["GDP_Indexed"] = sub["GDP"] / first["GDP"].transform("first") * 100
+    return sub
+
+
+def _top20(df: pd.DataFrame) -> pd.DataFrame:
+    return top_n_per_year(country_ranks(df))
+
+
+AGGREGATES = {
+    "continent_totals": continent_totals,
+    "country_ranks": country_ranks,
+    "top20_per_year": _top20,
+    "gdp_scatter": gdp_scatter,
+    "base_index": base_index,
+}
+
+
+# ------------------------------------------------------------------ #
+# 🧮  Tables built from other clean files
+# ------------------------------------------------------------------ #
+def melt_wb_wide(wide: pd.DataFrame, value_name: str) -> pd.DataFrame:
+    """Year × country World Bank table → ``Year, Country, Continent, <value_name>`` (aggregates dropped)."""
+    long = wide.melt(id_vars="Year", var_name="Country", value_name=value_name)
+    long = long[~long["Country"].isin(WB_NON_COUNTRIES) & (long["Year"] >= FIRST_YEAR)]
+    long = long.dropna(subset=[value_name])
+    country = long["Country"].astype(str).str.strip().replace(MERGE_RENAMES)
+    return long.assign(Country=country, Continent=country.map(CONTINENTS).fillna("Unknown"))[
+        ["Year", "Country", "Continent", value_name]
+    ]
+
+
+def arms_trade(merged: pd.DataFrame, exports: pd.DataFrame, imports: pd.DataFrame) -> pd.DataFrame:
+    """Arms transfers (TIV, millions) per Year × Country × Flow with share (%) and rank within the year."""
+    df = pd.concat(
+        [melt_wb_wide(wide, "TIV").assign(Flow=flow) for flow, wide in (("Exports", exports), ("Imports", imports))],
+        ignore_index=True,
+    )
+    df["TIV"] = (df["TIV"].astype("float64") / 1e6).round(3)
+    by_year = df.groupby(["Flow", "Year"], observed=True)["TIV"]
+    df["Share"] = df["TIV"] / by_year.transform("sum") * 100
+    df["Rank"] = by_year.rank(ascending=False, method="first").astype("int16")
+    return df.sort_values(["Flow", "Year", "Rank"]).reset_index(drop=True)
+
+
+def aid_donors(merged: pd.DataFrame, oda_usd: pd.DataFrame, oda_gni: pd.DataFrame) -> pd.DataFrame:
+    """Net ODA per donor and year with rank, rolling mean and ODA / defense spending ratio.
+
+    ODA is in current USD (World Bank), Defense_USD in constant USD (SIPRI),
+    both in millions; the ratio is indicative rather than exact.
+    """
+    df = melt_wb_wide(oda_usd, "ODA_USD")
+    df["ODA_USD"] = (df["ODA_USD"].astype("float64") / 1e6).round(3)
+    gni = melt_wb_wide(oda_gni, "ODA_GNI")[["Year", "Country", "ODA_GNI"]]
+    defense = merged[["Year", "Country", "Defense_USD"]].assign(Country=merged["Country"].astype(str))
+    df = (
+        df.merge(gni, on=["Year", "Country"], how="left")
+        .merge(defense, on=["Year", "Country"], how="left")
+        .sort_values(["Country", "Year"])
+        .reset_index(drop=True)
+    )
+    df["ODA_USD_Avg5"] = (
+        df.groupby("Country")["ODA_USD"].rolling(ROLLING_YEARS, min_periods=1).mean().reset_index(level=0, drop=True)
+    )
+    df["ODA_to_Defense"] = df["ODA_USD"] / df["Defense_USD"].astype("float64")
+    df["Rank"] = df.groupby("Year")["ODA_USD"].rank(ascending=False, method="first").astype("int16")
+    return df.sort_values(["Year", "Rank"]).reset_index(drop=True)
+
+
+# name -> (source tables relative to data/clean, build(merged, *sources))
+SOURCE_AGGREGATES = {
+    "arms_trade": ((ARMS_EXPORTS, ARMS_IMPORTS), arms_trade),
+    "aid_donors": ((ODA_USD, ODA_GNI), aid_donors),
+}
+
+
+def aggregate_names() -> list[str]:
+    return [*AGGREGATES, *SOURCE_AGGREGATES]
+
+
+def _build(name: str, merged: pd.DataFrame) -> pd.DataFrame:
+    if name in AGGREGATES:
+        return AGGREGATES[name](merged)
+    sources, build = SOURCE_AGGREGATES[name]
+    return build(merged, *(read_table(relpath) for relpath in sources))
+
+
+def aggregate_path(name: str) -> str:
+    """Path of aggregate *name* relative to ``data/clean``."""
+    return f"{AGG_SUBDIR}/{name}.csv"
+
+
+# ------------------------------------------------------------------ #
+# ➕  Appending a year (src/ingest.py)
+# ------------------------------------------------------------------ #
+def base_index_rows(new: pd.DataFrame, existing: pd.DataFrame) -> pd.DataFrame:
+    """:func:`base_index` rows for newly added years, indexed to the bases in *existing*.
+
+    Countries without a base yet take their first complete new year as base 100.
+    """
+    sub = (
+        new.dropna(subset=["Defense_USD", "GDP"])
+        .sort_values(["Country", "Year"])[["Year", "Country", "Defense_USD", "GDP"]]
+        .reset_index(drop=True)
+    )
+    bases = (
+        existing[existing["Year"] == existing["Base_Year"]]
+        .assign(Country=lambda d: d["Country"].astype(str))
+        .set_index("Country")[["Base_Year", "Defense_USD", "GDP"]]
+    )
+    country = sub["Country"].astype(str)
+    first = sub.groupby(country, observed=True)
+    own = pd.DataFrame({
+        "Base_Year": first["Year"].transform("first"),
+        "Defense_USD": first["Defense_USD"].transform("first"),
+        "GDP": first["GDP"].transform("first"),
+    })
+    base = bases.reindex(country).set_axis(sub.index).fillna(own)
+    sub["Base_Year"] = base["Base_Year"].astype(sub["Year"].dtype)
+    sub["Defense_Indexed"] = sub["Defense_USD"] / base["Defense_USD"].astype(sub["Defense_USD"].dtype) * 100
+    sub["GDP_Indexed"] = sub["GDP"] / base["GDP"].astype(sub["GDP"].dtype) * 100
+    return sub
+
+
+def append_year(new_rows: pd.DataFrame) -> dict[str, int]:
+    """Append the aggregates of *new_rows* (the merged rows of new years) under ``data/clean/agg``.
+
+    Every table except ``base_index`` is computed per year, so the new rows
+    are all that is needed; ``base_index`` reuses the bases already on disk.
+    The small :data:`SOURCE_AGGREGATES` (some join the merged table) are
+    rewritten whole. Returns the rows written per relative path.
+    """
+    new_rows = apply_schema(new_rows)
+    appended = {}
+    for name, build in AGGREGATES.items():
+        relpath = aggregate_path(name)
+        if not (CLEAN_DIR / relpath).exists():
+            raise FileNotFoundError(f"{relpath} is not materialized; run src/aggregates.py first.")
+        part = base_index_rows(new_rows, read_table(relpath)) if name == "base_index" else build(new_rows)
+        appended[relpath] = append_csv(CLEAN_DIR / relpath, apply_schema(part))
+    merged = read_table(MERGED_LONG)
+    for name in SOURCE_AGGREGATES:
+        table = apply_schema(_build(name, merged))
+        table.to_csv(CLEAN_DIR / aggregate_path(name), index=False)
+        appended[aggregate_path(name)] = len(table)
+    return appended
+
+
+# ------------------------------------------------------------------ #
+# 📦  Loading / materializing
+# ------------------------------------------------------------------ #
+def load_aggregates(merged: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Return every aggregate, read from disk when materialized, else computed from *merged*."""
+    tables = {}
+    for name in aggregate_names():
+        if (CLEAN_DIR / aggregate_path(name)).exists():
+            tables[name] = read_table(aggregate_path(name))
+        else:
+            tables[name] = apply_schema(_build(name, merged))
+    return tables
+
+
+def build_aggregates(merged: pd.DataFrame | None = None) -> list[str]:
+    """Write every aggregate under ``data/clean/agg`` and return their relative paths."""
+    if merged is None:
+        merged = read_table(MERGED_LONG)
+    (CLEAN_DIR / AGG_SUBDIR).mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in aggregate_names():
+        relpath = aggregate_path(name)
+        apply_schema(_build(name, merged)).to_csv(CLEAN_DIR / relpath, index=False)
+        written.append(relpath)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Materialize the aggregate tables under data/clean/agg.")
+    parser.parse_args(argv)
+    for relpath in build_aggregates():
+        print(f"wrote {(CLEAN_DIR / relpath).relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
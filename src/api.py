@@ -0,0 +1,412 @@
+"""
+api.py
+------
+Optional read-only HTTP API over the same tables the app draws from.
+
+Notebooks and downstream dashboards can fetch the series behind the charts
+as JSON (or Arrow IPC, when ``pyarrow`` is installed) instead of scraping the
+UI or re-reading the CSVs. It is plain ``http.server`` – no extra
+dependency – and runs next to Streamlit, not inside it::
+
+    python src/api.py                    # http://127.0.0.1:8502
+    python src/api.py --host 0.0.0.0 --port 9000
+
+Endpoints (``GET`` / ``HEAD``):
+
+- ``/``                   – the endpoint list and the dataset version
+- ``/version``            – ``dataset_version.json`` without the table hashes
+- ``/continent_totals``   – ``aggregates.continent_totals``
+                            (``years``, ``continent``)
+- ``/top``                – the *n* largest spenders per year from
+                            ``aggregates.country_ranks``, re-ranked within
+                            the continent filter (``n``, ``years``, ``continent``)
+- ``/trends``             – per-country series of raw or derived indicators
+                            (``indicators.py``: ``Defense_USD_YoY``, shares, ...)
+                            (``countries`` required, ``indicators``, ``years``)
+- ``/indicators``         – the indicator names with their label and unit
+
+Filters: ``years=2000``, ``years=2000-2010`` or ``years=1995,2000``;
+``countries`` / ``continent`` / ``indicators`` are comma-separated;
+``format=arrow`` (or ``Accept: application/vnd.apache.arrow.stream``) asks
+for Arrow.
+
+Repeat polling is cheap:
+
+- tables are loaded once per dataset version (``data_store.dataset_version``,
+  one ``stat`` per request) and reloaded after an ingest;
+- responses are kept in an LRU keyed by (version, path, normalised query,
+  format);
+- every response carries a strong ``ETag`` and ``Last-Modified`` (the
+  version's ``updated_at``), and ``If-None-Match`` / ``If-Modified-Since``
+  are answered with ``304 Not Modified`` and no body.
+
+For a local instance in a notebook or a test, ``serve_in_thread(port=0)``
+starts the server on a free port and returns it (``server.server_port``;
+``server.shutdown()`` stops it).
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from aggregates import aggregate_path
+from cube import DataCube, load_cube
+from data_store import _parquet_available, dataset_version, read_dataset_version, read_table
+from indicators import IndicatorEngine, engine_for, label_of
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+DEFAULT_MAX_RESPONSES = 256
+DEFAULT_TOP_N = 10
+DEFAULT_INDICATORS = ("Defense_USD",)
+JSON_TYPE = "application/json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ApiError(Exception):
+    """A request the API rejects; *status* becomes the HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ------------------------------------------------------------------ #
+# 📦  Tables, loaded once per dataset version
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class ApiData:
+    version: str
+    manifest: dict
+    continent_totals: pd.DataFrame
+    country_ranks: pd.DataFrame
+    cube: DataCube
+    continent_of: dict[str, str]
+    engine: IndicatorEngine
+
+    @classmethod
+    def load(cls, version: str) -> "ApiData":
+        cube = load_cube()
+        return cls(
+            version=version,
+            manifest=read_dataset_version(),
+            continent_totals=read_table(aggregate_path("continent_totals")),
+            country_ranks=read_table(aggregate_path("country_ranks")),
+            cube=cube,
+            continent_of=dict(zip(cube.countries, cube.continents)),
+            engine=engine_for(cube),
+        )
+
+
+# ------------------------------------------------------------------ #
+# 🔎  Query parameters
+# ------------------------------------------------------------------ #
+def _one(query: dict[str, list[str]], name: str) -> Optional[str]:
+    values = query.get(name)
+    return values[-1] if values else None
+
+
+def _names(query: dict[str, list[str]], name: str) -> list[str]:
+    """Comma-separated (or repeated) parameter *name* as a list, in order, without blanks."""
+    return [part.strip() for value in query.get(name, []) for part in value.split(",") if part.strip()]
+
+
+def _years(query: dict[str, list[str]]) -> Optional[list[int]]:
+    """``years=2000``, ``2000-2010`` or ``1995,2000`` → the list of years (``None`` when absent)."""
+    years: list[int] = []
+    for part in _names(query, "years"):
+        try:
+            if "-" in part:
+                lo, hi = (int(y) for y in part.split("-", 1))
+                years.extend(range(lo, hi + 1))
+            else:
+                years.append(int(part))
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"years: {part!r} is not a year or a range like 2000-2010") from None
+    return sorted(set(years)) if "years" in query else None
+
+
+def _check_known(kind: str, names: list[str], known) -> None:
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"unknown {kind}: {', '.join(unknown)}")
+
+
+def _filter_years(df: pd.DataFrame, years: Optional[list[int]]) -> pd.DataFrame:
+    return df if years is None else df[df["Year"].isin(years)]
+
+
+# ------------------------------------------------------------------ #
+# 🧾  Endpoints – each returns a DataFrame
+# ------------------------------------------------------------------ #
+def continent_totals(data: ApiData, query: dict[str, list[str]]) -> pd.DataFrame:
+    df = _filter_years(data.continent_totals, _years(query))
+    continents = _names(query, "continent")
+    if continents:
+        _check_known("continent", continents, set(data.cube.continents))
+        df = df[df["Continent"].isin(continents)]
+    return df
+
+
+def top(data: ApiData, query: dict[str, list[str]]) -> pd.DataFrame:
+    try:
+        n = int(_one(query, "n") or DEFAULT_TOP_N)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "n must be an integer") from None
+    df = _filter_years(data.country_ranks, _years(query))
+    continents = _names(query, "continent")
+    if continents:
+        _check_known("continent", continents, set(data.cube.continents))
+        continent = df["Country"].astype(str).map(data.continent_of)
+        df = df[continent.isin(continents)].copy()
+        df["Rank"] = df.groupby("Year")["Defense_USD"].rank(ascending=False, method="first").astype("int16")
+    return df[df["Rank"] <= n].sort_values(["Year", "Rank"])
+
+
+def trends(data: ApiData, query: dict[str, list[str]]) -> pd.DataFrame:
+    countries = _names(query, "countries")
+    if not countries:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "countries is required, e.g. ?countries=France,India")
+    _check_known("country", countries, data.cube)
+    indicators = _names(query, "indicators") or list(DEFAULT_INDICATORS)
+    _check_known("indicator", indicators, data.engine)
+    return _filter_years(data.engine.frame(countries, indicators), _years(query))
+
+
+def indicators(data: ApiData, query: dict[str, list[str]]) -> pd.DataFrame:
+    names = data.engine.names()
+    labels = [label_of(name) for name in names]
+    return pd.DataFrame({"Indicator": names, "Label": [l for l, _ in labels], "Unit": [u for _, u in labels]})
+
+
+ENDPOINTS: dict[str, Callable[[ApiData, dict[str, list[str]]], pd.DataFrame]] = {
+    "/continent_totals": continent_totals,
+    "/top": top,
+    "/trends": trends,
+    "/indicators": indicators,
+}
+
+
+# ------------------------------------------------------------------ #
+# 🗜️  Encoding
+# ------------------------------------------------------------------ #
+def encode_json(df: pd.DataFrame, version: str) -> bytes:
+    rows = df.reset_index(drop=True).to_json(orient="records", double_precision=6)
+    return f'{{"dataset_version":{json.dumps(version)},"count":{len(df)},"rows":{rows}}}'.encode()
+
+
+def encode_arrow(df: pd.DataFrame, version: str) -> bytes:
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"dataset_version": version.encode()})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+@dataclass(frozen=True)
+class Response:
+    body: bytes
+    content_type: str
+    etag: str
+    last_modified: Optional[datetime]
+
+
+# ------------------------------------------------------------------ #
+# 🌐  Service – version tracking and the response LRU
+# ------------------------------------------------------------------ #
+class DataApi:
+    """Answers API paths from the current dataset, caching encoded responses."""
+
+    def __init__(self, max_responses: int = DEFAULT_MAX_RESPONSES):
+        self.max_responses = max_responses
+        self._data: Optional[ApiData] = None
+        self._responses: OrderedDict[tuple, Response] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def data(self) -> ApiData:
+        version = dataset_version()
+        data = self._data
+        if data is None or data.version != version:
+            with self._lock:
+                if self._data is None or self._data.version != version:
+                    self._data = ApiData.load(version)
+                    self._responses.clear()
+                data = self._data
+        return data
+
+    def index(self, data: ApiData) -> dict:
+        return {
+            "dataset_version": data.version,
+            "endpoints": sorted(["/", "/version", *ENDPOINTS]),
+            "formats": ["json", "arrow"] if _parquet_available() else ["json"],
+        }
+
+    def respond(self, path: str, query: dict[str, list[str]], fmt: str) -> Response:
+        data = self.data()
+        key = (data.version, path, tuple(sorted((k, tuple(v)) for k, v in query.items() if k != "format")), fmt)
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        if path == "/":
+            body, content_type = json.dumps(self.index(data)).encode(), JSON_TYPE
+        elif path == "/version":
+            manifest = {k: v for k, v in data.manifest.items() if k != "tables"}
+            body, content_type = json.dumps({"dataset_version": data.version, **manifest}).encode(), JSON_TYPE
+        elif path in ENDPOINTS:
+            df = ENDPOINTS[path](data, query)
+            if fmt == "arrow":
+                body, content_type = encode_arrow(df, data.version), ARROW_TYPE
+            else:
+                body, content_type = encode_json(df, data.version), JSON_TYPE
+        else:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no endpoint {path}; see /")
+
+        updated_at = data.manifest.get("updated_at")
+        response = Response(
+            body=body,
+            content_type=content_type,
+            etag='"' + hashlib.sha256(body).hexdigest()[:20] + '"',
+            last_modified=datetime.fromisoformat(updated_at) if updated_at else None,
+        )
+        with self._lock:
+            self.misses += 1
+            self._responses[key] = response
+            while len(self._responses) > self.max_responses:
+                self._responses.popitem(last=False)
+        return response
+
+
+def not_modified(headers, response: Response) -> bool:
+    """True when the request's validators still match *response* (RFC 9110 precedence)."""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or response.etag in tags
+    since = headers.get("If-Modified-Since")
+    if since and response.last_modified is not None:
+        try:
+            return response.last_modified.replace(microsecond=0) <= parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# ------------------------------------------------------------------ #
+# 🔌  HTTP
+# ------------------------------------------------------------------ #
+class ApiHandler(BaseHTTPRequestHandler):
+    api: DataApi  # set by make_server
+    quiet = False
+    server_version = "DefaidX-API/1"
+
+    def _format(self, query: dict[str, list[str]]) -> str:
+        fmt = _one(query, "format")
+        if fmt is None:
+            fmt = "arrow" if ARROW_TYPE in self.headers.get("Accept", "") else "json"
+        if fmt not in ("json", "arrow"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "format must be json or arrow")
+        if fmt == "arrow" and not _parquet_available():
+            raise ApiError(HTTPStatus.NOT_ACCEPTABLE, "Arrow output needs pyarrow; use format=json")
+        return fmt
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict, head: bool) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _handle(self, head: bool = False) -> None:
+        url = urlsplit(self.path)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+        try:
+            response = self.api.respond(path, query, self._format(query))
+        except ApiError as exc:
+            body = json.dumps({"error": str(exc)}).encode()
+            self._send(exc.status, body, JSON_TYPE, {"Cache-Control": "no-store"}, head)
+            return
+
+        headers = {"ETag": response.etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+        if response.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(response.last_modified, usegmt=True)
+        if not_modified(self.headers, response):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self._send(HTTPStatus.OK, response.body, response.content_type, headers, head)
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_HEAD(self) -> None:
+        self._handle(head=True)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, api: Optional[DataApi] = None,
+                quiet: bool = False) -> ThreadingHTTPServer:
+    """An HTTP server answering with *api* (a new :class:`DataApi` by default); not started."""
+    handler = type("BoundApiHandler", (ApiHandler,), {"api": api or DataApi(), "quiet": quiet})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_thread(host: str = DEFAULT_HOST, port: int = 0, quiet: bool = True) -> ThreadingHTTPServer:
+    """Start a server on a background thread (``port=0`` picks a free port) and return it."""
+    server = make_server(host, port, quiet=quiet)
+    threading.Thread(target=server.serve_forever, name="defaidx-api", daemon=True).start()
+    return server
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the app's tables as JSON / Arrow over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--quiet", action="store_true", help="do not log each request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, quiet=args.quiet)
+    print(f"serving http://{args.host}:{server.server_port}/ (dataset {dataset_version()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
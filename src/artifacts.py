@@ -0,0 +1,224 @@
+"""
+artifacts.py
+------------
+Pre-rendered figure artifacts under ``assets/graphs``.
+
+The charts only change when the data (or the builder code) does, so
+``python src/artifacts.py`` runs every ``create_*`` builder over the current
+dataset – the parameterized ones with the widgets' initial selection – and
+writes, per figure,
+
+- ``<section>/<key>.json.gz`` – the Plotly JSON the app serves, and
+- ``<section>/<key>.html.gz`` – a standalone page (plotly.js from the CDN),
+
+plus ``manifest.json`` listing them. ``<key>`` is the figure-cache key
+(builder, data fingerprint, parameters), so every data release gets new file
+names and the app can never pick up a figure built from other data.
+
+At runtime :class:`ArtifactStore` is a read-only tier of the figure cache:
+a figure present in the manifest is served from its ``.json.gz`` without any
+pandas or builder work; other parameter choices are built live as before.
+The manifest also records a hash of the builder sources and of the
+``DEFAIDX_WEBGL_THRESHOLD`` / ``DEFAIDX_DOWNSAMPLE_POINTS`` settings
+(``large_data.render_settings``) and is ignored when that no longer matches
+the running code and environment. The build is deterministic – no timestamps,
+fixed div ids – so rebuilding unchanged figures leaves the files untouched.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from data_store import ROOT_DIR
+
+ARTIFACT_DIR = ROOT_DIR / "assets" / "graphs"
+MANIFEST_NAME = "manifest.json"
+# Files whose content determines what the builders draw.
+BUILDER_SOURCES = (
+    ROOT_DIR / "src" / "visualisations" / "defense_spending.py",
+    ROOT_DIR / "src" / "visualisations" / "animation.py",
+    ROOT_DIR / "src" / "visualisations" / "large_data.py",
+    ROOT_DIR / "src" / "indicators.py",
+    ROOT_DIR / "src" / "cube.py",  # DataCube.frame / DataCube.indexed feed the cube builders
+    ROOT_DIR / "src" / "visualisations" / "arms_trade.py",
+    ROOT_DIR / "src" / "visualisations" / "aid.py",
+    ROOT_DIR / "src" / "geometry.py",  # iso3_many: choropleth name → ISO3
+    ROOT_DIR / "data" / "clean" / "all" / "country_iso3.csv",  # choropleth name → ISO3
+)
+
+
+def code_version() -> str:
+    """Short hash of :data:`BUILDER_SOURCES` and the builders' environment settings."""
+    from visualisations.large_data import render_settings
+
+    digest = hashlib.sha256()
+    for path in BUILDER_SOURCES:
+        digest.update(path.read_bytes())
+    digest.update(json.dumps(render_settings(), sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def read_manifest(root: Path = ARTIFACT_DIR) -> Optional[dict]:
+    path = root / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ------------------------------------------------------------------ #
+# 📦  Runtime – read-only tier of the figure cache
+# ------------------------------------------------------------------ #
+class ArtifactStore:
+    """Serialized figures from the manifest, looked up by figure-cache key."""
+
+    def __init__(self, root: Path = ARTIFACT_DIR):
+        self.root = Path(root)
+        manifest = read_manifest(self.root)
+        self.stale = manifest is not None and manifest.get("code_version") != code_version()
+        figures = [] if manifest is None or self.stale else manifest["figures"]
+        self._files = {entry["key"]: self.root / entry["json"] for entry in figures}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._files
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the serialized figure stored under *key*, or ``None``."""
+        path = self._files.get(key)
+        if path is None or not path.exists():
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            return handle.read()
+
+
+# ------------------------------------------------------------------ #
+# 🏗️  Build step
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class ArtifactSpec:
+    """One figure to pre-render: ``builder(dataset.view(table), *args)``."""
+
+    section: str
+    builder: Callable
+    table: str
+    args: tuple = ()
+
+
+def declare_artifacts(dataset) -> list[ArtifactSpec]:
+    """Every figure shown on the pages, with the widgets' initial selection."""
+    from embed_visualizations import (
+        DEFAULT_AID_DONORS,
+        DEFAULT_ARMS_COUNTRIES,
+        DEFAULT_INDEXED_COUNTRIES,
+        DEFAULT_TREND_COUNTRIES,
+        DEFAULT_TREND_INDICATOR,
+    )
+    from visualisations import aid
+    from visualisations import arms_trade as at
+    from visualisations import defense_spending as ds
+
+    indexed_options = dataset.cube.complete_countries(ds.INDEXED_TREND_INDICATORS)
+    indexed_countries = [c for c in DEFAULT_INDEXED_COUNTRIES if c in indexed_options] or indexed_options[:1]
+    aid_donors = dataset.view("aid_donors")
+    last_ratio_year = int(aid_donors.loc[aid_donors["ODA_to_Defense"].notna(), "Year"].max())
+    return [
+        ArtifactSpec("home", ds.create_global_defense_bubbles, "merged"),
+        ArtifactSpec("defense/spending", ds.create_choropleth_map, "merged"),
+        ArtifactSpec("defense/spending", ds.create_defense_vs_gdp_scatter_excluding_usa_china, "gdp_scatter"),
+        ArtifactSpec("defense/spending", ds.create_defense_gdp_indexed_trend, "cube", (indexed_countries, None)),
+        ArtifactSpec("defense/spending", ds.create_country_defense_bar_animation, "top20_per_year"),
+        ArtifactSpec("defense/spending", ds.create_country_defense_trend, "cube", (list(DEFAULT_TREND_COUNTRIES), DEFAULT_TREND_INDICATOR)),
+        ArtifactSpec("defense/spending", ds.create_defense_spending_over_time, "continent_totals"),
+        ArtifactSpec("defense/arms", at.create_arms_top_traders, "arms_trade", (at.FLOWS[0],)),
+        ArtifactSpec("defense/arms", at.create_arms_market_share, "arms_trade", (at.FLOWS[0],)),
+        ArtifactSpec("defense/arms", at.create_arms_trade_comparison, "arms_trade", (list(DEFAULT_ARMS_COUNTRIES),)),
+        ArtifactSpec("aid", aid.create_top_donors_animation, "aid_donors"),
+        ArtifactSpec("aid", aid.create_oda_trend, "aid_donors", (list(DEFAULT_AID_DONORS),)),
+        ArtifactSpec("aid", aid.create_oda_gni_heatmap, "aid_donors"),
+        ArtifactSpec("aid", aid.create_oda_defense_ratio, "aid_donors", (last_ratio_year,)),
+    ]
+
+
+def _write_gzip(path: Path, text: str) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    # mtime=0 (and the fixed div id of the HTML pages) keeps the bytes
+    # identical across rebuilds of the same figure.
+    with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as handle:
+        handle.write(text.encode("utf-8"))
+    tmp.replace(path)
+    return path.stat().st_size
+
+
+def build_artifacts(root: Path = ARTIFACT_DIR, html: bool = True, prune: bool = True) -> dict:
+    """Render every :func:`declare_artifacts` figure into *root* and write the manifest."""
+    from dataset import SharedDataset
+    from figure_cache import FigureCache
+    from visualisations.large_data import render_settings
+
+    dataset = SharedDataset.load()
+    figures = []
+    for spec in declare_artifacts(dataset):
+        df = dataset.view(spec.table)
+        key = FigureCache.make_key(spec.builder.__name__, dataset.fingerprints[spec.table], spec.args)
+        fig = spec.builder(df, *spec.args)
+        if fig is None:
+            continue
+        payload = fig.to_json()
+        entry = {
+            "key": key,
+            "section": spec.section,
+            "builder": spec.builder.__name__,
+            "table": spec.table,
+            "args": json.loads(json.dumps(list(spec.args), default=str)),
+            "json": f"{spec.section}/{key}.json.gz",
+            "json_bytes": len(payload),
+        }
+        entry["json_gzip_bytes"] = _write_gzip(root / entry["json"], payload)
+        if html:
+            entry["html"] = f"{spec.section}/{key}.html.gz"
+            # A fixed div id (Plotly picks a random one) keeps the page bytes stable.
+            page = fig.to_html(include_plotlyjs="cdn", full_html=True, config={"responsive": True}, div_id=key)
+            entry["html_gzip_bytes"] = _write_gzip(root / entry["html"], page)
+        figures.append(entry)
+
+    manifest = {
+        "code_version": code_version(),
+        "render_settings": render_settings(),
+        "tables": {spec.table: dataset.fingerprints[spec.table] for spec in declare_artifacts(dataset)},
+        "figures": figures,
+    }
+    (root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    if prune:
+        keep = {root / e[kind] for e in figures for kind in ("json", "html") if kind in e}
+        for path in list(root.rglob("*.json.gz")) + list(root.rglob("*.html.gz")):
+            if path not in keep:
+                path.unlink()
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-render the app's figures into assets/graphs.")
+    parser.add_argument("--no-html", action="store_true", help="only write the JSON artifacts")
+    parser.add_argument("--keep-old", action="store_true", help="keep artifacts of earlier builds")
+    args = parser.parse_args(argv)
+
+    manifest = build_artifacts(html=not args.no_html, prune=not args.keep_old)
+    for entry in manifest["figures"]:
+        print(f"wrote {entry['json']} ({entry['json_gzip_bytes'] / 1024:.0f} KiB)")
+    print(f"{len(manifest['figures'])} figure(s), manifest at {(ARTIFACT_DIR / MANIFEST_NAME).relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+benchmark.py
+------------
+Timing / memory / payload benchmarks for the data loaders, the SQL query
+layer, the aggregate tables, the country helpers and every ``create_*``
+builder in ``visualisations/defense_spending.py``, plus the cold start of the
+app (the ``startup`` group).
+
+Each case runs on the real merged table and on synthetic scale-ups of it
+(:func:`synthetic_merged`), which replicate countries (``"France #3"``),
+append later years and add extra indicator columns:
+
+=======  =========  =====  ==========  ==========
+scale    countries  years  indicators  rows
+=======  =========  =====  ==========  ==========
+base     ×1         ×1     ×1          ~6 400
+10x      ×10        ×1     ×10         ~64 000
+100x     ×10        ×10    ×10         ~640 000
+=======  =========  =====  ==========  ==========
+
+For every case the wall time (min / median over ``--repeat`` runs), the peak
+Python allocation (``tracemalloc``, one extra run) and, for figures, the
+serialized JSON size are written to a JSON file so runs can be compared
+across versions::
+
+    python src/benchmark.py                                  # base + 10x
+    python src/benchmark.py --scales base 10x 100x --repeat 5
+    python src/benchmark.py --only builders --compare benchmarks/previous.json
+    python src/benchmark.py --only startup                   # cold imports only
+
+The ``startup`` cases do not depend on the data scale and run once (scale
+``cold``): each starts a fresh interpreter that imports what ``app.py``
+imports before a page (Streamlit, ``instrumentation``, ``page_registry``)
+and then one page module, as on the first visit to that page. Besides the
+process wall time they record the shell and page import times and which
+heavy modules (pandas, NumPy, plotly.express, …) the page pulled in.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+
+import aggregates
+import utils
+from country_index import CountryIndex
+from cube import DataCube
+from data_store import MERGED_LONG, ROOT_DIR, _parquet_available, apply_schema, read_table
+from dataset import frame_fingerprint
+from indicators import INDICATORS, IndicatorEngine
+from query import QUERIES, QueryEngine, _duckdb_available
+from visualisations import defense_spending as ds
+from visualisations.animation import figure_payload_report
+
+RESULTS_DIR = ROOT_DIR / "benchmarks"
+SRC_DIR = Path(__file__).resolve().parent
+ID_COLUMNS = ("Year", "Country", "Continent")
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "duckdb", "plotly.express")
+
+
+@dataclass(frozen=True)
+class ScaleSpec:
+    """Multipliers applied to the merged long table."""
+
+    countries: int = 1
+    years: int = 1
+    indicators: int = 1
+
+
+SCALES = {
+    "base": ScaleSpec(),
+    "10x": ScaleSpec(countries=10, indicators=10),
+    "100x": ScaleSpec(countries=10, years=10, indicators=10),
+}
+
+
+# ------------------------------------------------------------------ #
+# 🧪  Synthetic data
+# ------------------------------------------------------------------ #
+def synthetic_merged(base: pd.DataFrame, spec: ScaleSpec, seed: int = 0) -> pd.DataFrame:
+    """Scale *base* (the merged long table) up by *spec*.
+
+    Copy ``k`` of every country is named ``"<Country> #k"`` and copy ``j`` of
+    the year range is shifted ``j`` spans later; both get log-normal noise
+    (σ = 0.1) on every measure so aggregates and ranks are not just repeated.
+    Indicator copies are added as ``<Measure>_<k>`` columns. The result has
+    the store schema applied.
+    """
+    rng = np.random.default_rng(seed)
+    base = base.assign(**{c: base[c].astype(str) for c in ("Country", "Continent") if c in base})
+    measures = [c for c in base.columns if c not in ID_COLUMNS]
+    span = int(base["Year"].max()) - int(base["Year"].min()) + 1
+
+    parts = []
+    for ci in range(spec.countries):
+        for yi in range(spec.years):
+            part = base.copy()
+            if ci:
+                part["Country"] = part["Country"] + f" #{ci}"
+            if yi:
+                part["Year"] = part["Year"].astype("int32") + yi * span
+            if ci or yi:
+                noise = rng.lognormal(0.0, 0.1, size=(len(part), len(measures)))
+                part[measures] = part[measures].to_numpy(dtype="float64") * noise
+            parts.append(part)
+    out = pd.concat(parts, ignore_index=True)
+
+    extra = {
+        f"{m}_{k}": out[m].to_numpy(dtype="float64") * rng.lognormal(0.0, 0.1, size=len(out))
+        for k in range(1, spec.indicators)
+        for m in measures
+    }
+    if extra:
+        out = pd.concat([out, pd.DataFrame(extra, index=out.index)], axis=1)
+    return apply_schema(out.sort_values(["Year", "Country"]).reset_index(drop=True))
+
+
+# ------------------------------------------------------------------ #
+# ⏱️  Measurement
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class Case:
+    name: str
+    group: str
+    func: Callable[[], Any]
+
+
+def measure(case: Case, repeat: int) -> dict:
+    """Run *case* once under ``tracemalloc`` (also warming lazy imports), then time it ``repeat`` times."""
+    tracemalloc.start()
+    try:
+        result = case.func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = case.func()
+        timings.append(time.perf_counter() - start)
+
+    record = {
+        "name": case.name,
+        "group": case.group,
+        "repeat": repeat,
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "peak_bytes": peak,
+    }
+    if isinstance(result, go.Figure):
+        record.update({f"payload_{k}": v for k, v in figure_payload_report(result).items()})
+    elif isinstance(result, pd.DataFrame):
+        record["result_rows"] = len(result)
+    elif isinstance(result, dict):
+        record.update(result)
+    return record
+
+
+def _largest(df: pd.DataFrame, n: int) -> list[str]:
+    totals = df.groupby("Country", observed=True)["Defense_USD"].sum()
+    return [str(c) for c in totals.nlargest(n).index]
+
+
+def build_cases(merged: pd.DataFrame, workdir: Path) -> list[Case]:
+    """Every benchmark case for one (possibly synthetic) merged table."""
+    csv_path = workdir / "merged.csv"
+    merged.to_csv(csv_path, index=False)
+    cases = [
+        Case("read_csv+schema", "loaders", lambda: apply_schema(pd.read_csv(csv_path))),
+    ]
+    if _parquet_available():
+        pq_path = workdir / "merged.parquet"
+        merged.to_parquet(pq_path, index=False)
+        cases.append(Case("read_parquet", "loaders", lambda: pd.read_parquet(pq_path)))
+    cases.append(Case("frame_fingerprint", "loaders", lambda: frame_fingerprint(merged)))
+
+    if _duckdb_available():
+        engine = QueryEngine({"merged_long": pq_path if _parquet_available() else csv_path})
+        last_year = int(merged["Year"].max())
+        cases += [
+            Case(
+                "sql:continent_totals (vs aggregate:continent_totals)", "queries",
+                lambda: engine.sql(
+                    "SELECT Year, Continent, sum(Defense_USD) AS Defense_USD FROM merged_long "
+                    "GROUP BY Year, Continent", cache=False,
+                ),
+            ),
+            Case(
+                "sql:continent_gdp_share", "queries",
+                lambda: engine.sql(QUERIES["continent_gdp_share"].sql, {"year": last_year}, cache=False),
+            ),
+            Case(
+                "sql:spending_doubled", "queries",
+                lambda: engine.sql(QUERIES["spending_doubled"].sql, {"start": 1992, "end": last_year}, cache=False),
+            ),
+        ]
+
+    tables = {}
+    for name, build in aggregates.AGGREGATES.items():
+        tables[name] = build(merged)
+        cases.append(Case(f"aggregate:{name}", "aggregates", lambda b=build: b(merged)))
+
+    index = CountryIndex.from_files()
+    names = merged["Country"].astype(str).unique().tolist()
+    cases += [
+        Case("country_index.iso3_many", "helpers", lambda: index.iso3_many(merged["Country"])),
+        Case("country_index.coords_many", "helpers", lambda: index.coords_many(merged["Country"])),
+        Case("utils.country_to_iso3 (loop)", "helpers", lambda: [utils.country_to_iso3(c) for c in names]),
+        Case("utils.get_country_coords_from_csv", "helpers", lambda: utils.get_country_coords_from_csv(tuple(names))),
+    ]
+
+    cube = DataCube.from_long(merged)
+    top = _largest(merged, 5)
+    cases += [
+        Case("cube.from_long", "helpers", lambda: DataCube.from_long(merged)),
+        Case("cube.series", "helpers", lambda: [cube.series(c, "Defense_USD") for c in top]),
+        Case(
+            "mask Country == c (baseline for cube.series)", "helpers",
+            lambda: [merged.loc[merged["Country"] == c, "Defense_USD"] for c in top],
+        ),
+        Case(
+            "indicators: every derived indicator, cold engine", "helpers",
+            lambda: (lambda engine: [engine.array(name) for name in INDICATORS])(IndicatorEngine(cube)),
+        ),
+    ]
+    cases += [
+        Case("create_choropleth_map", "builders", lambda: ds.create_choropleth_map(merged)),
+        Case(
+            "create_defense_vs_gdp_scatter_excluding_usa_china", "builders",
+            lambda: ds.create_defense_vs_gdp_scatter_excluding_usa_china(tables["gdp_scatter"]),
+        ),
+        Case(
+            "create_defense_spending_over_time", "builders",
+            lambda: ds.create_defense_spending_over_time(tables["continent_totals"]),
+        ),
+        Case(
+            "create_country_defense_bar_animation", "builders",
+            lambda: ds.create_country_defense_bar_animation(tables["top20_per_year"]),
+        ),
+        Case(
+            "create_defense_gdp_indexed_trend", "builders",
+            lambda: ds.create_defense_gdp_indexed_trend(cube, top[0]),
+        ),
+        Case(
+            "create_defense_gdp_indexed_trend (5 countries)", "builders",
+            lambda: ds.create_defense_gdp_indexed_trend(cube, top),
+        ),
+        Case(
+            "create_country_defense_trend", "builders",
+            lambda: ds.create_country_defense_trend(cube, top),
+        ),
+        Case(
+            "create_country_defense_trend (lttb 100)", "builders",
+            lambda: ds.create_country_defense_trend(cube, top, max_points=100),
+        ),
+    ]
+    return cases
+
+
+_STARTUP_SCRIPT = """
+import importlib, json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+import streamlit, instrumentation, page_registry
+shell = time.perf_counter()
+importlib.import_module({module!r})
+end = time.perf_counter()
+print(json.dumps({{
+    "shell_import_seconds": shell - start,
+    "page_import_seconds": end - shell,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def cold_import(module: str) -> dict:
+    """Import the app shell and *module* in a fresh interpreter; return its timings."""
+    script = _STARTUP_SCRIPT.format(src=str(SRC_DIR), module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def startup_cases() -> list[Case]:
+    """One cold-start case per sidebar page (see ``page_registry.PAGES``)."""
+    from page_registry import PAGES
+
+    return [
+        Case(f"cold import {spec.module}", "startup", lambda m=spec.module: cold_import(m))
+        for spec in PAGES.values()
+    ]
+
+
+def _report(record: dict) -> None:
+    print(
+        f"{record['scale']:>5}  {record['group']:<10} {record['name']:<52} "
+        f"{record['seconds_median'] * 1000:9.1f} ms  {record['peak_bytes'] / 2**20:8.1f} MiB"
+    )
+
+
+def run(scales: list[str], repeat: int = 3, only: list[str] | None = None, seed: int = 0) -> dict:
+    """Run the suite for each scale and return the results document."""
+    results = []
+    if not only or "startup" in only:
+        for case in startup_cases():
+            record = measure(case, repeat)
+            record.update(scale="cold")
+            results.append(record)
+            _report(record)
+    if only and not set(only) - {"startup"}:
+        return {"meta": environment(seed), "results": results}
+
+    base = read_table(MERGED_LONG)
+    for scale in scales:
+        merged = base if scale == "base" else synthetic_merged(base, SCALES[scale], seed=seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            for case in build_cases(merged, Path(tmp)):
+                if only and case.group not in only:
+                    continue
+                record = measure(case, repeat)
+                record.update(scale=scale, rows=len(merged), columns=merged.shape[1])
+                results.append(record)
+                _report(record)
+    return {"meta": environment(seed), "results": results}
+
+
+# ------------------------------------------------------------------ #
+# 📄  Results files
+# ------------------------------------------------------------------ #
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def environment(seed: int) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plotly": plotly.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+        "scales": {name: vars(spec) for name, spec in SCALES.items()},
+    }
+
+
+def default_output(meta: dict) -> Path:
+    stamp = meta["timestamp"].replace(":", "").replace("-", "")[:15]
+    return RESULTS_DIR / f"{stamp}_{meta['commit'] or 'nogit'}.json"
+
+
+def compare(current: dict, previous: dict, threshold: float = 1.25) -> list[str]:
+    """Return a line per case whose median time or payload grew by more than *threshold*×."""
+    before = {(r["scale"], r["name"]): r for r in previous["results"]}
+    regressions = []
+    for rec in current["results"]:
+        old = before.get((rec["scale"], rec["name"]))
+        if old is None:
+            continue
+        for metric in ("seconds_median", "payload_total_bytes"):
+            if old.get(metric) and rec.get(metric) and rec[metric] / old[metric] > threshold:
+                regressions.append(
+                    f"{rec['scale']} {rec['name']}: {metric} {old[metric]:.4g} -> {rec[metric]:.4g} "
+                    f"({rec[metric] / old[metric]:.2f}×)"
+                )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark loaders, aggregates, helpers, figure builders and the cold start.")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["base", "10x"])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case")
+    parser.add_argument("--only", nargs="+", choices=["loaders", "queries", "aggregates", "helpers", "builders", "startup"])
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/<time>_<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    document = run(args.scales, repeat=args.repeat, only=args.only, seed=args.seed)
+    output = args.output or default_output(document["meta"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    print(f"wrote {output}")
+
+    if args.compare:
+        regressions = compare(document, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
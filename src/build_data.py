@@ -0,0 +1,366 @@
+"""
+build_data.py
+-------------
+Incremental build of ``data/clean`` (and its derived tables and pre-rendered
+figures) from ``data/raw``.
+
+Every notebook under ``data/codes`` is now a declared :class:`Stage` with its
+input and output files. A stage is skipped when the SHA-256 of each input, and
+of the code that implements it (``build_data.py`` plus the modules listed in
+``Stage.code`` – ``cleaning.py``, ``aggregates.py``, ``geometry.py``, ...),
+matches what was recorded the last time it ran (``data/.build_state.json``)
+and all of its outputs still exist. Stages
+whose upstream stages are done run in parallel on a process pool, so touching
+one raw SIPRI file only rebuilds that indicator, the merges and what depends
+on them.
+
+Usage::
+
+    python src/build_data.py                 # build whatever is out of date
+    python src/build_data.py --dry-run       # list the stages that would run
+    python src/build_data.py merge_long -j 4 # a stage and its upstream stages
+    python src/build_data.py --force         # rebuild everything
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import inspect
+import json
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import aggregates
+import artifacts
+import cleaning
+import cube
+import data_store
+import geometry
+from data_store import ROOT_DIR
+
+STATE_FILE = ROOT_DIR / "data" / ".build_state.json"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One build step: ``func(inputs, outputs)`` over repo-relative paths.
+
+    *code* lists the modules that compute the outputs (the stage functions
+    below are thin wrappers around them); their source is part of the
+    stage's signature next to the module defining *func*.
+    """
+
+    name: str
+    func: Callable[[list[Path], list[Path]], None]
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    kwargs: dict = field(default_factory=dict)
+    code: tuple[str, ...] = ()
+
+    def run(self) -> None:
+        self.func(
+            [ROOT_DIR / p for p in self.inputs],
+            [ROOT_DIR / p for p in self.outputs],
+            **self.kwargs,
+        )
+
+
+# ------------------------------------------------------------------ #
+# 🧱  Stage functions that wrap the other build modules
+# ------------------------------------------------------------------ #
+def aggregates_stage(inputs: list[Path], outputs: list[Path]) -> None:
+    aggregates.build_aggregates()
+
+
+def store_stage(inputs: list[Path], outputs: list[Path]) -> None:
+    data_store.build_store()
+
+
+def cube_stage(inputs: list[Path], outputs: list[Path]) -> None:
+    cube.build_cube()
+
+
+def artifacts_stage(inputs: list[Path], outputs: list[Path]) -> None:
+    artifacts.build_artifacts()
+
+
+def geometry_stage(inputs: list[Path], outputs: list[Path], **kwargs) -> None:
+    geometry.write_geometry(
+        topology_path=outputs[0], names_path=outputs[1], coordinates_path=outputs[2],
+        supplement_path=inputs[3], **kwargs,
+    )
+
+
+def version_stage(inputs: list[Path], outputs: list[Path]) -> None:
+    data_store.write_dataset_version("build")
+
+
+def _indicator(name: str, raw: str, stem: str, clean_dir: str, **kwargs) -> Stage:
+    # File names keep the first release's range; the years covered come from
+    # data/clean/dataset_version.json (extended by src/ingest.py).
+    return Stage(
+        name=name,
+        func=cleaning.clean_indicator_stage,
+        inputs=(raw,),
+        outputs=(
+            f"data/clean/{clean_dir}/{stem}_long_1992-2023.csv",
+            f"data/clean/{clean_dir}/{stem}_complete_wide_1992-2023.csv",
+            f"data/clean/{clean_dir}/{stem}_complete_long_1992-2023.csv",
+        ),
+        kwargs={**kwargs, "last_year": data_store.year_range()[1]},
+        code=("src/cleaning.py",),
+    )
+
+
+def declare_stages() -> list[Stage]:
+    """Return every stage of the data build."""
+    stages = [
+        _indicator(
+            "sipri_usd", "data/raw/sipri/defense_spending_constant.csv", "milexp_usd", "sipri",
+            source="sipri", value_column="Defense_USD", max_missing=6,
+        ),
+        _indicator(
+            "sipri_share_gdp", "data/raw/sipri/defense_spending_share_gdp.csv", "milexp_share_gdp", "sipri",
+            source="sipri", value_column="Defense_Share_GDP", max_missing=5, scale=100,
+        ),
+        _indicator(
+            "sipri_share_gov", "data/raw/sipri/defense_spending_share_gov.csv", "milexp_share_gov", "sipri",
+            source="sipri", value_column="Defense_Share_GOV", max_missing=10, scale=100,
+        ),
+        _indicator(
+            "wb_gdp", "data/raw/wb/gdp_wb.csv", "gdp", "wb",
+            source="wb", value_column="GDP", max_missing=5, complete_long_divisor=1_000_000,
+        ),
+    ]
+    indicators = stages[:]
+    stages.append(Stage(
+        name="geometry",
+        func=geometry_stage,
+        inputs=(
+            *(geometry.SHAPEFILE.with_suffix(s).relative_to(ROOT_DIR).as_posix() for s in (".shp", ".shx", ".dbf")),
+            geometry.SUPPLEMENTARY_POINTS.relative_to(ROOT_DIR).as_posix(),
+        ),
+        outputs=(
+            (geometry.TOPOLOGY_DIR / f"{geometry.TOPOLOGY_NAME}.json").relative_to(ROOT_DIR).as_posix(),
+            f"data/clean/{data_store.COUNTRY_ISO3}",
+            f"data/clean/{data_store.COUNTRY_COORDINATES}",
+        ),
+        kwargs={"tolerance": geometry.DEFAULT_TOLERANCE, "quantization": geometry.DEFAULT_QUANTIZATION},
+        code=("src/geometry.py",),
+    ))
+    stages.append(Stage(
+        name="merge_long",
+        func=cleaning.merge_stage,
+        inputs=tuple(s.outputs[0] for s in indicators),
+        outputs=(f"data/clean/{data_store.MERGED_LONG}",),
+        kwargs={"how": "outer"},
+        code=("src/cleaning.py",),
+    ))
+    stages.append(Stage(
+        name="merge_complete",
+        func=cleaning.merge_stage,
+        inputs=tuple(s.outputs[2] for s in indicators),
+        outputs=(f"data/clean/{data_store.MERGED_COMPLETE_LONG}",),
+        kwargs={"how": "inner"},
+        code=("src/cleaning.py",),
+    ))
+    stages.append(Stage(
+        name="aggregates",
+        func=aggregates_stage,
+        inputs=(
+            f"data/clean/{data_store.MERGED_LONG}",
+            *(f"data/clean/{p}" for sources, _ in aggregates.SOURCE_AGGREGATES.values() for p in sources),
+        ),
+        outputs=tuple(f"data/clean/{aggregates.aggregate_path(n)}" for n in aggregates.aggregate_names()),
+        code=("src/aggregates.py", "src/cleaning.py", "src/data_store.py"),
+    ))
+    clean_csvs = sorted({p for s in stages for p in s.outputs if p.endswith(".csv")} | {
+        f"data/clean/{p}" for p in data_store.clean_tables()
+    })
+    stages.append(Stage(
+        name="store",
+        func=store_stage,
+        inputs=tuple(clean_csvs),
+        outputs=tuple(
+            data_store.store_path(p.removeprefix("data/clean/")).relative_to(ROOT_DIR).as_posix()
+            for p in clean_csvs
+        ),
+        code=("src/data_store.py",),
+    ))
+    stages.append(Stage(
+        name="version",
+        func=version_stage,
+        inputs=tuple(clean_csvs),
+        outputs=(data_store.DATASET_VERSION_FILE.relative_to(ROOT_DIR).as_posix(),),
+        code=("src/data_store.py",),
+    ))
+    stages.append(Stage(
+        name="cube",
+        func=cube_stage,
+        inputs=(f"data/clean/{data_store.MERGED_LONG}",),
+        outputs=tuple(
+            (cube.CUBE_DIR / f"{cube.CUBE_NAME}{suffix}").relative_to(ROOT_DIR).as_posix()
+            for suffix in (".npy", ".json")
+        ),
+        code=("src/cube.py", "src/data_store.py"),
+    ))
+    stages.append(Stage(
+        name="artifacts",
+        func=artifacts_stage,
+        inputs=(
+            f"data/clean/{data_store.MERGED_LONG}",
+            *(f"data/clean/{aggregates.aggregate_path(n)}" for n in aggregates.aggregate_names()),
+            *(p.relative_to(ROOT_DIR).as_posix() for p in artifacts.BUILDER_SOURCES),
+            "src/embed_visualizations.py",
+            "src/cube.py",
+        ),
+        outputs=((artifacts.ARTIFACT_DIR / artifacts.MANIFEST_NAME).relative_to(ROOT_DIR).as_posix(),),
+        code=("src/artifacts.py",),
+    ))
+    return stages
+
+
+# ------------------------------------------------------------------ #
+# #️⃣  Content hashing
+# ------------------------------------------------------------------ #
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_hash(stage: Stage) -> str:
+    """Hash of the module defining *stage*'s function, its ``code`` modules and its parameters."""
+    digest = hashlib.sha256(Path(inspect.getsourcefile(stage.func)).read_bytes())
+    for relpath in stage.code:
+        digest.update((ROOT_DIR / relpath).read_bytes())
+    digest.update(json.dumps(stage.kwargs, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def stage_signature(stage: Stage) -> dict:
+    return {
+        "code": code_hash(stage),
+        "inputs": {p: file_hash(ROOT_DIR / p) for p in stage.inputs if (ROOT_DIR / p).exists()},
+    }
+
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    return {}
+
+
+def save_state(state: dict) -> None:
+    STATE_FILE.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def is_fresh(stage: Stage, state: dict) -> bool:
+    """True when *stage*'s inputs and code are unchanged and its outputs exist."""
+    if not all((ROOT_DIR / p).exists() for p in stage.outputs):
+        return False
+    return state.get(stage.name) == stage_signature(stage)
+
+
+# ------------------------------------------------------------------ #
+# 🚦  Scheduling
+# ------------------------------------------------------------------ #
+def upstream(stages: list[Stage]) -> dict[str, set[str]]:
+    """Map each stage to the stages producing its inputs."""
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {
+        s.name: {producers[p] for p in s.inputs if p in producers and producers[p] != s.name}
+        for s in stages
+    }
+
+
+def select(stages: list[Stage], targets: list[str]) -> list[Stage]:
+    """Restrict *stages* to *targets* and everything they depend on."""
+    if not targets:
+        return stages
+    deps = upstream(stages)
+    unknown = set(targets) - deps.keys()
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in stages if s.name in wanted]
+
+
+def _run_stage(stage: Stage) -> str:
+    stage.run()
+    return stage.name
+
+
+def build(targets: list[str] | None = None, force: bool = False, jobs: int | None = None, dry_run: bool = False) -> list[str]:
+    """Run every out-of-date stage (in dependency order) and return the names that ran."""
+    stages = select(declare_stages(), targets or [])
+    deps = upstream(stages)
+    by_name = {s.name: s for s in stages}
+    state = load_state()
+
+    if dry_run:
+        # A stage runs if it is stale itself or anything upstream of it runs.
+        would_run: list[str] = []
+        for stage in stages:  # declared in dependency order
+            if force or deps[stage.name] & set(would_run) or not is_fresh(stage, state):
+                would_run.append(stage.name)
+        return would_run
+
+    done: set[str] = set()
+    ran: list[str] = []
+    running = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while len(done) < len(stages):
+            for name, stage in by_name.items():
+                if name in done or name in running.values() or not deps[name] <= done:
+                    continue
+                if not force and is_fresh(stage, state):
+                    done.add(name)
+                    continue
+                running[pool.submit(_run_stage, stage)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                future.result()
+                state[name] = stage_signature(by_name[name])
+                save_state(state)
+                done.add(name)
+                ran.append(name)
+    return ran
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally rebuild data/clean from data/raw.")
+    parser.add_argument("stages", nargs="*", help="stages to build (default: all)")
+    parser.add_argument("--force", action="store_true", help="ignore recorded hashes and rebuild")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="only list the stages that would run")
+    parser.add_argument("--list", action="store_true", help="list the declared stages and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for stage in declare_stages():
+            print(f"{stage.name}: {len(stage.inputs)} input(s) -> {len(stage.outputs)} output(s)")
+        return
+
+    ran = build(args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    verb = "would run" if args.dry_run else "ran"
+    print(f"{verb}: {', '.join(ran) if ran else 'nothing (up to date)'}")
+
+
+if __name__ == "__main__":
+    main()
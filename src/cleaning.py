@@ -0,0 +1,503 @@
+"""
+cleaning.py
+-----------
+Cleaning and merging steps ported from the ``data/codes`` notebooks.
+
+Each raw export goes through the same steps the notebooks applied by hand:
+drop aggregate / non-sovereign rows, normalise country names, keep the
+years from 1992 to ``last_year`` (2023 for the first release, see
+``data_store.year_range``), then write
+
+- a *long* table with every country (gaps left as NaN),
+- a *complete wide* table (countries with too many gaps dropped, remaining
+  gaps interpolated along the years),
+- a *complete long* table melted from the complete wide one.
+
+The ``*_stage`` functions at the bottom are the units run by
+``src/build_data.py``; they take input / output paths so they can be executed
+in a worker process.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from data_store import FIRST_YEAR, LAST_YEAR
+
+# ------------------------------------------------------------------ #
+# 🗂️  Lookup tables (copied from the notebooks)
+# ------------------------------------------------------------------ #
+NON_COUNTRIES = (
+    "World", "High income", "Low income", "Lower middle income",
+    "Upper middle income", "Low & middle income", "Middle income", "Africa",
+    "North Africa", "sub-Saharan Africa", "Americas", "North America",
+    "South America", "Asia & Oceania", "Oceania", "Europe", "Central Europe",
+    "Middle East", "South Asia", "East Asia", "South East Asia",
+    "Central Asia", "USSR", "Western Europe", "Eastern Europe",
+    "Southern Europe", "Northern Europe", "Central America and the Caribbean",
+    "European Union", "Fragile and conflict affected situations",
+    "Fragile situations", "Heavily indebted poor countries (HIPC)",
+    "IDA only", "IDA blend", "IDA total", "IDA & IBRD total", "IBRD only",
+    "Least developed countries: UN classification", "World Bank high income",
+    "World Bank low income", "World Bank middle income",
+    "World Bank upper middle income", "World Bank lower middle income",
+    "OECD members", "OECD", "Euro area", "Early-demographic dividend",
+    "Late-demographic dividend", "Post-demographic dividend",
+    "Pre-demographic dividend", "Caribbean small states",
+    "Pacific island small states", "Other small states", "Small states",
+    "Latin America & Caribbean",
+    "Latin America & Caribbean (excluding high income)",
+    "Latin America & the Caribbean (IDA & IBRD countries)",
+    "East Asia & Pacific", "East Asia & Pacific (excluding high income)",
+    "East Asia & Pacific (IDA & IBRD countries)", "Europe & Central Asia",
+    "Europe & Central Asia (excluding high income)",
+    "Europe & Central Asia (IDA & IBRD countries)",
+    "Middle East & North Africa",
+    "Middle East & North Africa (excluding high income)",
+    "Middle East & North Africa (IDA & IBRD countries)",
+    "Sub-Saharan Africa (excluding high income)",
+    "Sub-Saharan Africa (IDA & IBRD countries)", "South Asia (IDA & IBRD)",
+    "Africa Eastern and Southern", "Africa Western and Central",
+    "Central Europe and the Baltics", "Czechoslovakia",
+    "German Democratic Republic", "Yemen, North", "American Samoa",
+    "Anguilla", "Aruba", "Bermuda", "British Virgin Islands",
+    "Cayman Islands", "Channel Islands", "Curacao", "Faroe Islands",
+    "French Polynesia", "Gibraltar", "Greenland", "Guam", "Isle of Man",
+    "Jersey", "Guernsey", "Macao SAR, China", "Hong Kong SAR, China",
+    "Marshall Islands", "Northern Mariana Islands", "Palau", "Puerto Rico",
+    "Sint Maarten (Dutch part)", "New Caledonia", "Virgin Islands (U.S.)",
+    "West Bank and Gaza", "Kosovo", "Not classified",
+)
+
+# World Bank exports use their own aggregate names (cleaning_gdp.ipynb).
+WB_NON_COUNTRIES = (
+    "World", "High income", "Low income", "Lower middle income",
+    "Upper middle income", "Low & middle income", "Middle income",
+    "Fragile and conflict affected situations",
+    "Heavily indebted poor countries (HIPC)", "IDA only", "IDA blend",
+    "IDA total", "IDA & IBRD total", "IBRD only", "European Union",
+    "OECD members", "Caribbean small states", "Pacific island small states",
+    "Other small states", "Small states", "Not classified",
+    "Sub-Saharan Africa", "Sub-Saharan Africa (excluding high income)",
+    "Sub-Saharan Africa (IDA & IBRD countries)", "Latin America & Caribbean",
+    "Latin America & Caribbean (excluding high income)",
+    "Latin America & the Caribbean (IDA & IBRD countries)",
+    "East Asia & Pacific", "East Asia & Pacific (excluding high income)",
+    "East Asia & Pacific (IDA & IBRD countries)", "Europe & Central Asia",
+    "Europe & Central Asia (excluding high income)",
+    "Europe & Central Asia (IDA & IBRD countries)",
+    "Middle East & North Africa",
+    "Middle East & North Africa (excluding high income)",
+    "Middle East & North Africa (IDA & IBRD countries)", "North America",
+    "Early-demographic dividend", "Late-demographic dividend",
+    "Post-demographic dividend", "Pre-demographic dividend",
+    "Channel Islands", "Isle of Man", "Jersey", "Guernsey",
+    "Northern Mariana Islands", "Virgin Islands (U.S.)", "Puerto Rico",
+    "Gibraltar", "Hong Kong SAR, China", "Macao SAR, China",
+    "West Bank and Gaza", "Kosovo", "Sint Maarten (Dutch part)",
+    "New Caledonia", "Arab World", "American Samoa", "British Virgin Islands",
+    "Cayman Islands", "Curacao", "Faroe Islands", "French Polynesia",
+    "Greenland", "Guam", "Marshall Islands", "Palau",
+    "Least developed countries: UN classification", "South Asia",
+    "South Asia (IDA & IBRD)", "Africa Eastern and Southern",
+    "Africa Western and Central", "Central African Republic",
+    "Central Europe and the Baltics", "Micronesia, Fed. Sts.", "OECD",
+    "Euro area", "World Bank high income", "World Bank low income",
+    "World Bank middle income", "World Bank upper middle income",
+    "World Bank lower middle income", "Fragile situations",
+)
+
+COUNTRY_FIXES = {
+    "TÃ¼rkiye": "Türkiye",
+    "Tã¼rkiye": "Türkiye",
+    "Turkiye": "Türkiye",
+    "Cote D'Ivoire": "Cote d'Ivoire",
+    "Bosnia And Herzegovina": "Bosnia and Herzegovina",
+    "Trinidad And Tobago": "Trinidad and Tobago",
+    "United States of America": "United States",
+    "Cape Verde": "Cabo Verde",
+    "Congo, DR": "Congo, Dem. Rep.",
+    "Congo, Republic": "Congo, Rep.",
+    "Korea, South": "South Korea",
+    "Korea, Rep.": "South Korea",
+    "Brunei Darussalam": "Brunei",
+    "Lao PDR": "Laos",
+    "Timor Leste": "Timor-Leste",
+    "Russian Federation": "Russia",
+    "Iran, Islamic Rep.": "Iran",
+    "Egypt, Arab Rep.": "Egypt",
+    "Slovak Republic": "Slovakia",
+    "Yemen, Rep.": "Yemen",
+    "Bahamas, The": "The Bahamas",
+    "Venezuela, RB": "Venezuela",
+    "Viet Nam": "Vietnam",
+    "Korea, Dem. People's Rep.": "North Korea",
+    "Syrian Arab Republic": "Syria",
+    "Gambia, The": "The Gambia",
+    "Cabo Verde": "Cape Verde",
+    "Timor-Leste": "Timor Leste",
+    "Congo, Dem. Rep.": "Congo (Kinshasa)",
+    "Congo, Rep.": "Congo (Brazzaville)",
+    "Cote d'Ivoire": "Ivory Coast",
+}
+
+MERGE_RENAMES = {
+    "United States of America": "United States",
+    "Korea, South": "South Korea",
+    "Türkiye": "Turkey",
+    "Turkiye": "Turkey",
+    "Iran, Islamic Rep.": "Iran",
+    "Egypt, Arab Rep.": "Egypt",
+    "Russian Federation": "Russia",
+    "Slovak Republic": "Slovakia",
+    "Cape Verde": "Cabo Verde",
+    "Brunei Darussalam": "Brunei",
+    "Czechia": "Czech Republic",
+    "Viet Nam": "Vietnam",
+    "Korea, Rep.": "South Korea",
+}
+
+CONTINENTS = {
+    "Albania": "Europe",
+    "Algeria": "Africa",
+    "Angola": "Africa",
+    "Argentina": "South America",
+    "Armenia": "Asia",
+    "Australia": "Oceania",
+    "Austria": "Europe",
+    "Azerbaijan": "Asia",
+    "Bahrain": "Asia",
+    "Bangladesh": "Asia",
+    "Belarus": "Europe",
+    "Belgium": "Europe",
+    "Belize": "North America",
+    "Bolivia": "South America",
+    "Botswana": "Africa",
+    "Brazil": "South America",
+    "Brunei": "Asia",
+    "Bulgaria": "Europe",
+    "Burkina Faso": "Africa",
+    "Burundi": "Africa",
+    "Cambodia": "Asia",
+    "Cameroon": "Africa",
+    "Canada": "North America",
+    "Cabo Verde": "Africa",
+    "Chad": "Africa",
+    "Chile": "South America",
+    "China": "Asia",
+    "Colombia": "South America",
+    "Croatia": "Europe",
+    "Cyprus": "Europe",
+    "Czech Republic": "Europe",
+    "Denmark": "Europe",
+    "Dominican Republic": "North America",
+    "Ecuador": "South America",
+    "Egypt": "Africa",
+    "El Salvador": "North America",
+    "Estonia": "Europe",
+    "Eswatini": "Africa",
+    "Ethiopia": "Africa",
+    "Fiji": "Oceania",
+    "Finland": "Europe",
+    "France": "Europe",
+    "Georgia": "Asia",
+    "Germany": "Europe",
+    "Ghana": "Africa",
+    "Greece": "Europe",
+    "Guatemala": "North America",
+    "Guyana": "South America",
+    "Haiti": "North America",
+    "Hungary": "Europe",
+    "Iceland": "Europe",
+    "India": "Asia",
+    "Indonesia": "Asia",
+    "Iran": "Asia",
+    "Ireland": "Europe",
+    "Israel": "Asia",
+    "Italy": "Europe",
+    "Jamaica": "North America",
+    "Japan": "Asia",
+    "Jordan": "Asia",
+    "Kazakhstan": "Asia",
+    "Kenya": "Africa",
+    "South Korea": "Asia",
+    "Kuwait": "Asia",
+    "Kyrgyz Republic": "Asia",
+    "Latvia": "Europe",
+    "Lebanon": "Asia",
+    "Lesotho": "Africa",
+    "Lithuania": "Europe",
+    "Luxembourg": "Europe",
+    "Madagascar": "Africa",
+    "Malawi": "Africa",
+    "Malaysia": "Asia",
+    "Mali": "Africa",
+    "Malta": "Europe",
+    "Mauritania": "Africa",
+    "Mauritius": "Africa",
+    "Mexico": "North America",
+    "Moldova": "Europe",
+    "Mongolia": "Asia",
+    "Morocco": "Africa",
+    "Mozambique": "Africa",
+    "Namibia": "Africa",
+    "Nepal": "Asia",
+    "Netherlands": "Europe",
+    "New Zealand": "Oceania",
+    "Nicaragua": "North America",
+    "Nigeria": "Africa",
+    "North Macedonia": "Europe",
+    "Norway": "Europe",
+    "Oman": "Asia",
+    "Pakistan": "Asia",
+    "Papua New Guinea": "Oceania",
+    "Paraguay": "South America",
+    "Peru": "South America",
+    "Philippines": "Asia",
+    "Poland": "Europe",
+    "Portugal": "Europe",
+    "Romania": "Europe",
+    "Russia": "Europe",
+    "Rwanda": "Africa",
+    "Saudi Arabia": "Asia",
+    "Senegal": "Africa",
+    "Seychelles": "Africa",
+    "Sierra Leone": "Africa",
+    "Singapore": "Asia",
+    "Slovakia": "Europe",
+    "Slovenia": "Europe",
+    "South Africa": "Africa",
+    "Spain": "Europe",
+    "Sri Lanka": "Asia",
+    "Sweden": "Europe",
+    "Switzerland": "Europe",
+    "Tanzania": "Africa",
+    "Thailand": "Asia",
+    "Taiwan": "Asia",
+    "Tunisia": "Africa",
+    "Turkey": "Asia",
+    "Uganda": "Africa",
+    "Ukraine": "Europe",
+    "United Kingdom": "Europe",
+    "United States": "North America",
+    "Uruguay": "South America",
+    "Afghanistan": "Asia",
+    "Benin": "Africa",
+    "Bosnia and Herzegovina": "Europe",
+    "Central African Republic": "Africa",
+    "Congo, Dem. Rep.": "Africa",
+    "Congo, Rep.": "Africa",
+    "Costa Rica": "North America",
+    "Cuba": "North America",
+    "Djibouti": "Africa",
+    "Equatorial Guinea": "Africa",
+    "Eritrea": "Africa",
+    "Gabon": "Africa",
+    "Guinea": "Africa",
+    "Guinea-Bissau": "Africa",
+    "Honduras": "North America",
+    "Iraq": "Asia",
+    "Ivory Coast": "Africa",
+    "Korea, North": "Asia",
+    "Laos": "Asia",
+    "Liberia": "Africa",
+    "Libya": "Africa",
+    "Montenegro": "Europe",
+    "Myanmar": "Asia",
+    "Niger": "Africa",
+    "Panama": "North America",
+    "Qatar": "Asia",
+    "Serbia": "Europe",
+    "Somalia": "Africa",
+    "South Sudan": "Africa",
+    "Sudan": "Africa",
+    "Syria": "Asia",
+    "Tajikistan": "Asia",
+    "Timor-Leste": "Asia",
+    "Togo": "Africa",
+    "Trinidad and Tobago": "North America",
+    "Turkmenistan": "Asia",
+    "United Arab Emirates": "Asia",
+    "Uzbekistan": "Asia",
+    "Venezuela": "South America",
+    "Vietnam": "Asia",
+    "Yemen": "Asia",
+    "Yugoslavia": "Europe",
+    "Zambia": "Africa",
+    "Zimbabwe": "Africa",
+    "Andorra": "Europe",
+    "Artigua and Barbuda": "North America",
+    "Aruba": "South America",
+    "Barbados": "North America",
+    "Bermuda": "North America",
+    "Bhutan": "Asia",
+    "Comoros": "Africa",
+    "Congo (Brazzaville)": "Africa",
+    "Congo (Kinshasa)": "Africa",
+    "Dominica": "Africa",
+    "Grenada": "North America",
+    "Kiribati": "Oceania",
+    "Liechtenstein": "Europe",
+    "Maldives": "Asia",
+    "Monaco": "Europe",
+    "Nauru": "Oceania",
+    "North Korea": "Asia",
+    "Samoa": "Oceania",
+    "San Marino": "Europe",
+    "Sao Tome and Principe": "Africa",
+    "Solomon Islands": "Oceania",
+    "St. Kitts and Nevis": "North America",
+    "St. Lucia": "North America",
+    "St. Martin (French part)": "North America",
+    "St. Vincent and the Grenadines": "North America",
+    "Suriname": "South America",
+    "The Bahamas": "North America",
+    "The Gambia": "Africa",
+    "Timor Leste": "Asia",
+    "Tonga": "Oceania",
+    "Turks and Caicos Islands": "North America",
+    "Tuvalu": "Oceania",
+    "Vanuatu": "Oceania",
+    "Antigua and Barbuda": "North America",
+}
+
+
+# ------------------------------------------------------------------ #
+# 🧹  Shared cleaning steps
+# ------------------------------------------------------------------ #
+def normalise_countries(wide: pd.DataFrame, excluded: tuple[str, ...] = NON_COUNTRIES) -> pd.DataFrame:
+    """Drop non-country rows (*excluded*) and harmonise country spelling."""
+    df = wide[~wide["Country"].isin(excluded)].reset_index(drop=True)
+    country = (
+        df["Country"].str.strip()
+        .str.replace(" And ", " and ", regex=False)
+        .str.replace(" Of ", " of ", regex=False)
+        .str.replace(" Dr", " DR", regex=False)
+    )
+    return df.assign(Country=country.replace(COUNTRY_FIXES))
+
+
+def year_columns(wide: pd.DataFrame, last_year: int = LAST_YEAR) -> list[str]:
+    """Year columns of a wide table that fall inside FIRST_YEAR..last_year."""
+    return [c for c in wide.columns if c.isdigit() and FIRST_YEAR <= int(c) <= last_year]
+
+
+def complete_wide(wide: pd.DataFrame, max_missing: int, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    """Drop countries missing more than *max_missing* years and interpolate the rest."""
+    years = year_columns(wide, last_year)
+    kept = wide[wide[years].isna().sum(axis=1) <= max_missing].reset_index(drop=True)
+    filled = kept[years].T.interpolate(limit_direction="both").T
+    return pd.concat([kept[["Country"]], filled], axis=1)
+
+
+def to_long(wide: pd.DataFrame, value_name: str, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    """Melt a Country × year table into ``Year, Country, <value_name>`` sorted by country."""
+    long = wide.melt(id_vars="Country", value_vars=year_columns(wide, last_year), var_name="Year", value_name=value_name)
+    long["Year"] = long["Year"].astype(int)
+    long = long.sort_values(["Country", "Year"]).reset_index(drop=True)
+    return long[["Year", "Country", value_name]]
+
+
+# ------------------------------------------------------------------ #
+# 📥  Raw readers
+# ------------------------------------------------------------------ #
+def read_sipri(path: Path, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    """Read a SIPRI Country × year export (values as numbers, FIRST_YEAR..last_year only)."""
+    raw = pd.read_csv(path, encoding="utf-8-sig")
+    wide = normalise_countries(raw)
+    years = year_columns(wide, last_year)
+    wide[years] = wide[years].apply(pd.to_numeric, errors="coerce")
+    return wide[["Country", *years]]
+
+
+def read_wb(path: Path, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    """Read a World Bank DataBank export (``1992 [YR1992]`` headers, ``..`` for missing)."""
+    raw = pd.read_csv(path, encoding="utf-8-sig").rename(columns={"Country Name": "Country"})
+    raw = raw.rename(columns={c: c[:4] for c in raw.columns if c[:4].isdigit()})
+    raw = raw[raw["Country Code"].notna()]
+    wide = normalise_countries(raw, WB_NON_COUNTRIES)
+    years = year_columns(wide, last_year)
+    wide[years] = wide[years].apply(pd.to_numeric, errors="coerce")
+    return wide[["Country", *years]]
+
+
+# ------------------------------------------------------------------ #
+# 🔗  Merge
+# ------------------------------------------------------------------ #
+MERGED_COLUMNS = ["Year", "Country", "Defense_Share_GOV", "Defense_Share_GDP", "Defense_USD", "GDP"]
+
+
+def merge_long(frames: list[pd.DataFrame], how: str) -> pd.DataFrame:
+    """Merge long tables on Country/Year and attach the continent."""
+    merged = None
+    for frame in frames:
+        frame = frame.assign(Country=frame["Country"].str.strip().replace(MERGE_RENAMES))
+        merged = frame if merged is None else merged.merge(frame, on=["Country", "Year"], how=how)
+    merged = merged[[c for c in MERGED_COLUMNS if c in merged.columns]]
+    merged = merged.sort_values(["Country", "Year"]).reset_index(drop=True)
+    merged["Continent"] = merged["Country"].map(CONTINENTS).fillna("Unknown")
+    return merged
+
+
+# ------------------------------------------------------------------ #
+# 🏗️  Build stages (inputs / outputs are paths, see build_data.py)
+# ------------------------------------------------------------------ #
+def clean_indicator_stage(
+    inputs: list[Path],
+    outputs: list[Path],
+    *,
+    source: str,
+    value_column: str,
+    max_missing: int,
+    scale: float = 1.0,
+    complete_long_divisor: float = 1.0,
+    last_year: int = LAST_YEAR,
+) -> None:
+    """Raw export → ``[long, complete_wide, complete_long]`` CSVs."""
+    (raw_path,) = inputs
+    long_path, wide_path, complete_long_path = outputs
+    wide = read_indicator(raw_path, source, scale, last_year)
+
+    for path in outputs:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    to_long(wide, value_column, last_year).to_csv(long_path, index=False)
+    write_complete(wide, [wide_path, complete_long_path], value_column=value_column, max_missing=max_missing,
+                   complete_long_divisor=complete_long_divisor, last_year=last_year)
+
+
+def read_indicator(raw_path: Path, source: str, scale: float = 1.0, last_year: int = LAST_YEAR) -> pd.DataFrame:
+    """Raw SIPRI / World Bank export → scaled Country × year table."""
+    wide = read_sipri(raw_path, last_year) if source == "sipri" else read_wb(raw_path, last_year)
+    years = year_columns(wide, last_year)
+    wide[years] = wide[years] * scale
+    return wide
+
+
+def write_complete(
+    wide: pd.DataFrame,
+    outputs: list[Path],
+    *,
+    value_column: str,
+    max_missing: int,
+    complete_long_divisor: float = 1.0,
+    last_year: int = LAST_YEAR,
+) -> None:
+    """Scaled wide table → ``[complete_wide, complete_long]`` CSVs (gaps interpolated)."""
+    wide_path, complete_long_path = outputs
+    complete = complete_wide(wide, max_missing, last_year)
+    complete_long = to_long(complete, value_column, last_year)
+    complete_long[value_column] = complete_long[value_column] / complete_long_divisor
+    complete.to_csv(wide_path, index=False)
+    complete_long.to_csv(complete_long_path, index=False)
+
+
+def merge_stage(inputs: list[Path], outputs: list[Path], *, how: str) -> None:
+    """Long indicator CSVs → merged long CSV with Continent."""
+    (merged_path,) = outputs
+    merged = merge_long([pd.read_csv(path) for path in inputs], how=how)
+    merged_path.parent.mkdir(parents=True, exist_ok=True)
+    merged.to_csv(merged_path, index=False)
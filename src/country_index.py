@@ -0,0 +1,205 @@
+"""
+country_index.py
+----------------
+Indexed country metadata (name → ISO3, ISO3 / name → coordinates).
+
+The coordinate table under ``data/clean/all`` is loaded once per process and
+turned into hash maps plus aligned NumPy arrays, so that
+
+- single lookups (``iso3("France")``, ``coords("FRA")``) are O(1), and
+- a whole Series / array of names resolves in one vectorized
+  ``Index.get_indexer`` call (``iso3_many``, ``coords_many``).
+
+``country_coordinates.csv`` is generated from the Natural Earth shapefile by
+``src/geometry.py`` and has a row for every country it draws. Names are
+resolved through ``country_iso3.csv`` as well, so the spellings used by the
+SIPRI / World Bank tables ("United States", "Congo, Dem. Rep.") find the
+same row as the Natural Earth names. Other files with ``lat`` / ``lon`` or
+``Latitude`` / ``Longitude`` headers can still be indexed; the first file
+listed wins when a country appears in several.
+
+Names the tables cannot resolve still come back as ``"N/A"`` /
+``(None, None)`` / NaN, but each lookup that hits one emits an
+:class:`UnresolvedCountryWarning` naming them, and
+:meth:`CountryIndex.unresolved` lists them up front (the merged data
+should only leave historical entities such as "Yugoslavia").
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import warnings
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_store import CLEAN_DIR, COUNTRY_COORDINATES, COUNTRY_ISO3
+
+MISSING_ISO3 = "N/A"
+
+METADATA_FILES = (CLEAN_DIR / COUNTRY_COORDINATES,)
+NAME_FILE = CLEAN_DIR / COUNTRY_ISO3
+
+_ISO_ALIASES = {"iso3", "alpha3", "alpha_3", "iso_3", "iso"}
+_LAT_ALIASES = {"lat", "latitude"}
+_LON_ALIASES = {"lon", "lng", "long", "longitude"}
+# Unresolved names quoted in one warning; the rest are counted.
+MAX_WARNED_NAMES = 10
+
+
+class UnresolvedCountryWarning(UserWarning):
+    """A lookup asked for countries the metadata has no ISO3 or coordinates for."""
+
+
+def _warn_unresolved(kind: str, names: list[str]) -> None:
+    if not names:
+        return
+    shown = ", ".join(names[:MAX_WARNED_NAMES])
+    more = f" and {len(names) - MAX_WARNED_NAMES} more" if len(names) > MAX_WARNED_NAMES else ""
+    warnings.warn(f"No {kind} for {shown}{more}.", UnresolvedCountryWarning, stacklevel=3)
+
+
+def read_country_metadata(csv_path: Path | str) -> pd.DataFrame:
+    """Read one metadata CSV into ``Country, ISO3, lat, lon`` (ISO3 may be missing)."""
+    df = pd.read_csv(csv_path)
+    df = df.rename(columns=lambda c: c.strip())
+
+    renames = {}
+    for col in df.columns:
+        key = col.lower().replace("-", "_")
+        if key in _ISO_ALIASES and "ISO3" not in renames.values():
+            renames[col] = "ISO3"
+        elif key in _LAT_ALIASES and "lat" not in renames.values():
+            renames[col] = "lat"
+        elif key in _LON_ALIASES and "lon" not in renames.values():
+            renames[col] = "lon"
+    df = df.rename(columns=renames)
+
+    if "lat" not in df.columns or "lon" not in df.columns:
+        raise KeyError(f"Could not find both latitude and longitude columns in {csv_path}.")
+    if "ISO3" not in df.columns:
+        df["ISO3"] = MISSING_ISO3
+
+    df["Country"] = df["Country"].astype(str).str.strip()
+    df["ISO3"] = df["ISO3"].fillna(MISSING_ISO3).astype(str).str.strip()
+    return df[["Country", "ISO3", "lat", "lon"]]
+
+
+class CountryIndex:
+    """Immutable lookup tables over the country metadata."""
+
+    def __init__(self, metadata: pd.DataFrame, aliases: Optional[pd.DataFrame] = None):
+        metadata = metadata.drop_duplicates("Country", keep="first").reset_index(drop=True)
+        self._countries = metadata["Country"].tolist()
+        self._iso3 = metadata["ISO3"].to_numpy(dtype=object)
+        self._lat = metadata["lat"].to_numpy(dtype="float64")
+        self._lon = metadata["lon"].to_numpy(dtype="float64")
+
+        self._by_iso3 = {}
+        for pos, code in enumerate(self._iso3):
+            if code != MISSING_ISO3:
+                self._by_iso3.setdefault(code, pos)
+
+        # Every known name (metadata names first, then aliases) → metadata row.
+        self._by_name = dict(zip(self._countries, range(len(self._countries))))
+        if aliases is not None:
+            for name, code in zip(aliases["Country"].astype(str), aliases["ISO3"].astype(str)):
+                pos = self._by_iso3.get(code)
+                if pos is not None:
+                    self._by_name.setdefault(name, pos)
+        self._names = pd.Index(list(self._by_name))
+        # Trailing -1 so that get_indexer's "not found" (-1) maps to -1.
+        self._rows = np.append(np.fromiter(self._by_name.values(), dtype="int64", count=len(self._by_name)), -1)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Path | str] = METADATA_FILES,
+                   names: Optional[Path | str] = NAME_FILE) -> "CountryIndex":
+        """Index the existing files of *paths* (the first listed wins a country) and the *names* aliases.
+
+        Raises :class:`FileNotFoundError` naming *paths* when none of them exists.
+        """
+        paths = [Path(p) for p in paths]
+        frames = [read_country_metadata(p) for p in paths if p.exists()]
+        if not frames:
+            expected = ", ".join(str(p) for p in paths) or "(none given)"
+            raise FileNotFoundError(f"No country metadata file found; expected one of: {expected}. "
+                                    "Run `python src/geometry.py` to generate the coordinates.")
+        aliases = pd.read_csv(names) if names is not None and Path(names).exists() else None
+        return cls(pd.concat(frames, ignore_index=True), aliases)
+
+    def __len__(self) -> int:
+        return len(self._countries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._by_name or key in self._by_iso3
+
+    @property
+    def countries(self) -> list[str]:
+        return list(self._countries)
+
+    # -------------------------------------------------------------- #
+    # Single lookups
+    # -------------------------------------------------------------- #
+    def _position(self, key: str) -> Optional[int]:
+        pos = self._by_name.get(key)
+        return self._by_iso3.get(key) if pos is None else pos
+
+    def iso3(self, country: str) -> str:
+        """Return the ISO3 code for *country*, or ``"N/A"`` with a warning."""
+        pos = self._by_name.get(country)
+        code = MISSING_ISO3 if pos is None else self._iso3[pos]
+        if code == MISSING_ISO3:
+            _warn_unresolved("ISO3 code", [country])
+        return code
+
+    def coords(self, key: str) -> tuple[Optional[float], Optional[float]]:
+        """Return ``(lat, lon)`` for a country name or ISO3 code, or ``(None, None)`` with a warning."""
+        pos = self._position(key)
+        if pos is None or np.isnan(self._lat[pos]):
+            _warn_unresolved("coordinates", [key])
+            return None, None
+        return float(self._lat[pos]), float(self._lon[pos])
+
+    # -------------------------------------------------------------- #
+    # Vectorized lookups
+    # -------------------------------------------------------------- #
+    def positions(self, countries) -> np.ndarray:
+        """Row positions for every name in *countries* (``-1`` where unknown)."""
+        return self._rows[self._names.get_indexer(pd.Index(np.asarray(countries, dtype=object)))]
+
+    def iso3_many(self, countries) -> np.ndarray:
+        """ISO3 codes for a Series / array of country names (``"N/A"`` where unknown, with a warning)."""
+        pos = self.positions(countries)
+        codes = np.where(pos >= 0, self._iso3[pos], MISSING_ISO3)
+        _warn_unresolved("ISO3 code", _distinct(countries, codes == MISSING_ISO3))
+        return codes
+
+    def coords_many(self, countries) -> tuple[np.ndarray, np.ndarray]:
+        """``(lat, lon)`` arrays for a Series / array of country names (NaN where unknown, with a warning)."""
+        lat, lon = self._coords_at(self.positions(countries))
+        _warn_unresolved("coordinates", _distinct(countries, np.isnan(lat)))
+        return lat, lon
+
+    def _coords_at(self, pos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        known = pos >= 0
+        return np.where(known, self._lat[pos], np.nan), np.where(known, self._lon[pos], np.nan)
+
+    def unresolved(self, countries) -> list[str]:
+        """The distinct names in *countries* that have no coordinates, in order of appearance."""
+        lat, _ = self._coords_at(self.positions(countries))
+        return _distinct(countries, np.isnan(lat))
+
+
+def _distinct(countries, mask: np.ndarray) -> list[str]:
+    """The distinct entries of *countries* where *mask* is set, in order of appearance."""
+    return pd.unique(np.asarray(countries, dtype=object)[mask]).astype(str).tolist()
+
+
+@st.cache_resource(show_spinner=False)
+def get_country_index() -> CountryIndex:
+    """Return the process-wide :class:`CountryIndex` built from :data:`METADATA_FILES`."""
+    return CountryIndex.from_files()
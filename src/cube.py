@@ -0,0 +1,245 @@
+"""
+cube.py
+-------
+Dense ``country × year × indicator`` array over the merged long table.
+
+Every builder used to boolean-mask the long frame (``df["Country"] == c``,
+``df["Country"].isin(...)``) on each interaction. :class:`DataCube` stores
+the same numbers as one ``float32`` array with integer index maps for each
+axis, so a query is an index lookup plus a NumPy slice:
+
+- ``cube.country("France")``   → ``(year, indicator)`` view
+- ``cube.year(2003)``          → ``(country, indicator)`` view
+- ``cube.continent("Europe")`` → ``(country, year, indicator)`` view
+- ``cube.series("France", "Defense_USD")`` → ``(year,)`` view
+- ``cube.indexed(["Defense_USD", "GDP"], base_year=2000)`` → base-100
+  indexes of every country at once, computed once per base year
+
+Countries are ordered by continent, then name, so a continent is a contiguous
+block and its slice is a view as well. Missing values are ``NaN``. The array
+is read-only so it can be shared by every session.
+
+``python src/cube.py`` saves the cube under ``data/store/cube/`` (``.npy``
+plus a JSON file with the axes); :func:`load_cube` memory-maps it when it is
+newer than the merged CSV, and otherwise builds it from the long table.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_store import CLEAN_DIR, MERGED_LONG, ROOT_DIR, STORE_DIR, read_table
+
+CUBE_DIR = STORE_DIR / "cube"
+CUBE_NAME = "merged"
+ID_COLUMNS = ("Year", "Country", "Continent")
+
+
+class DataCube:
+    """Read-only ``(country, year, indicator)`` array with label → position maps."""
+
+    def __init__(self, values: np.ndarray, countries: Sequence[str], years: Sequence[int],
+                 indicators: Sequence[str], continents: Sequence[str]):
+        if values.shape != (len(countries), len(years), len(indicators)):
+            raise ValueError(f"Cube values of shape {values.shape} do not match the axes.")
+        if values.flags.writeable:
+            values.flags.writeable = False
+        self.values = values
+        self.countries = list(countries)
+        self.years = np.asarray(years, dtype="int16")
+        self.indicators = list(indicators)
+        self.continents = list(continents)  # continent of each country, aligned with ``countries``
+
+        self._country_pos = {c: i for i, c in enumerate(self.countries)}
+        self._indicator_pos = {name: k for k, name in enumerate(self.indicators)}
+        self._first_year = int(self.years[0]) if len(self.years) else 0
+        self._indexed: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+        self._continent_span = {}
+        for i, continent in enumerate(self.continents):
+            start, _ = self._continent_span.get(continent, (i, i))
+            self._continent_span[continent] = (start, i + 1)
+
+    # -------------------------------------------------------------- #
+    # Construction / persistence
+    # -------------------------------------------------------------- #
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, indicators: Optional[Iterable[str]] = None) -> "DataCube":
+        """Build the cube from a long table with ``Year``, ``Country``, ``Continent`` columns."""
+        if indicators is None:
+            indicators = [c for c in df.columns if c not in ID_COLUMNS and pd.api.types.is_numeric_dtype(df[c])]
+        indicators = list(indicators)
+
+        continent_of = (
+            df.assign(Country=df["Country"].astype(str), Continent=df["Continent"].astype(object).fillna(""))
+            .groupby("Country")["Continent"].first()
+        )
+        order = sorted(continent_of.index, key=lambda c: (continent_of[c] == "", continent_of[c], c))
+        years = np.arange(int(df["Year"].min()), int(df["Year"].max()) + 1, dtype="int16")
+
+        rows = pd.Index(order).get_indexer(df["Country"].astype(str))
+        cols = df["Year"].to_numpy(dtype="int64") - int(years[0])
+        values = np.full((len(order), len(years), len(indicators)), np.nan, dtype="float32")
+        values[rows, cols, :] = df[indicators].to_numpy(dtype="float32")
+        return cls(values, order, years, indicators, [continent_of[c] for c in order])
+
+    def save(self, directory: Path = CUBE_DIR, name: str = CUBE_NAME) -> Path:
+        """Write ``<name>.npy`` and ``<name>.json`` (axes) under *directory*."""
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(self.values))
+        axes = {
+            "countries": self.countries,
+            "years": self.years.tolist(),
+            "indicators": self.indicators,
+            "continents": self.continents,
+        }
+        (directory / f"{name}.json").write_text(json.dumps(axes), encoding="utf-8")
+        return directory / f"{name}.npy"
+
+    @classmethod
+    def load(cls, directory: Path = CUBE_DIR, name: str = CUBE_NAME, mmap: bool = True) -> "DataCube":
+        """Read a saved cube; with *mmap* the values stay on disk and are paged in on access."""
+        axes = json.loads((directory / f"{name}.json").read_text(encoding="utf-8"))
+        values = np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+        return cls(values, axes["countries"], axes["years"], axes["indicators"], axes["continents"])
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Content hash of the values and axes (used to key figure caches); computed once."""
+        digest = hashlib.sha256(np.ascontiguousarray(self.values).tobytes())
+        digest.update(json.dumps([self.countries, self.years.tolist(), self.indicators]).encode())
+        return digest.hexdigest()[:32]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes)
+
+    # -------------------------------------------------------------- #
+    # Index maps
+    # -------------------------------------------------------------- #
+    def country_index(self, country: str) -> int:
+        return self._country_pos[country]
+
+    def year_index(self, year: int) -> int:
+        j = int(year) - self._first_year
+        if not 0 <= j < len(self.years):
+            raise KeyError(year)
+        return j
+
+    def indicator_index(self, indicator: str) -> int:
+        return self._indicator_pos[indicator]
+
+    def __contains__(self, country: str) -> bool:
+        return country in self._country_pos
+
+    # -------------------------------------------------------------- #
+    # Slices (views, no copy)
+    # -------------------------------------------------------------- #
+    def country(self, country: str) -> np.ndarray:
+        """``(year, indicator)`` view for one country."""
+        return self.values[self._country_pos[country]]
+
+    def year(self, year: int) -> np.ndarray:
+        """``(country, indicator)`` view for one year."""
+        return self.values[:, self.year_index(year)]
+
+    def series(self, country: str, indicator: str) -> np.ndarray:
+        """``(year,)`` view of one indicator for one country."""
+        return self.values[self._country_pos[country], :, self._indicator_pos[indicator]]
+
+    def continent(self, continent: str) -> tuple[list[str], np.ndarray]:
+        """Countries of *continent* and their ``(country, year, indicator)`` view."""
+        start, stop = self._continent_span[continent]
+        return self.countries[start:stop], self.values[start:stop]
+
+    # -------------------------------------------------------------- #
+    # Small frames for the builders
+    # -------------------------------------------------------------- #
+    def frame(self, countries: Sequence[str], indicators: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Long ``Year, Country, <indicators>`` frame for a handful of *countries*."""
+        indicators = list(indicators or self.indicators)
+        rows = [self._country_pos[c] for c in countries]
+        cols = [self._indicator_pos[name] for name in indicators]
+        block = self.values[rows][:, :, cols]  # (n, year, k) – a small copy
+        n, n_years = len(rows), len(self.years)
+        data = {
+            "Year": np.tile(self.years.astype("int64"), n),
+            "Country": np.repeat(np.asarray(countries, dtype=object), n_years),
+        }
+        for k, name in enumerate(indicators):
+            data[name] = block[:, :, k].reshape(-1)
+        return pd.DataFrame(data)
+
+    def indexed(self, indicators: Sequence[str], base_year: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Base-100 indexes of *indicators* for every country, and each country's base year.
+
+        Returns ``(index, base_years)``: ``index`` is a read-only ``(country,
+        year, indicator)`` array of ``value / value_in_base_year * 100``,
+        ``NaN`` wherever one of the *indicators* is missing; ``base_years``
+        holds each country's base year, ``-1`` for countries without one. The
+        base is *base_year*, or each country's first year with every indicator
+        present when ``None``. Results are kept per (indicators, base year),
+        so later calls only slice.
+        """
+        cache_key = (tuple(indicators), None if base_year is None else int(base_year))
+        if cache_key not in self._indexed:
+            cols = [self._indicator_pos[name] for name in indicators]
+            block = self.values[:, :, cols].astype("float64")  # (country, year, k)
+            complete = np.isfinite(block).all(axis=2)
+            if base_year is None:
+                base = complete.argmax(axis=1)
+                has_base = complete.any(axis=1)
+            else:
+                base = np.full(len(self.countries), self.year_index(base_year))
+                has_base = complete[:, base[0]] if len(base) else np.zeros(0, dtype=bool)
+            bases = block[np.arange(len(self.countries)), base]  # (country, k)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                index = block / bases[:, None, :] * 100
+            index[~(complete & has_base[:, None])] = np.nan
+            index.flags.writeable = False
+            base_years = np.where(has_base, self.years[base], -1)
+            self._indexed[cache_key] = (index, base_years)
+        return self._indexed[cache_key]
+
+    def complete_countries(self, indicators: Sequence[str]) -> list[str]:
+        """Countries (by name) with at least one year where every *indicator* is present."""
+        cols = [self._indicator_pos[name] for name in indicators]
+        complete = np.isfinite(self.values[:, :, cols]).all(axis=2).any(axis=1)
+        return sorted(c for c, ok in zip(self.countries, complete) if ok)
+
+
+# ------------------------------------------------------------------ #
+# 📦  Loading / materializing
+# ------------------------------------------------------------------ #
+def load_cube(merged: Optional[pd.DataFrame] = None, mmap: bool = True) -> DataCube:
+    """Memory-map the saved cube if it is up to date, else build it from *merged*."""
+    npy = CUBE_DIR / f"{CUBE_NAME}.npy"
+    csv = CLEAN_DIR / MERGED_LONG
+    if npy.exists() and (CUBE_DIR / f"{CUBE_NAME}.json").exists() and npy.stat().st_mtime >= csv.stat().st_mtime:
+        return DataCube.load(mmap=mmap)
+    return DataCube.from_long(read_table(MERGED_LONG) if merged is None else merged)
+
+
+def build_cube() -> Path:
+    """Build the cube from the merged long table and save it under ``data/store/cube``."""
+    return DataCube.from_long(read_table(MERGED_LONG)).save()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Save the country × year × indicator cube under data/store/cube.")
+    parser.parse_args(argv)
+    path = build_cube()
+    print(f"wrote {path.relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+data_store.py
+-------------
+Columnar (Parquet) mirror of ``data/clean`` and the single typed loader that
+every page reads its data through.
+
+The clean CSVs stay the source of truth. ``python src/data_store.py`` converts
+every file under ``data/clean/{all,sipri,wb,agg}`` into ``data/store/`` with
+fixed dtypes so that a Streamlit rerun never has to parse CSV again:
+
+- ``Country`` / ``Continent`` / ``ISO3`` / ``Flow`` → ``category``
+- ``Year`` / ``Base_Year`` / ``Rank``     → ``int16``
+- every other numeric column              → ``float32``
+
+If a Parquet file is missing or older than its CSV (or ``pyarrow`` is not
+installed) the loader falls back to the CSV and applies the same schema, so
+pages always see identical dtypes.
+
+``data/clean/dataset_version.json`` records which years the clean tables
+cover, a content hash per table and a version counter that every build that
+changes a table and every appended year (``src/ingest.py``) bumps. File names keep their original
+``1992-2023`` suffix; the manifest is the source of truth for the range.
+:func:`dataset_version` is what the process-wide caches are keyed on.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+# ------------------------------------------------------------------ #
+# 📁  Locations – resolved from the repo root, not the working dir
+# ------------------------------------------------------------------ #
+from paths import CLEAN_DIR, ROOT_DIR, STORE_DIR  # re-exported
+
+CLEAN_SUBDIRS = ("all", "sipri", "wb", "agg")
+
+MERGED_LONG = "all/merged_long_1992-2023.csv"
+MERGED_COMPLETE_LONG = "all/merged_complete_long_1992-2023.csv"
+COUNTRY_COORDINATES = "all/country_coordinates.csv"  # written by src/geometry.py
+COUNTRY_ISO3 = "all/country_iso3.csv"                # idem: name variant → ISO3
+DATASET_VERSION_FILE = CLEAN_DIR / "dataset_version.json"
+
+# Year range of the first release; later years are appended by src/ingest.py.
+FIRST_YEAR = 1992
+LAST_YEAR = 2023
+VERSION_HISTORY = 20
+
+# ------------------------------------------------------------------ #
+# 🔧  Schema applied to every clean table
+# ------------------------------------------------------------------ #
+CATEGORICAL_COLUMNS = ("Country", "Continent", "ISO3", "Flow")
+INT16_COLUMNS = ("Year", "Base_Year", "Rank")
+INT16_DTYPE = "int16"
+MEASURE_DTYPE = "float32"
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Return *df* with the store dtypes applied (categoricals, int16 Year, float32 measures)."""
+    df = df.rename(columns=lambda c: str(c).strip())
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col in INT16_COLUMNS:
+            values = pd.to_numeric(df[col], errors="coerce")
+            if values.notna().all():
+                df[col] = values.astype(INT16_DTYPE)
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(MEASURE_DTYPE)
+    return df
+
+
+def append_csv(path: Path, rows: pd.DataFrame) -> int:
+    """Append *rows* to the CSV at *path* in its header's column order; returns the row count."""
+    header = pd.read_csv(path, nrows=0).columns
+    with open(path, "rb") as handle:
+        handle.seek(-1, 2)
+        needs_newline = handle.read(1) != b"\n"
+    with open(path, "a", encoding="utf-8", newline="") as handle:
+        if needs_newline:
+            handle.write("\n")
+        rows.reindex(columns=header).to_csv(handle, header=False, index=False, lineterminator="\n")
+    return len(rows)
+
+
+def store_path(relpath: str) -> Path:
+    """Return the Parquet path mirroring the clean CSV at *relpath*."""
+    return (STORE_DIR / relpath).with_suffix(".parquet")
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def read_table(relpath: str) -> pd.DataFrame:
+    """Read the clean table at *relpath* (relative to ``data/clean``) with the store schema.
+
+    Uses the Parquet mirror when it is present and up to date, otherwise the CSV.
+    """
+    csv_path = CLEAN_DIR / relpath
+    pq_path = store_path(relpath)
+    if (
+        pq_path.exists()
+        and _parquet_available()
+        and (not csv_path.exists() or pq_path.stat().st_mtime >= csv_path.stat().st_mtime)
+    ):
+        return pd.read_parquet(pq_path)
+    return apply_schema(pd.read_csv(csv_path))
+
+
+# ------------------------------------------------------------------ #
+# 🏷️  Dataset version
+# ------------------------------------------------------------------ #
+def read_dataset_version() -> dict:
+    """The version manifest, or the first release's defaults when there is none."""
+    if DATASET_VERSION_FILE.exists():
+        return json.loads(DATASET_VERSION_FILE.read_text(encoding="utf-8"))
+    return {"version": 0, "first_year": FIRST_YEAR, "last_year": LAST_YEAR, "tables": {}, "history": []}
+
+
+def year_range() -> tuple[int, int]:
+    """``(first_year, last_year)`` covered by the clean tables."""
+    manifest = read_dataset_version()
+    return int(manifest["first_year"]), int(manifest["last_year"])
+
+
+_version_memo: tuple[Optional[int], str] = (None, "")
+
+
+def dataset_version() -> str:
+    """Identifier of the current clean data (``"v<n>-<hash>"``); one ``stat`` when unchanged."""
+    global _version_memo
+    try:
+        stamp = DATASET_VERSION_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return "v0"
+    if _version_memo[0] != stamp:
+        manifest = read_dataset_version()
+        _version_memo = (stamp, f"v{manifest['version']}-{manifest.get('digest', '')}")
+    return _version_memo[1]
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def write_dataset_version(change: str, first_year: Optional[int] = None, last_year: Optional[int] = None,
+                          partition: Optional[dict] = None) -> dict:
+    """Re-hash every clean table and, if any changed, bump the version and record *change*.
+
+    When the tables and the year range are unchanged (a rebuild that
+    reproduced the same files) the previous manifest is returned as is, so
+    caches keyed on :func:`dataset_version` stay warm. *partition*
+    (``{"year": 2024, "rows": {relpath: n}}``) describes an appended year.
+    """
+    previous = read_dataset_version()
+    tables = {relpath: _file_digest(CLEAN_DIR / relpath) for relpath in clean_tables()}
+    digest = hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:12]
+    first_year = int(first_year if first_year is not None else previous["first_year"])
+    last_year = int(last_year if last_year is not None else previous["last_year"])
+    if previous.get("digest") == digest and (previous["first_year"], previous["last_year"]) == (first_year, last_year):
+        return previous
+    manifest = {
+        "version": int(previous["version"]) + 1,
+        "first_year": first_year,
+        "last_year": last_year,
+        "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "digest": digest,
+        "tables": tables,
+    }
+    entry = {"version": manifest["version"], "at": manifest["updated_at"], "change": change}
+    if partition:
+        entry["partition"] = partition
+    manifest["history"] = (previous.get("history", []) + [entry])[-VERSION_HISTORY:]
+    DATASET_VERSION_FILE.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+# ------------------------------------------------------------------ #
+# 📦  Cached loaders used by the pages
+# ------------------------------------------------------------------ #
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_table(relpath: str, version: str = "") -> pd.DataFrame:
+    """Cached :func:`read_table`; *version* (:func:`dataset_version`) keys the cache entry."""
+    return read_table(relpath)
+
+
+def load_merged(complete: bool = False) -> pd.DataFrame:
+    """Return the merged long table (Year, Country, defense measures, GDP, Continent)."""
+    return load_table(MERGED_COMPLETE_LONG if complete else MERGED_LONG, dataset_version())
+
+
+def load_country_coordinates() -> pd.DataFrame:
+    """Return the country metadata table (Country, Latitude, Longitude, ISO3)."""
+    return load_table(COUNTRY_COORDINATES, dataset_version())
+
+
+# ------------------------------------------------------------------ #
+# 🏗️  Build step – CSV → Parquet
+# ------------------------------------------------------------------ #
+def clean_tables() -> list[str]:
+    """Return every clean CSV as a path relative to ``data/clean``."""
+    return sorted(
+        path.relative_to(CLEAN_DIR).as_posix()
+        for sub in CLEAN_SUBDIRS
+        for path in (CLEAN_DIR / sub).glob("*.csv")
+    )
+
+
+def build_store(force: bool = False) -> list[Path]:
+    """Convert every clean CSV into its typed Parquet mirror.
+
+    Files whose Parquet copy is already newer than the CSV are skipped unless
+    *force* is set. Returns the paths that were (re)written.
+    """
+    written = []
+    for relpath in clean_tables():
+        csv_path = CLEAN_DIR / relpath
+        pq_path = store_path(relpath)
+        if not force and pq_path.exists() and pq_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            continue
+        pq_path.parent.mkdir(parents=True, exist_ok=True)
+        apply_schema(pd.read_csv(csv_path)).to_parquet(pq_path, index=False)
+        written.append(pq_path)
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the typed Parquet mirror of data/clean.")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    args = parser.parse_args(argv)
+
+    written = build_store(force=args.force)
+    for path in written:
+        print(f"wrote {path.relative_to(ROOT_DIR)}")
+    print(f"{len(written)} table(s) written to {STORE_DIR.relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    main()
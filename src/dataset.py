@@ -0,0 +1,202 @@
+"""
+dataset.py
+----------
+Process-wide, read-only dataset handle shared by every Streamlit session.
+
+``get_dataset()`` is built once per server process and dataset version
+(``st.cache_resource`` keyed on ``data_store.dataset_version()``, so an
+ingested year is picked up on the next rerun) from the typed loaders in
+:mod:`data_store`. Pages read tables through
+``dataset.view(name)``, which returns a shallow copy: no data is duplicated,
+and because pandas copy-on-write is enabled any mutation made by a page
+(``df["Year"] = ...``, ``df.loc[...] = ...``) lands on the page's own copy
+instead of the shared frame. The NumPy blocks of the shared tables are
+read-only, so an element write that bypasses the view (``tables["merged"].loc[...]
+= ...``) raises. Operations that swap a shared table's data wholesale
+(``sort_values(inplace=True)``, ``+=``) cannot be blocked that way:
+``dataset.verify()`` re-hashes the shared tables (order-sensitive, see
+:func:`frame_fingerprint`) and raises :class:`ReadOnlyDatasetError` when one
+changed; the diagnostics panel (``instrumentation.show_diagnostics``) runs it.
+
+Copy-on-write is always on from pandas 3. On 2.x ``app.py`` enables it
+(``PANDAS_COPY_ON_WRITE=1``) before pandas is imported; without it a write
+to a view fails on the read-only blocks instead of reaching the shared data.
+
+``memory_report()`` reports the shared bytes held once per process next to the
+bytes each session keeps privately, which is what worker sizing needs.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from aggregates import load_aggregates
+from cube import DataCube, load_cube
+from data_store import COUNTRY_COORDINATES, MERGED_COMPLETE_LONG, MERGED_LONG, dataset_version, read_table
+from instrumentation import count, counter, timed
+
+SHARED_TABLES = {
+    "merged": MERGED_LONG,
+    "merged_complete": MERGED_COMPLETE_LONG,
+    "countries": COUNTRY_COORDINATES,
+}
+
+# Sessions that have not reported for this long are dropped from the report.
+SESSION_IDLE_TTL = 3600
+
+
+class ReadOnlyDatasetError(RuntimeError):
+    """Raised when a shared table no longer matches the fingerprint it was built with."""
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Return a stable content hash of *df*: values, index and column names, in row and column order."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update("\x1f".join(map(str, df.columns)).encode())
+    return digest.hexdigest()[:24]
+
+
+def freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """Make the NumPy blocks of *df* read-only (in place) and return it."""
+    # pandas has no public switch for this; the block manager is stable across 2.x and 3.x.
+    for block in df._mgr.blocks:
+        if isinstance(block.values, np.ndarray):
+            block.values.flags.writeable = False
+    return df
+
+
+def fingerprint_of(data: pd.DataFrame | DataCube) -> str:
+    """:func:`frame_fingerprint` for a frame, the content hash for a :class:`~cube.DataCube`."""
+    return frame_fingerprint(data) if isinstance(data, pd.DataFrame) else data.fingerprint
+
+
+@dataclass(frozen=True)
+class SharedDataset:
+    """Immutable bundle of the clean and aggregate tables, shared across sessions."""
+
+    tables: Mapping[str, pd.DataFrame]
+    fingerprints: Mapping[str, str]
+    built_at: float = field(default_factory=time.time)
+    cube: Optional[DataCube] = None
+
+    @classmethod
+    def load(cls, sources: Mapping[str, str] = SHARED_TABLES) -> "SharedDataset":
+        tables = {name: read_table(relpath) for name, relpath in sources.items()}
+        cube = None
+        if "merged" in tables:
+            tables.update(load_aggregates(tables["merged"]))
+            cube = load_cube(tables["merged"])
+        fingerprints = {name: frame_fingerprint(freeze(df)) for name, df in tables.items()}
+        if cube is not None:
+            fingerprints["cube"] = cube.fingerprint
+        return cls(MappingProxyType(tables), MappingProxyType(fingerprints), cube=cube)
+
+    def view(self, name: str) -> pd.DataFrame | DataCube:
+        """Return a zero-copy view of table *name*; writes never reach the shared frame.
+
+        ``"cube"`` returns the shared :class:`~cube.DataCube` itself (its array is read-only).
+        """
+        if name == "cube":
+            return self.cube
+        return self.tables[name].copy(deep=False)
+
+    @property
+    def merged(self) -> pd.DataFrame:
+        return self.view("merged")
+
+    @property
+    def countries(self) -> pd.DataFrame:
+        return self.view("countries")
+
+    @property
+    def fingerprint(self) -> str:
+        """Fingerprint of the whole dataset, used to key downstream caches."""
+        return "-".join(self.fingerprints[name] for name in sorted(self.fingerprints))
+
+    @property
+    def nbytes(self) -> int:
+        cube_bytes = self.cube.nbytes if self.cube is not None else 0
+        return int(sum(df.memory_usage(deep=True).sum() for df in self.tables.values())) + cube_bytes
+
+    def verify(self) -> None:
+        """Raise :class:`ReadOnlyDatasetError` if any shared table was changed in place (values, order or columns)."""
+        for name, df in self.tables.items():
+            if frame_fingerprint(df) != self.fingerprints[name]:
+                raise ReadOnlyDatasetError(f"Shared table '{name}' was modified after loading.")
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _shared_dataset(version: str) -> SharedDataset:
+    count("dataset.load")
+    return SharedDataset.load()
+
+
+def get_dataset() -> SharedDataset:
+    """Return the process-wide :class:`SharedDataset` of the current dataset version."""
+    with timed("data", "get_dataset") as span:
+        loads = counter("dataset.load")
+        dataset = _shared_dataset(dataset_version())
+        span["cache"] = "hit" if counter("dataset.load") == loads else "miss"
+    return dataset
+
+
+# ------------------------------------------------------------------ #
+# 📏  Memory accounting
+# ------------------------------------------------------------------ #
+_SESSION_BYTES: dict[str, tuple[int, float]] = {}
+
+
+def _object_bytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    return sys.getsizeof(obj)
+
+
+def session_bytes() -> int:
+    """Approximate bytes held privately by the current session (its ``session_state``)."""
+    try:
+        return sum(_object_bytes(value) for value in st.session_state.values())
+    except Exception:  # no script run context (e.g. called from a CLI)
+        return 0
+
+
+def memory_report() -> dict:
+    """Return shared vs per-session memory for this server process.
+
+    Each call records the current session's private bytes; sessions idle for
+    longer than :data:`SESSION_IDLE_TTL` are dropped.
+    """
+    now = time.time()
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx else "local"
+    _SESSION_BYTES[session_id] = (session_bytes(), now)
+    for sid, (_, seen) in list(_SESSION_BYTES.items()):
+        if now - seen > SESSION_IDLE_TTL:
+            del _SESSION_BYTES[sid]
+
+    shared = get_dataset().nbytes
+    per_session = {sid: size for sid, (size, _) in _SESSION_BYTES.items()}
+    private = sum(per_session.values())
+    return {
+        "shared_bytes": shared,
+        "sessions": len(per_session),
+        "session_bytes": per_session[session_id],
+        "per_session_bytes": per_session,
+        "total_bytes": shared + private,
+        # what the process would hold if every session loaded its own copy
+        "unshared_total_bytes": shared * len(per_session) + private,
+    }
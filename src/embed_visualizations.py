@@ -1,54 +1,115 @@
+import functools
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from visualisations.defense_spending import (
     create_choropleth_map,
     create_defense_vs_gdp_scatter_excluding_usa_china,
     create_defense_gdp_indexed_trend,
     create_defense_spending_over_time,
     create_country_defense_bar_animation,
-    create_country_defense_trend
+    create_country_defense_trend,
+    INDEXED_TREND_INDICATORS,
+)
+from visualisations.arms_trade import (
+    FLOWS,
+    create_arms_market_share,
+    create_arms_top_traders,
+    create_arms_trade_comparison,
+)
+from visualisations.aid import (
+    create_oda_defense_ratio,
+    create_oda_gni_heatmap,
+    create_oda_trend,
+    create_top_donors_animation,
 )
+from figure_cache import cached_figure
+from indicators import engine_for, label_of
+from geometry import PLOTLY_CONFIG
+from instrumentation import fragment_run, plotly_chart
+
+# Initial widget selections (also pre-rendered by src/artifacts.py).
+DEFAULT_TREND_COUNTRIES = ["United States", "China"]
+DEFAULT_TREND_INDICATOR = "Defense_USD"
+DEFAULT_INDEXED_COUNTRIES = ["United States", "China"]
+DEFAULT_ARMS_COUNTRIES = ["United States", "China", "India"]
+DEFAULT_AID_DONORS = ["United States", "Germany", "Japan", "United Kingdom"]
+
+
+# Each render_* block is an st.fragment: changing its own widget (country,
+# selected countries) reruns only that block instead of the whole page.
+# *fingerprint* is the table's SharedDataset fingerprint, so the figure cache
+# does not hash the table again on every rerun.
+def isolated(render):
+    @st.fragment
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        with fragment_run(render.__name__):
+            return render(*args, **kwargs)
+    return wrapper
 
-def render_choropleth_map(df):
+
+@isolated
+def render_choropleth_map(df, fingerprint=None):
     #st.markdown("### 🗺️ Choropleth Map: Defense Spending as % of GDP")
-    fig = create_choropleth_map(df)
+    fig = cached_figure(create_choropleth_map, df, fingerprint=fingerprint)
     if fig:
         with st.container():
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_choropleth_map", use_container_width=True, config=PLOTLY_CONFIG)
 
-def render_defense_vs_gdp_scatter_excluding_usa_china(df):
+@isolated
+def render_defense_vs_gdp_scatter_excluding_usa_china(df, fingerprint=None):
     #st.markdown("### 📊 Scatter Plot: Defense vs GDP (Excl. USA & China)")
-    fig = create_defense_vs_gdp_scatter_excluding_usa_china(df)
+    fig = cached_figure(create_defense_vs_gdp_scatter_excluding_usa_china, df, fingerprint=fingerprint)
     if fig:
         with st.container():
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_defense_vs_gdp_scatter_excluding_usa_china", use_container_width=True)
     else:
         st.info("No data available for this plot.")
 
-def render_defense_gdp_indexed_trend(df):
+@isolated
+def render_defense_gdp_indexed_trend(cube, fingerprint=None):
     #st.markdown("### 📈 Indexed Trend: Defense & GDP Over Time")
-    country = st.selectbox("Select Country for Indexed Trend:", sorted(df['Country'].unique()))
-    fig = create_defense_gdp_indexed_trend(df, country)
+    options = cube.complete_countries(INDEXED_TREND_INDICATORS)
+    countries = st.multiselect(
+        "Select Countries for Indexed Trend:",
+        options=options,
+        default=[c for c in DEFAULT_INDEXED_COUNTRIES if c in options] or options[:1],
+        key="indexed_countries",
+    )
+    base_year = st.selectbox(
+        "Base year (= 100):",
+        options=[None] + cube.years.astype(int).tolist(),
+        format_func=lambda y: "First year with data" if y is None else str(y),
+        key="indexed_base_year",
+    )
+    if not countries:
+        st.info("Please select at least one country to display the trends.")
+        return
+    fig = cached_figure(create_defense_gdp_indexed_trend, cube, countries, base_year, fingerprint=fingerprint)
     if fig:
         with st.container():
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_defense_gdp_indexed_trend", use_container_width=True)
+    else:
+        st.info(f"None of the selected countries has both Defense and GDP data in {base_year}.")
 
-def render_defense_spending_over_time(df):
+@isolated
+def render_defense_spending_over_time(df, fingerprint=None):
     #st.markdown("### 🕒 Continental Trends: Defense Spending Over Time")
-    fig = create_defense_spending_over_time(df)
+    fig = cached_figure(create_defense_spending_over_time, df, fingerprint=fingerprint)
     if fig:
         with st.container():
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_defense_spending_over_time", use_container_width=True)
 
-def render_country_defense_bar_animation(df):
+@isolated
+def render_country_defense_bar_animation(df, fingerprint=None):
     #st.markdown("### 🏆 Animated Bar Chart: Top 20 Defense Spenders")
-    fig = create_country_defense_bar_animation(df)
+    fig = cached_figure(create_country_defense_bar_animation, df, fingerprint=fingerprint)
     if fig:
         with st.container():
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_country_defense_bar_animation", use_container_width=True)
 
-def render_country_defense_trend(df):
+@isolated
+def render_country_defense_trend(cube, fingerprint=None):
     #st.markdown("### 🧭 Country Comparison: Defense Spending Trends")
     st.markdown(
          "<p style='font-size:16px; color:#E0E0E0;'>Choose countries from the dropdown to explore individual defense spending trends over time.</p>",
@@ -56,12 +117,105 @@ def render_country_defense_trend(df):
     )
     countries = st.multiselect(
          "Select Countries:",
-         options=sorted(df["Country"].unique()),
-         default=["United States", "China"]  # or your preferred default
+         options=sorted(cube.countries),
+         default=DEFAULT_TREND_COUNTRIES
+    )
+    indicators = engine_for(cube).names()
+    indicator = st.selectbox(
+        "Indicator:",
+        options=indicators,
+        index=indicators.index(DEFAULT_TREND_INDICATOR),
+        format_func=lambda name: "{} ({})".format(*label_of(name)),
+        key="trend_indicator",
+    )
+    if countries:
+        fig = cached_figure(create_country_defense_trend, cube, countries, indicator, fingerprint=fingerprint)
+        if fig:
+            plotly_chart(fig, "create_country_defense_trend", use_container_width=True)
+    else:
+        st.info("Please select at least one country to display the trends.")
+
+
+# ------------------------------------------------------------------ #
+# 🚢  Arms Trade (df: aggregates.arms_trade)
+# ------------------------------------------------------------------ #
+@isolated
+def render_arms_top_traders(df, fingerprint=None):
+    flow = st.radio("Flow:", FLOWS, horizontal=True, key="arms_top_flow")
+    fig = cached_figure(create_arms_top_traders, df, flow, fingerprint=fingerprint)
+    if fig:
+        plotly_chart(fig, "create_arms_top_traders", use_container_width=True)
+    else:
+        st.info("No data available for this plot.")
+
+@isolated
+def render_arms_market_share(df, fingerprint=None):
+    flow = st.radio("Flow:", FLOWS, horizontal=True, key="arms_share_flow")
+    fig = cached_figure(create_arms_market_share, df, flow, fingerprint=fingerprint)
+    if fig:
+        plotly_chart(fig, "create_arms_market_share", use_container_width=True)
+    else:
+        st.info("No data available for this plot.")
+
+@isolated
+def render_arms_trade_comparison(df, fingerprint=None):
+    countries = st.multiselect(
+         "Select Countries:",
+         options=sorted(df["Country"].astype(str).unique()),
+         default=DEFAULT_ARMS_COUNTRIES,
+         key="arms_compare_countries",
     )
     if countries:
-        fig = create_country_defense_trend(df, countries)
+        fig = cached_figure(create_arms_trade_comparison, df, countries, fingerprint=fingerprint)
         if fig:
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, "create_arms_trade_comparison", use_container_width=True)
     else:
         st.info("Please select at least one country to display the trends.")
+
+
+# ------------------------------------------------------------------ #
+# 💸  Aid (df: aggregates.aid_donors)
+# ------------------------------------------------------------------ #
+@isolated
+def render_top_donors_animation(df, fingerprint=None):
+    fig = cached_figure(create_top_donors_animation, df, fingerprint=fingerprint)
+    if fig:
+        plotly_chart(fig, "create_top_donors_animation", use_container_width=True)
+    else:
+        st.info("No data available for this plot.")
+
+@isolated
+def render_oda_trend(df, fingerprint=None):
+    donors = st.multiselect(
+         "Select Donors:",
+         options=sorted(df["Country"].astype(str).unique()),
+         default=DEFAULT_AID_DONORS,
+         key="aid_trend_donors",
+    )
+    if donors:
+        fig = cached_figure(create_oda_trend, df, donors, fingerprint=fingerprint)
+        if fig:
+            plotly_chart(fig, "create_oda_trend", use_container_width=True)
+    else:
+        st.info("Please select at least one donor to display the trends.")
+
+@isolated
+def render_oda_gni_heatmap(df, fingerprint=None):
+    fig = cached_figure(create_oda_gni_heatmap, df, fingerprint=fingerprint)
+    if fig:
+        plotly_chart(fig, "create_oda_gni_heatmap", use_container_width=True)
+    else:
+        st.info("No data available for this plot.")
+
+@isolated
+def render_oda_defense_ratio(df, fingerprint=None):
+    years = sorted(df.loc[df["ODA_to_Defense"].notna(), "Year"].unique().tolist())
+    if not years:
+        st.info("No data available for this plot.")
+        return
+    year = st.select_slider("Year:", options=years, value=years[-1], key="aid_ratio_year")
+    fig = cached_figure(create_oda_defense_ratio, df, year, fingerprint=fingerprint)
+    if fig:
+        plotly_chart(fig, "create_oda_defense_ratio", use_container_width=True)
+    else:
+        st.info("No data available for this plot.")
@@ -0,0 +1,187 @@
+"""
+figure_cache.py
+---------------
+Memoized figure cache for the ``create_*`` visualisation builders.
+
+Figures are keyed by the builder name, a fingerprint of the input DataFrame
+and the builder's remaining parameters (country, selected countries, ...), and
+stored as serialized Plotly JSON:
+
+- an in-memory LRU tier bounded to ``maxsize`` entries, shared by every
+  session of the server process;
+- an optional on-disk tier (one ``<code_version>/<key>.json`` file per
+  figure) that survives restarts and is shared between worker processes.
+  Entries sit under the ``artifacts.code_version()`` of the builders that
+  made them, so a deploy that changes a builder starts from an empty
+  directory instead of serving the old figures;
+- a read-only tier of figures pre-rendered at build time into
+  ``assets/graphs`` (see ``src/artifacts.py``), checked before building.
+
+Set ``DEFAIDX_FIGURE_CACHE_SIZE`` / ``DEFAIDX_FIGURE_CACHE_DIR`` to size the
+memory tier and enable the disk tier for the process-wide cache, and
+``DEFAIDX_ARTIFACTS=0`` to ignore the pre-rendered artifacts.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from artifacts import ArtifactStore, code_version
+from cube import DataCube
+from dataset import fingerprint_of
+from instrumentation import note_payload, timed
+
+DEFAULT_MAXSIZE = 64
+# Serialized form of a builder that returned ``None`` (e.g. no data to plot).
+_NO_FIGURE = "null"
+
+
+class FigureCache:
+    """Bounded LRU cache of serialized figures with an optional disk tier."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, disk_dir: Optional[Path] = None, artifacts: Optional[ArtifactStore] = None):
+        self.maxsize = maxsize
+        self.disk_root = Path(disk_dir) if disk_dir else None
+        self.disk_dir = self.disk_root / code_version() if self.disk_root else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self.artifacts = artifacts
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.artifact_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # -------------------------------------------------------------- #
+    @staticmethod
+    def make_key(builder_name: str, fingerprint: str, args: tuple = (), kwargs: dict | None = None) -> str:
+        """Return the cache key for one builder call."""
+        params = json.dumps([list(args), kwargs or {}], sort_keys=True, default=str)
+        digest = hashlib.sha256(f"{builder_name}|{fingerprint}|{params}".encode()).hexdigest()
+        return f"{builder_name}-{digest[:24]}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the serialized figure for *key*, or ``None`` on a miss."""
+        return self._lookup(key)[0]
+
+    def _lookup(self, key: str) -> tuple[Optional[str], str]:
+        """Return ``(payload, tier)`` with tier ``"hit"``, ``"artifact_hit"``, ``"disk_hit"`` or ``"miss"``."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload, "hit"
+        if self.artifacts is not None and key in self.artifacts:
+            payload = self.artifacts.get(key)
+            if payload is not None:
+                with self._lock:
+                    self.artifact_hits += 1
+                self._remember(key, payload)
+                return payload, "artifact_hit"
+        if self.disk_dir:
+            path = self.disk_dir / f"{key}.json"
+            if path.exists():
+                payload = path.read_text(encoding="utf-8")
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, payload)
+                return payload, "disk_hit"
+        with self._lock:
+            self.misses += 1
+        return None, "miss"
+
+    def put(self, key: str, payload: str) -> None:
+        """Store the serialized figure *payload* under *key* in every tier."""
+        self._remember(key, payload)
+        if self.disk_dir:
+            path = self.disk_dir / f"{key}.json"
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(payload, encoding="utf-8")
+            tmp.replace(path)
+
+    def _remember(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(self, builder: Callable[..., Optional[go.Figure]], df: pd.DataFrame | DataCube, *args,
+                     fingerprint: Optional[str] = None, **kwargs) -> Optional[go.Figure]:
+        """Return ``builder(df, *args, **kwargs)``, served from the cache when possible.
+
+        *fingerprint* is ``fingerprint_of(df)`` when the caller already has it
+        (``SharedDataset.fingerprints[table]``); otherwise *df* is hashed on
+        every lookup. The call is recorded as a ``builder`` span with its
+        cache tier and payload size.
+        """
+        with timed("builder", builder.__name__) as span:
+            key = self.make_key(builder.__name__, fingerprint or fingerprint_of(df), args, kwargs)
+            payload, span["cache"] = self._lookup(key)
+            if payload is None:
+                fig = builder(df, *args, **kwargs)
+                payload = _NO_FIGURE if fig is None else fig.to_json()
+                self.put(key, payload)
+            elif payload == _NO_FIGURE:
+                fig = None
+            else:
+                fig = pio.from_json(payload)
+            span["payload_bytes"] = len(payload)
+        note_payload(fig, len(payload))
+        return fig
+
+    # -------------------------------------------------------------- #
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "artifact_hits": self.artifact_hits,
+                "artifacts": len(self.artifacts) if self.artifacts is not None else 0,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": sum(len(p) for p in self._entries.values()),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self, disk: bool = False) -> None:
+        """Drop every in-memory entry (and the disk tier of every code version if *disk* is set)."""
+        with self._lock:
+            self._entries.clear()
+        if disk and self.disk_root:
+            for path in self.disk_root.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache() -> FigureCache:
+    """Return the process-wide :class:`FigureCache`."""
+    return FigureCache(
+        maxsize=int(os.environ.get("DEFAIDX_FIGURE_CACHE_SIZE", DEFAULT_MAXSIZE)),
+        disk_dir=os.environ.get("DEFAIDX_FIGURE_CACHE_DIR") or None,
+        artifacts=None if os.environ.get("DEFAIDX_ARTIFACTS") == "0" else ArtifactStore(),
+    )
+
+
+def cached_figure(builder: Callable[..., Optional[go.Figure]], df: pd.DataFrame | DataCube, *args,
+                  fingerprint: Optional[str] = None, **kwargs) -> Optional[go.Figure]:
+    """Shortcut for ``get_figure_cache().get_or_build(builder, df, *args, fingerprint=..., **kwargs)``."""
+    return get_figure_cache().get_or_build(builder, df, *args, fingerprint=fingerprint, **kwargs)
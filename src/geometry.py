@@ -0,0 +1,419 @@
+"""
+geometry.py
+-----------
+Offline country geometry for the maps, built from the Natural Earth
+1:110m admin-0 shapefile shipped in ``data/raw/naturalearth``.
+
+Plotly's geo subplots draw their base map from a TopoJSON file they fetch
+at runtime (``https://cdn.plot.ly/...``) and resolve country *names* in the
+browser. ``python src/geometry.py`` instead writes
+
+- ``static/geo/world_110m.json`` – a Plotly-compatible TopoJSON topology
+  (``countries`` keyed by ISO3 with a label point ``ct``, plus ``land`` and
+  ``coastlines``), simplified with Douglas–Peucker at ``--tolerance``
+  degrees and quantized to a ``--quantization`` × ``--quantization`` grid.
+  The output only depends on the shapefile and those two settings.
+  Streamlit serves it from ``app/static/geo/`` (``server.enableStaticServing``)
+  and :data:`PLOTLY_CONFIG` points Plotly at it, so maps render without
+  network access and the browser caches the ~100 KB file once instead of
+  downloading the CDN topology;
+- ``data/clean/all/country_iso3.csv`` – every Natural Earth name variant
+  → ISO3, so builders pass ISO3 codes (``locationmode="ISO-3"``) and no
+  name matching happens client side;
+- ``data/clean/all/country_coordinates.csv`` – one row per country with
+  the area-weighted centroid of its largest polygon (``Latitude`` /
+  ``Longitude``) and Natural Earth's label point, computed for all
+  countries in one vectorized pass (:func:`centroid_table`), plus the
+  states too small for a 1:110m shape (Bahrain, Malta, Singapore, ...)
+  from ``data/raw/geo/supplementary_points.csv``
+  (``Country, ISO3, Latitude, Longitude``). It is the only coordinate
+  source ``country_index`` reads.
+
+The reader understands the subset of the shapefile / dBASE formats Natural
+Earth uses (polygon shapes, character / numeric fields), so no GIS
+dependency is needed.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_store import CLEAN_DIR, COUNTRY_COORDINATES, COUNTRY_ISO3, ROOT_DIR, read_table
+
+SHAPEFILE = ROOT_DIR / "data" / "raw" / "naturalearth" / "ne_110m_admin_0_countries"
+TOPOLOGY_DIR = ROOT_DIR / "static" / "geo"
+# Country points for the states 1:110m has no shape for (hand-maintained).
+SUPPLEMENTARY_POINTS = ROOT_DIR / "data" / "raw" / "geo" / "supplementary_points.csv"
+TOPOLOGY_NAME = "world_110m"  # the name Plotly requests for scope "world", resolution 110
+
+# Browser-relative URL of TOPOLOGY_DIR under Streamlit's static file serving.
+TOPOJSON_URL = "app/static/geo/"
+PLOTLY_CONFIG = {"topojsonURL": TOPOJSON_URL}
+
+DEFAULT_TOLERANCE = 0.05      # degrees
+DEFAULT_QUANTIZATION = 10_000
+
+# Name fields of the attribute table that may match a country name in the data.
+NAME_FIELDS = (
+    "NAME", "NAME_LONG", "ADMIN", "NAME_EN", "NAME_SORT", "NAME_CIAWF",
+    "BRK_NAME", "GEOUNIT", "SUBUNIT", "SOVEREIGNT", "FORMAL_EN",
+)
+# Spellings of the clean tables that Natural Earth does not use. Micro-states
+# (Bahrain, Malta, Singapore, ...) have no 1:110m shape: they stay off the
+# choropleth, and their coordinates come from SUPPLEMENTARY_POINTS.
+EXTRA_NAMES = {
+    "Congo (Brazzaville)": "COG",
+    "Congo (Kinshasa)": "COD",
+    "Timor Leste": "TLS",
+}
+
+
+# ------------------------------------------------------------------ #
+# 📖  Reading the shapefile
+# ------------------------------------------------------------------ #
+@dataclass
+class Shape:
+    """One record of the shapefile: its attributes and its rings as ``(n, 2)`` lon/lat arrays."""
+
+    attributes: dict
+    rings: list[np.ndarray]
+
+
+def read_dbf(path: Path) -> pd.DataFrame:
+    """Read a dBASE III table (character and numeric fields) into a DataFrame."""
+    raw = path.read_bytes()
+    n_records, header_len, record_len = struct.unpack("<IHH", raw[4:12])
+    fields = []
+    for pos in range(32, header_len - 1, 32):
+        descriptor = raw[pos:pos + 32]
+        name = descriptor[:11].split(b"\0")[0].decode("ascii")
+        fields.append((name, chr(descriptor[11]), descriptor[16]))
+
+    dtype = np.dtype([("_deleted", "S1")] + [(name, f"S{size}") for name, _, size in fields])
+    body = np.frombuffer(raw, dtype=dtype, count=n_records, offset=header_len)
+    assert dtype.itemsize == record_len, "unexpected dBASE record layout"
+
+    columns = {}
+    for name, kind, _ in fields:
+        values = pd.Series(body[name]).str.decode("utf-8").str.strip()
+        if kind in "NF":
+            values = pd.to_numeric(values, errors="coerce")
+        columns[name] = values
+    return pd.DataFrame(columns)[body["_deleted"] != b"*"].reset_index(drop=True)
+
+
+def read_shp(path: Path, index_path: Path) -> list[list[np.ndarray]]:
+    """Read the rings of every polygon record of a ``.shp`` (offsets from its ``.shx``)."""
+    raw = path.read_bytes()
+    index = np.frombuffer(index_path.read_bytes(), dtype=">i4", offset=100).reshape(-1, 2)
+    shapes = []
+    for offset_words, _ in index:
+        pos = int(offset_words) * 2 + 8  # skip the record header
+        shape_type = struct.unpack_from("<i", raw, pos)[0]
+        if shape_type == 0:
+            shapes.append([])
+            continue
+        if shape_type not in (5, 15, 25):
+            raise ValueError(f"{path.name}: shape type {shape_type} is not a polygon")
+        n_parts, n_points = struct.unpack_from("<2i", raw, pos + 36)
+        parts = np.frombuffer(raw, dtype="<i4", count=n_parts, offset=pos + 44)
+        points = np.frombuffer(raw, dtype="<f8", count=2 * n_points, offset=pos + 44 + 4 * n_parts)
+        points = points.reshape(-1, 2)
+        bounds = np.append(parts, n_points)
+        shapes.append([points[bounds[i]:bounds[i + 1]] for i in range(n_parts)])
+    return shapes
+
+
+def read_shapefile(stem: Path = SHAPEFILE) -> list[Shape]:
+    """Read ``<stem>.shp`` / ``.shx`` / ``.dbf`` into :class:`Shape` records."""
+    stem = Path(stem)
+    table = read_dbf(stem.with_suffix(".dbf"))
+    rings = read_shp(stem.with_suffix(".shp"), stem.with_suffix(".shx"))
+    if len(table) != len(rings):
+        raise ValueError(f"{stem.name}: {len(table)} attribute rows for {len(rings)} shapes")
+    return [Shape(attrs, shape_rings) for attrs, shape_rings in zip(table.to_dict("records"), rings)]
+
+
+def iso3_of(attributes: dict) -> str:
+    """ISO3 of a Natural Earth record (``ADM0_A3`` where ``ISO_A3`` is ``-99``, e.g. France, Norway)."""
+    for field in ("ISO_A3", "ISO_A3_EH", "ADM0_A3"):
+        code = str(attributes.get(field, "")).strip()
+        if len(code) == 3 and code != "-99":
+            return code
+    raise ValueError(f"No ISO3 code for {attributes.get('ADMIN')}")
+
+
+# ------------------------------------------------------------------ #
+# ✂️  Simplification / quantization
+# ------------------------------------------------------------------ #
+def simplify_ring(ring: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas–Peucker simplification of a closed ring (first point == last point)."""
+    n = len(ring)
+    if tolerance <= 0 or n <= 4:
+        return ring
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    # A closed ring has no chord to measure from: split it at its farthest point.
+    far = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    keep[far] = True
+    stack = [(0, far), (far, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = ring[start], ring[end]
+        seg = ring[start + 1:end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(dx * (seg[:, 1] - a[1]) - dy * (seg[:, 0] - a[0])) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = start + 1 + i
+            keep[mid] = True
+            stack.extend(((start, mid), (mid, end)))
+    return ring[keep]
+
+
+def signed_area(ring: np.ndarray) -> float:
+    """Shoelace area; negative for the clockwise outer rings of a shapefile."""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+
+def contains(ring: np.ndarray, point: np.ndarray) -> bool:
+    """Even–odd point-in-polygon test."""
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+    crosses = (y > point[1]) != (y2 > point[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at = x + (point[1] - y) * (x2 - x) / (y2 - y)
+    return bool(np.count_nonzero(crosses & (point[0] < at)) % 2)
+
+
+class Quantizer:
+    """TopoJSON ``transform``: lon/lat ↔ integer grid positions."""
+
+    def __init__(self, bbox: Sequence[float], quantization: int):
+        x0, y0, x1, y1 = bbox
+        self.translate = np.array([x0, y0])
+        self.scale = np.array([
+            (x1 - x0) / (quantization - 1) or 1.0,
+            (y1 - y0) / (quantization - 1) or 1.0,
+        ])
+
+    def __call__(self, ring: np.ndarray) -> np.ndarray:
+        q = np.round((ring - self.translate) / self.scale).astype("int64")
+        # Drop the points that collapsed onto their predecessor.
+        moved = np.ones(len(q), dtype=bool)
+        moved[1:] = (np.diff(q, axis=0) != 0).any(axis=1)
+        return q[moved]
+
+    @property
+    def transform(self) -> dict:
+        return {"scale": self.scale.tolist(), "translate": self.translate.tolist()}
+
+
+# ------------------------------------------------------------------ #
+# 🗺️  Topology
+# ------------------------------------------------------------------ #
+def _polygons(rings: list[np.ndarray]) -> list[list[int]]:
+    """Group ring positions into polygons: each outer ring followed by the holes it contains."""
+    outers = [i for i, r in enumerate(rings) if signed_area(r) < 0]
+    polygons = {i: [i] for i in outers}
+    for i, ring in enumerate(rings):
+        if i in polygons:
+            continue
+        owner = next((o for o in outers if contains(rings[o], ring[0])), None)
+        if owner is not None:
+            polygons[owner].append(i)
+    return list(polygons.values())
+
+
+def build_topology(shapes: list[Shape], tolerance: float = DEFAULT_TOLERANCE,
+                   quantization: int = DEFAULT_QUANTIZATION) -> dict:
+    """Plotly-compatible TopoJSON of *shapes* (one arc per ring, delta-encoded)."""
+    quantize = Quantizer((-180.0, -90.0, 180.0, 90.0), quantization)
+    arcs: list[list[list[int]]] = []
+    countries = []
+    for shape in shapes:
+        rings = []
+        for ring in shape.rings:
+            q = quantize(simplify_ring(ring, tolerance))
+            if len(q) >= 4 and (q[0] == q[-1]).all() and signed_area(q.astype("float64")) != 0:
+                rings.append(q)
+        if not rings:  # simplified away: keep the largest ring unsimplified
+            largest = max(shape.rings, key=lambda r: abs(signed_area(r)))
+            rings = [quantize(largest)]
+
+        polygons = []
+        for members in _polygons([r.astype("float64") for r in rings]):
+            refs = []
+            for i in members:
+                ring = rings[i]
+                arcs.append(np.vstack([ring[:1], np.diff(ring, axis=0)]).tolist())
+                refs.append(len(arcs) - 1)
+            polygons.append(refs)
+
+        attrs = shape.attributes
+        geometry = {"type": "Polygon", "arcs": polygons[0]} if len(polygons) == 1 else {
+            "type": "MultiPolygon", "arcs": polygons,
+        }
+        countries.append({
+            **geometry,
+            "id": iso3_of(attrs),
+            "properties": {
+                "name": attrs["NAME"],
+                "ct": [round(float(attrs["LABEL_X"]), 3), round(float(attrs["LABEL_Y"]), 3)],
+            },
+        })
+
+    land = {"type": "MultiPolygon", "arcs": [
+        p for c in countries for p in ([c["arcs"]] if c["type"] == "Polygon" else c["arcs"])
+    ]}
+    coastlines = {"type": "MultiLineString", "arcs": [[i] for i in range(len(arcs))]}
+    empty = {"type": "GeometryCollection", "geometries": []}
+    return {
+        "type": "Topology",
+        "transform": quantize.transform,
+        "objects": {
+            "countries": {"type": "GeometryCollection", "geometries": countries},
+            "land": {"type": "GeometryCollection", "geometries": [land]},
+            "coastlines": {"type": "GeometryCollection", "geometries": [coastlines]},
+            # Layers Plotly may request that Natural Earth admin-0 does not cover.
+            "ocean": empty, "lakes": empty, "rivers": empty, "subunits": empty,
+        },
+        "arcs": arcs,
+    }
+
+
+def name_table(shapes: list[Shape]) -> pd.DataFrame:
+    """``Country, ISO3`` for every name variant of every shape (first shape wins a name)."""
+    rows = []
+    for shape in shapes:
+        code = iso3_of(shape.attributes)
+        for field in NAME_FIELDS:
+            name = str(shape.attributes.get(field) or "").strip()
+            if name:
+                rows.append((name, code))
+    rows.extend(EXTRA_NAMES.items())
+    return pd.DataFrame(rows, columns=["Country", "ISO3"]).drop_duplicates("Country").reset_index(drop=True)
+
+
+def centroid_table(shapes: list[Shape]) -> pd.DataFrame:
+    """``Country, ISO3, Latitude, Longitude, Label_Latitude, Label_Longitude`` for every shape.
+
+    The shoelace sums of every ring of every shape are computed at once on
+    the concatenated vertices and reduced per ring with ``bincount``; each
+    country then takes the centroid of its largest outer ring, so overseas
+    territories (French Guiana, Alaska) do not drag the point into the sea.
+    Where that centroid lies outside the ring (concave shapes such as Norway
+    or Vietnam) the label point is used instead.
+    """
+    rings = [ring for shape in shapes for ring in shape.rings]
+    shape_of_ring = np.repeat(np.arange(len(shapes)), [len(s.rings) for s in shapes])
+    ring_of_point = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+    points = np.concatenate(rings)
+
+    # Edge i runs from point i to point i + 1; the last point of a ring closes it.
+    x0, y0 = points[:-1, 0], points[:-1, 1]
+    x1, y1 = points[1:, 0], points[1:, 1]
+    same_ring = ring_of_point[:-1] == ring_of_point[1:]
+    cross = np.where(same_ring, x0 * y1 - x1 * y0, 0.0)
+    ring_ids = ring_of_point[:-1]
+    area = 0.5 * np.bincount(ring_ids, cross, minlength=len(rings))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cx = np.bincount(ring_ids, (x0 + x1) * cross, minlength=len(rings)) / (6 * area)
+        cy = np.bincount(ring_ids, (y0 + y1) * cross, minlength=len(rings)) / (6 * area)
+
+    # Even–odd test of each ring's centroid against its own edges.
+    px, py = cx[ring_ids], cy[ring_ids]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+    crossing = same_ring & ((y0 > py) != (y1 > py)) & (px < at)
+    inside = np.bincount(ring_ids, crossing, minlength=len(rings)) % 2 == 1
+
+    # Largest outer (clockwise, negative area) ring of each shape.
+    order = np.lexsort((area, shape_of_ring))  # per shape, most negative area first
+    first = np.unique(shape_of_ring[order], return_index=True)[1]
+    mainland = order[first]
+
+    attrs = pd.DataFrame([s.attributes for s in shapes])
+    use_centroid = inside[mainland]
+    return pd.DataFrame({
+        "Country": attrs["NAME"],
+        "ISO3": [iso3_of(s.attributes) for s in shapes],
+        "Latitude": np.where(use_centroid, cy[mainland], attrs["LABEL_Y"]).round(4),
+        "Longitude": np.where(use_centroid, cx[mainland], attrs["LABEL_X"]).round(4),
+        "Label_Latitude": attrs["LABEL_Y"].round(4),
+        "Label_Longitude": attrs["LABEL_X"].round(4),
+    })
+
+
+def with_supplementary_points(centroids: pd.DataFrame, path: Path = SUPPLEMENTARY_POINTS) -> pd.DataFrame:
+    """*centroids* plus the rows of *path* for countries it does not have (by name or ISO3)."""
+    points = pd.read_csv(path)
+    points = points[~points["Country"].isin(centroids["Country"]) & ~points["ISO3"].isin(centroids["ISO3"])]
+    points = points.assign(Label_Latitude=points["Latitude"], Label_Longitude=points["Longitude"])
+    return pd.concat([centroids, points[centroids.columns]], ignore_index=True)
+
+
+def write_geometry(tolerance: float = DEFAULT_TOLERANCE, quantization: int = DEFAULT_QUANTIZATION,
+                   topology_path: Optional[Path] = None, names_path: Optional[Path] = None,
+                   coordinates_path: Optional[Path] = None,
+                   supplement_path: Path = SUPPLEMENTARY_POINTS) -> tuple[Path, Path, Path]:
+    """Write the topology, the name → ISO3 table and the coordinates; return their paths."""
+    topology_path = topology_path or TOPOLOGY_DIR / f"{TOPOLOGY_NAME}.json"
+    names_path = names_path or CLEAN_DIR / COUNTRY_ISO3
+    coordinates_path = coordinates_path or CLEAN_DIR / COUNTRY_COORDINATES
+    shapes = read_shapefile()
+    topology = build_topology(shapes, tolerance, quantization)
+    topology_path.parent.mkdir(parents=True, exist_ok=True)
+    topology_path.write_text(json.dumps(topology, separators=(",", ":")), encoding="utf-8")
+    name_table(shapes).to_csv(names_path, index=False)
+    with_supplementary_points(centroid_table(shapes), supplement_path).to_csv(coordinates_path, index=False)
+    return topology_path, names_path, coordinates_path
+
+
+# ------------------------------------------------------------------ #
+# 🔎  Lookups for the builders
+# ------------------------------------------------------------------ #
+@lru_cache(maxsize=1)
+def _iso3_index() -> tuple[pd.Index, np.ndarray]:
+    names = read_table(COUNTRY_ISO3)
+    return pd.Index(names["Country"].astype(str)), names["ISO3"].astype(str).to_numpy(dtype=object)
+
+
+def iso3_many(countries) -> np.ndarray:
+    """ISO3 codes for a Series / array of country names (``None`` where unknown)."""
+    index, codes = _iso3_index()
+    pos = index.get_indexer(pd.Index(np.asarray(countries, dtype=object).astype(str)))
+    return np.where(pos >= 0, codes[pos], None)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the offline map topology from the Natural Earth shapefile.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Douglas–Peucker tolerance in degrees (default {DEFAULT_TOLERANCE})")
+    parser.add_argument("--quantization", type=int, default=DEFAULT_QUANTIZATION,
+                        help=f"grid size per axis (default {DEFAULT_QUANTIZATION})")
+    args = parser.parse_args(argv)
+    for path in write_geometry(args.tolerance, args.quantization):
+        print(f"wrote {path.relative_to(ROOT_DIR)} ({path.stat().st_size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+indicators.py
+-------------
+Derived indicators over the data cube, declared once and computed on demand.
+
+The merged table only holds raw measures (``Defense_USD``, ``GDP``,
+``Defense_Share_GDP``, ``Defense_Share_GOV``). A derived metric is declared
+in :data:`INDICATORS` with the indicators it depends on and a function of
+their ``(country, year)`` arrays, so it is computed for every country in one
+NumPy pass:
+
+- ``<m>_YoY``             – year-over-year growth, %
+- ``<m>_Avg5``            – rolling mean over ``aggregates.ROLLING_YEARS``
+                            years (partial windows at the start, like
+                            ``aggregates.aid_donors``)
+- ``<m>_CAGR5``           – trailing 5-year compound annual growth, %
+- ``<m>_Share_Continent`` – % of the continent's total that year
+- ``<m>_Share_World``     – % of the world total that year
+
+for ``Defense_USD`` and ``GDP``. Derived indicators can depend on other
+derived ones (``Defense_USD_Avg5_YoY`` would be one line).
+
+:class:`IndicatorEngine` resolves dependencies recursively and keeps every
+array it computes, so asking again – or asking for an indicator that shares a
+dependency – costs nothing. :func:`engine_for` hands out one engine per cube
+content (``DataCube.fingerprint``), which is one per dataset version: the
+builders, ``src/api.py`` (``/trends?indicators=...``) and notebooks share the
+same memo::
+
+    engine = engine_for(load_cube())
+    engine.frame(["France", "India"], ["Defense_USD_YoY", "Defense_USD_Share_World"])
+    engine.cagr("Defense_USD", 2000, 2020)        # one value per country
+    python src/indicators.py --list
+    python src/indicators.py Defense_USD_CAGR5 --countries France India --years 2015 2023
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from aggregates import ROLLING_YEARS
+from cube import DataCube, load_cube
+
+CAGR_YEARS = 5
+MAX_ENGINES = 4
+
+# Labels of the raw cube measures, for chart titles and axes.
+BASE_LABELS = {
+    "Defense_USD": ("Defense Spending", "millions USD"),
+    "GDP": ("GDP", "USD"),
+    "Defense_Share_GDP": ("Defense Spending Share of GDP", "% of GDP"),
+    "Defense_Share_GOV": ("Defense Spending Share of Government Spending", "% of government spending"),
+}
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """A derived indicator: ``compute(context, *dependency_arrays)`` → ``(country, year)`` array."""
+
+    name: str
+    depends: tuple[str, ...]
+    compute: Callable[..., np.ndarray]
+    label: str
+    unit: str
+
+
+# ------------------------------------------------------------------ #
+# 🧮  Vectorized kernels – (country, year) float64 arrays, NaN = missing
+# ------------------------------------------------------------------ #
+def _shift(a: np.ndarray, years: int) -> np.ndarray:
+    """*a* moved *years* columns later (the first *years* columns become NaN)."""
+    out = np.full_like(a, np.nan)
+    out[:, years:] = a[:, :-years]
+    return out
+
+
+def growth(a: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (a / _shift(a, 1) - 1) * 100
+    return np.where(np.isfinite(out), out, np.nan)
+
+
+def rolling_mean(a: np.ndarray, window: int = ROLLING_YEARS) -> np.ndarray:
+    present = np.isfinite(a)
+    sums = np.cumsum(np.where(present, a, 0.0), axis=1)
+    counts = np.cumsum(present, axis=1)
+    sums[:, window:] -= sums[:, :-window].copy()
+    counts[:, window:] -= counts[:, :-window].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = sums / counts
+    return np.where(present, out, np.nan)
+
+
+def trailing_cagr(a: np.ndarray, years: int = CAGR_YEARS) -> np.ndarray:
+    start = _shift(a, years)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (np.power(a / start, 1 / years) - 1) * 100
+    return np.where((start > 0) & (a > 0), out, np.nan)
+
+
+def share(a: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """% of each row's group total per year (*groups*: group id of every row)."""
+    totals = np.zeros((int(groups.max()) + 1, a.shape[1]))
+    np.add.at(totals, groups, np.where(np.isfinite(a), a, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = a / totals[groups] * 100
+    return np.where(np.isfinite(out), out, np.nan)
+
+
+# ------------------------------------------------------------------ #
+# 📇  Registry
+# ------------------------------------------------------------------ #
+INDICATORS: dict[str, Indicator] = {}
+
+
+def register(indicator: Indicator) -> Indicator:
+    if indicator.name in INDICATORS or indicator.name in BASE_LABELS:
+        raise ValueError(f"Indicator {indicator.name!r} is already defined.")
+    INDICATORS[indicator.name] = indicator
+    return indicator
+
+
+def _declare_standard(measure: str) -> None:
+    label, unit = BASE_LABELS[measure]
+    register(Indicator(f"{measure}_YoY", (measure,), lambda ctx, a: growth(a),
+                       f"{label} Growth", "% year over year"))
+    register(Indicator(f"{measure}_Avg{ROLLING_YEARS}", (measure,), lambda ctx, a: rolling_mean(a),
+                       f"{label} ({ROLLING_YEARS}-yr average)", unit))
+    register(Indicator(f"{measure}_CAGR{CAGR_YEARS}", (measure,), lambda ctx, a: trailing_cagr(a),
+                       f"{label} {CAGR_YEARS}-yr CAGR", "% per year"))
+    register(Indicator(f"{measure}_Share_Continent", (measure,), lambda ctx, a: share(a, ctx.continent_ids),
+                       f"{label} Share of Continent", "% of continent total"))
+    register(Indicator(f"{measure}_Share_World", (measure,), lambda ctx, a: share(a, np.zeros(len(a), dtype=np.intp)),
+                       f"{label} Share of World", "% of world total"))
+
+
+for _measure in ("Defense_USD", "GDP"):
+    _declare_standard(_measure)
+
+
+def label_of(name: str) -> tuple[str, str]:
+    """``(label, unit)`` of a raw or derived indicator."""
+    if name in INDICATORS:
+        return INDICATORS[name].label, INDICATORS[name].unit
+    return BASE_LABELS.get(name, (name, ""))
+
+
+# ------------------------------------------------------------------ #
+# ⚙️  Engine – lazy, memoized evaluation over one cube
+# ------------------------------------------------------------------ #
+class IndicatorEngine:
+    """Computes raw and derived indicators of *cube* on first request and keeps them."""
+
+    def __init__(self, cube: DataCube):
+        self.cube = cube
+        self.continent_ids = pd.factorize(pd.Series(cube.continents))[0]
+        self._arrays: dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        self.computed = 0
+
+    def names(self) -> list[str]:
+        """Every indicator this cube can provide: its measures, then the derived ones."""
+        return list(self.cube.indicators) + [name for name in INDICATORS if self._resolvable(name)]
+
+    def _resolvable(self, name: str, _resolving: frozenset[str] = frozenset()) -> bool:
+        """True when *name* is a measure or derives from measures without a dependency cycle."""
+        if name in self.cube.indicators:
+            return True
+        if name not in INDICATORS or name in _resolving:
+            return False
+        return all(self._resolvable(dep, _resolving | {name}) for dep in INDICATORS[name].depends)
+
+    def __contains__(self, name: str) -> bool:
+        return self._resolvable(name)
+
+    def array(self, name: str, _resolving: tuple[str, ...] = ()) -> np.ndarray:
+        """Read-only ``(country, year)`` array of indicator *name*."""
+        cached = self._arrays.get(name)
+        if cached is not None:
+            return cached
+        if name in _resolving:
+            raise ValueError(f"Indicator dependency cycle: {' -> '.join(_resolving + (name,))}")
+        with self._lock:
+            if name in self._arrays:
+                return self._arrays[name]
+            if name in self.cube.indicators:
+                out = self.cube.values[:, :, self.cube.indicator_index(name)].astype("float64")
+            elif name in INDICATORS:
+                spec = INDICATORS[name]
+                deps = [self.array(dep, _resolving + (name,)) for dep in spec.depends]
+                out = np.asarray(spec.compute(self, *deps), dtype="float64")
+                self.computed += 1
+            else:
+                raise KeyError(f"Unknown indicator {name!r}.")
+            out.flags.writeable = False
+            self._arrays[name] = out
+            return out
+
+    def frame(self, countries: Optional[Sequence[str]] = None, names: Sequence[str] = ("Defense_USD",),
+              years: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """Long ``Year, Country, <names>`` frame (all countries / years by default), like ``DataCube.frame``."""
+        cube = self.cube
+        countries = list(cube.countries if countries is None else countries)
+        rows = np.asarray([cube.country_index(c) for c in countries], dtype=np.intp)
+        cols = np.arange(len(cube.years)) if years is None else np.asarray([cube.year_index(y) for y in years], dtype=np.intp)
+        data = {
+            "Year": np.tile(cube.years[cols].astype("int64"), len(rows)),
+            "Country": np.repeat(np.asarray(countries, dtype=object), len(cols)),
+        }
+        for name in names:
+            data[name] = self.array(name)[np.ix_(rows, cols)].reshape(-1)
+        return pd.DataFrame(data)
+
+    def cagr(self, name: str, start: int, end: int) -> pd.Series:
+        """Compound annual growth of *name* from *start* to *end*, %, per country (NaN when not computable)."""
+        if end <= start:
+            raise ValueError("end must be after start")
+        a = self.array(name)
+        first, last = a[:, self.cube.year_index(start)], a[:, self.cube.year_index(end)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = (np.power(last / first, 1 / (end - start)) - 1) * 100
+        return pd.Series(np.where((first > 0) & (last > 0), out, np.nan), index=self.cube.countries, name=f"{name}_CAGR")
+
+
+_engines: OrderedDict[str, IndicatorEngine] = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def engine_for(cube: DataCube) -> IndicatorEngine:
+    """The shared engine of *cube*'s content (one per dataset version, a few kept)."""
+    key = cube.fingerprint
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = IndicatorEngine(cube)
+            while len(_engines) > MAX_ENGINES:
+                _engines.popitem(last=False)
+        _engines.move_to_end(key)
+        return engine
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="List or compute raw and derived indicators.")
+    parser.add_argument("names", nargs="*", help="indicators to print")
+    parser.add_argument("--list", action="store_true", help="list the available indicators")
+    parser.add_argument("--countries", nargs="+", help="countries (default: all)")
+    parser.add_argument("--years", nargs="+", type=int, help="years (default: all)")
+    args = parser.parse_args(argv)
+
+    engine = engine_for(load_cube())
+    if args.list or not args.names:
+        for name in engine.names():
+            label, unit = label_of(name)
+            print(f"{name:<32} {label} ({unit})")
+        return
+    pd.set_option("display.width", 160)
+    print(engine.frame(args.countries, args.names, args.years).dropna(subset=args.names, how="all").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
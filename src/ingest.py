@@ -0,0 +1,171 @@
+"""
+ingest.py
+---------
+Append a newly published year to the clean data instead of rebuilding it.
+
+Drop the new SIPRI / World Bank exports (now with a ``2024`` column) into
+``data/raw`` and run::
+
+    python src/ingest.py 2024             # append 2024
+    python src/ingest.py 2024 --dry-run   # only show the rows that would be appended
+
+For the year after ``data_store.year_range()``'s last year:
+
+1. each indicator's long table gets that year's rows appended, cleaned
+   exactly as the full build cleans them;
+2. the merged long table gets the merge of those rows appended;
+3. every aggregate of the merged table gets its rows for the year
+   appended – ranks, top 20, continent totals and scatter rows are per
+   year, and ``base_index`` reuses the bases already on disk
+   (``aggregates.append_year``); the small tables built from other files
+   (arms trade, aid donors) are rewritten;
+4. the interpolated *complete* tables and ``merged_complete`` are
+   recomputed: a new year changes which countries have too many gaps and
+   how trailing gaps are filled, so they are not append-only;
+5. the Parquet mirror of the touched files, the cube and the figure
+   artifacts are refreshed;
+6. ``dataset_version.json`` records the new range, table hashes and the
+   partition's row counts, and ``data/.build_state.json`` is updated so
+   ``build_data.py`` treats the result as up to date.
+
+Nothing before the new year is rewritten in the long, merged or per-year
+aggregate tables. Caches keyed on ``data_store.dataset_version()`` (the shared
+dataset, ``load_table``) and on content (figure cache, query engine, cube)
+pick up the new version on their next use.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+
+import aggregates
+import artifacts
+import build_data
+import cleaning
+import cube
+import data_store
+from data_store import CLEAN_DIR, MERGED_COMPLETE_LONG, MERGED_LONG, ROOT_DIR, append_csv
+
+
+@contextmanager
+def _step(name: str, timings: dict) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+
+
+def indicator_stages() -> list[build_data.Stage]:
+    return [s for s in build_data.declare_stages() if s.func is cleaning.clean_indicator_stage]
+
+
+def year_rows(stage: build_data.Stage, year: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """``(scaled wide table up to year, long rows of year)`` for one indicator stage."""
+    kwargs = stage.kwargs
+    raw_path = ROOT_DIR / stage.inputs[0]
+    wide = cleaning.read_indicator(raw_path, kwargs["source"], kwargs.get("scale", 1.0), last_year=year)
+    if str(year) not in wide.columns:
+        raise SystemExit(f"{stage.inputs[0]} has no {year} column; add the new export to data/raw first.")
+    rows = cleaning.to_long(wide[["Country", str(year)]], kwargs["value_column"], last_year=year)
+    return wide, rows
+
+
+def ingest_year(year: int, dry_run: bool = False, refresh_artifacts: bool = True) -> dict:
+    """Append *year* to the clean data and return a summary (rows appended, step timings)."""
+    first_year, last_year = data_store.year_range()
+    if year <= last_year:
+        raise SystemExit(
+            f"{year} is already in the clean data ({first_year}–{last_year}); "
+            "revise it with `python src/build_data.py --force`."
+        )
+    if year != last_year + 1:
+        raise SystemExit(f"Years are appended in order: the next one is {last_year + 1}.")
+
+    timings: dict[str, float] = {}
+    stages = indicator_stages()
+    with _step("read raw", timings):
+        read = {stage.name: year_rows(stage, year) for stage in stages}
+        merged_rows = cleaning.merge_long([rows for _, rows in read.values()], how="outer")
+
+    appended = {stage.outputs[0]: len(read[stage.name][1]) for stage in stages}
+    appended[f"data/clean/{MERGED_LONG}"] = len(merged_rows)
+    if dry_run:
+        return {"year": year, "appended": appended, "timings": timings}
+
+    with _step("append long + merged", timings):
+        for stage in stages:
+            append_csv(ROOT_DIR / stage.outputs[0], read[stage.name][1])
+        append_csv(CLEAN_DIR / MERGED_LONG, merged_rows)
+
+    with _step("append aggregates", timings):
+        for relpath, n in aggregates.append_year(merged_rows).items():
+            appended[f"data/clean/{relpath}"] = n
+
+    with _step("recompute complete tables", timings):
+        for stage in stages:
+            wide, _ = read[stage.name]
+            kwargs = stage.kwargs
+            cleaning.write_complete(
+                wide, [ROOT_DIR / p for p in stage.outputs[1:]],
+                value_column=kwargs["value_column"], max_missing=kwargs["max_missing"],
+                complete_long_divisor=kwargs.get("complete_long_divisor", 1.0), last_year=year,
+            )
+        cleaning.merge_stage(
+            [ROOT_DIR / s.outputs[2] for s in stages], [CLEAN_DIR / MERGED_COMPLETE_LONG], how="inner",
+        )
+
+    with _step("version", timings):
+        manifest = data_store.write_dataset_version(
+            f"ingest {year}", last_year=year,
+            partition={"year": year, "rows": appended},
+        )
+
+    with _step("parquet store", timings):
+        data_store.build_store()
+    with _step("cube", timings):
+        cube.build_cube()
+    if refresh_artifacts:
+        with _step("artifacts", timings):
+            artifacts.build_artifacts()
+
+    with _step("build state", timings):
+        mark_built(skip=() if refresh_artifacts else ("artifacts",))
+
+    return {"year": year, "version": manifest["version"], "appended": appended, "timings": timings}
+
+
+def mark_built(skip: tuple[str, ...] = ()) -> None:
+    """Record the current signature of every stage (bar *skip*) in the build state."""
+    state = build_data.load_state()
+    for stage in build_data.declare_stages():
+        if stage.name not in skip and all((ROOT_DIR / p).exists() for p in stage.outputs):
+            state[stage.name] = build_data.stage_signature(stage)
+    build_data.save_state(state)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Append a newly published year to the clean data.")
+    parser.add_argument("year", type=int, help="the year to append (the one after the current last year)")
+    parser.add_argument("--dry-run", action="store_true", help="only report the rows that would be appended")
+    parser.add_argument("--no-artifacts", action="store_true", help="do not re-render assets/graphs")
+    args = parser.parse_args(argv)
+
+    summary = ingest_year(args.year, dry_run=args.dry_run, refresh_artifacts=not args.no_artifacts)
+    verb = "would append" if args.dry_run else "appended"
+    for relpath, n in summary["appended"].items():
+        print(f"{verb} {n:>4} row(s) to {Path(relpath).as_posix()}")
+    for step, seconds in summary["timings"].items():
+        print(f"{step:<28} {seconds * 1000:8.0f} ms")
+    if not args.dry_run:
+        print(f"dataset version {summary['version']} covers {data_store.year_range()[0]}–{args.year}")
+
+
+if __name__ == "__main__":
+    main()
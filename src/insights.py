@@ -0,0 +1,242 @@
+"""
+insights.py
+-----------
+Registry of the long-form HTML reports under ``assets/insights/<topic>/``.
+
+The directory is indexed once per process: each report is described by an
+:class:`InsightMeta` (slug, topic, title, size, mtime) built from ``stat``
+and, for the title, the first few KiB of the file – the body itself is only
+read when a report is shown.
+
+Bodies are kept in a byte-bounded LRU. A cached body is revalidated against
+the file's ``mtime_ns`` / size at most every ``check_interval`` seconds; a
+changed stamp re-reads the file, and the SHA-256 of the new content decides
+whether the cached copy is still the same report. The index is refreshed the
+same way when a topic directory's mtime changes (reports added or removed).
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+import streamlit as st
+
+from paths import ASSETS_DIR
+
+INSIGHTS_DIR = ASSETS_DIR / "insights"
+DEFAULT_MAX_BYTES = 16 * 2**20
+DEFAULT_CHECK_INTERVAL = 5.0
+_TITLE_HEAD_BYTES = 4096
+_TITLE_RE = re.compile(r"<(title|h1)[^>]*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@dataclass(frozen=True)
+class InsightMeta:
+    """Index entry for one report (no body)."""
+
+    slug: str        # "<topic>/<stem>", e.g. "aid/oda"
+    topic: str
+    title: str
+    path: Path
+    size: int
+    mtime_ns: int
+
+    @property
+    def is_empty(self) -> bool:
+        return self.size == 0
+
+
+def _title_for(path: Path, head: bytes) -> str:
+    match = _TITLE_RE.search(head.decode("utf-8", errors="ignore"))
+    if match:
+        title = _TAG_RE.sub("", match.group(2)).strip()
+        if title:
+            return title
+    return path.stem.replace("_", " ").replace("-", " ").title()
+
+
+def _describe(path: Path, root: Path, stat: os.stat_result) -> InsightMeta:
+    head = b""
+    if stat.st_size:
+        with open(path, "rb") as handle:
+            head = handle.read(_TITLE_HEAD_BYTES)
+    rel = path.relative_to(root).with_suffix("")
+    return InsightMeta(
+        slug=rel.as_posix(),
+        topic=rel.parts[0] if len(rel.parts) > 1 else "",
+        title=_title_for(path, head),
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+@dataclass
+class _Body:
+    text: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    checked: float
+
+
+class InsightRegistry:
+    """Index of the insight reports plus a size-bounded cache of their bodies."""
+
+    def __init__(self, root: Path = INSIGHTS_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._index: dict[str, InsightMeta] = {}
+        self._dir_stamps: dict[Path, int] = {}
+        self._scanned = 0.0
+        self._bodies: OrderedDict[Path, _Body] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.scan()
+
+    # -------------------------------------------------------------- #
+    # Index
+    # -------------------------------------------------------------- #
+    def _directories(self) -> list[Path]:
+        if not self.root.is_dir():
+            return []
+        return [self.root] + sorted(p for p in self.root.iterdir() if p.is_dir())
+
+    def scan(self) -> None:
+        """(Re)build the index from the directory listing."""
+        index, stamps = {}, {}
+        for directory in self._directories():
+            stamps[directory] = directory.stat().st_mtime_ns
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.lower().endswith(".html"):
+                    meta = _describe(Path(entry.path), self.root, entry.stat())
+                    index[meta.slug] = meta
+        with self._lock:
+            self._index = dict(sorted(index.items()))
+            self._dir_stamps = stamps
+            self._scanned = time.monotonic()
+
+    def _refresh_index(self) -> None:
+        if time.monotonic() - self._scanned < self.check_interval:
+            return
+        current = {d: d.stat().st_mtime_ns for d in self._directories()}
+        if current != self._dir_stamps:
+            self.scan()
+        else:
+            self._scanned = time.monotonic()
+
+    def reports(self, topic: Optional[str] = None) -> list[InsightMeta]:
+        """Index entries, optionally restricted to one *topic* (``"aid"``, ``"defense"``)."""
+        self._refresh_index()
+        return [m for m in self._index.values() if topic is None or m.topic == topic]
+
+    def topics(self) -> list[str]:
+        return sorted({m.topic for m in self.reports() if m.topic})
+
+    def get(self, slug: str) -> Optional[InsightMeta]:
+        self._refresh_index()
+        return self._index.get(slug)
+
+    # -------------------------------------------------------------- #
+    # Bodies
+    # -------------------------------------------------------------- #
+    def body(self, slug: str) -> str:
+        """Return the HTML of report *slug* (``KeyError`` if it is not indexed)."""
+        meta = self.get(slug)
+        if meta is None:
+            raise KeyError(f"Unknown insight report: {slug}")
+        return self.read(meta.path)
+
+    def read(self, path: Path | str) -> str:
+        """Return the content of *path* through the body cache (any HTML file, indexed or not)."""
+        path = Path(path).resolve()
+        now = time.monotonic()
+        with self._lock:
+            cached = self._bodies.get(path)
+            if cached is not None and now - cached.checked < self.check_interval:
+                self._bodies.move_to_end(path)
+                self.hits += 1
+                return cached.text
+
+        stat = path.stat()
+        if cached is not None and (stat.st_mtime_ns, stat.st_size) == (cached.mtime_ns, cached.size):
+            with self._lock:
+                cached.checked = now
+                self._bodies.move_to_end(path)
+                self.hits += 1
+            return cached.text
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached is not None and digest == cached.sha256:
+            text = cached.text  # touched but unchanged
+        else:
+            text = raw.decode("utf-8")
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self._store(path, _Body(text, digest, stat.st_mtime_ns, stat.st_size, now))
+            self._reindex(path, stat, raw)
+        return text
+
+    def _reindex(self, path: Path, stat: os.stat_result, raw: bytes) -> None:
+        """Keep the index entry of an edited report (size, mtime, title) in step with its body."""
+        for slug, meta in self._index.items():
+            if meta.path.resolve() == path and meta.mtime_ns != stat.st_mtime_ns:
+                self._index[slug] = replace(
+                    meta, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                    title=_title_for(meta.path, raw[:_TITLE_HEAD_BYTES]),
+                )
+
+    def _store(self, path: Path, body: _Body) -> None:
+        old = self._bodies.pop(path, None)
+        if old is not None:
+            self._bytes -= old.size
+        if body.size > self.max_bytes:
+            return  # larger than the whole cache: serve it but do not keep it
+        self._bodies[path] = body
+        self._bytes += body.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._bodies.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "reports": len(self._index),
+                "cached": len(self._bodies),
+                "cached_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_insight_registry() -> InsightRegistry:
+    """Return the process-wide :class:`InsightRegistry` over ``assets/insights``."""
+    return InsightRegistry(
+        max_bytes=int(os.environ.get("DEFAIDX_INSIGHT_CACHE_BYTES", DEFAULT_MAX_BYTES)),
+    )
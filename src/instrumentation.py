@@ -0,0 +1,287 @@
+"""
+instrumentation.py
+------------------
+Per-rerun timing, cache and payload metrics.
+
+``app.py`` opens a :class:`RunRecord` for every script run (one per rerun
+and page; fragment-only reruns get their own, see :func:`fragment_run`).
+While it is open, the rest of the app reports into it:
+
+- ``timed(stage, name)`` records a wall-time span – ``data`` (dataset
+  loading), ``builder`` (a figure builder served through the figure cache),
+  ``chart`` (``st.plotly_chart`` serialization), ``query`` (SQL through
+  ``query.py``), ``import`` (a page module's first import, see
+  ``page_registry.py``) and ``page`` (the whole page);
+- a span with a ``cache`` entry (``hit`` / ``disk_hit`` / ``miss``) also
+  bumps the ``<stage>.cache.<tier>`` counter;
+- :func:`plotly_chart` wraps ``st.plotly_chart`` and records the bytes of
+  figure JSON sent to the browser.
+
+Closed runs are kept in memory for the sidebar panel (:func:`show_diagnostics`,
+shown with ``?diagnostics=1`` or ``DEFAIDX_DIAGNOSTICS=1``) and, when
+``DEFAIDX_METRICS_LOG`` is set, appended to that file as one JSON object per
+line so they can be scraped.
+
+The module only imports the standard library and Streamlit at load time
+(pandas is imported by the reporting functions), since ``app.py`` loads it
+before any page.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RECENT_RUNS = 200
+METRICS_LOG_ENV = "DEFAIDX_METRICS_LOG"
+DIAGNOSTICS_ENV = "DEFAIDX_DIAGNOSTICS"
+
+
+@dataclass
+class RunRecord:
+    """Everything measured during one script run."""
+
+    page: str
+    session: str
+    scope: str = "app"
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+    seconds: float = 0.0
+    status: str = "running"
+    spans: list[dict] = field(default_factory=list)
+    counters: Counter = field(default_factory=Counter)
+    payload_bytes: int = 0
+    _t0: float = field(default_factory=time.perf_counter, repr=False)
+    _payloads: dict = field(default_factory=dict, repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_t0")
+        data.pop("_payloads")
+        data["counters"] = dict(self.counters)
+        return data
+
+
+_local = threading.local()
+_recent: deque[RunRecord] = deque(maxlen=RECENT_RUNS)
+_log_lock = threading.Lock()
+
+
+def current_run() -> Optional[RunRecord]:
+    """The run open on this thread, or ``None`` outside an instrumented run."""
+    return getattr(_local, "run", None)
+
+
+def _session_id() -> str:
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+
+# ------------------------------------------------------------------ #
+# ⏱️  Recording
+# ------------------------------------------------------------------ #
+def start_run(page: str, scope: str = "app") -> RunRecord:
+    """Open a run for *page* on the current thread."""
+    run = RunRecord(page=page, session=_session_id(), scope=scope)
+    _local.run = run
+    return run
+
+
+def finish_run(status: str = "ok") -> Optional[RunRecord]:
+    """Close the current run, keep it for the panel and append it to the metrics log."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run.seconds = time.perf_counter() - run._t0
+    run.status = status
+    _recent.append(run)
+    log_path = os.environ.get(METRICS_LOG_ENV)
+    if log_path:
+        write_log(run, Path(log_path))
+    return run
+
+
+def write_log(run: RunRecord, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(run.to_dict(), default=str)
+    with _log_lock, open(path, "a", encoding="utf-8") as handle:
+        handle.write(line + "\n")
+
+
+@contextmanager
+def fragment_run(name: str) -> Iterator[None]:
+    """Record a fragment body as its own run when it reruns on its own.
+
+    During a full script run the fragment's spans go into the page's run;
+    a fragment-only rerun (``st.fragment``) never executes ``app.py``, so
+    it gets a run with ``scope="fragment:<name>"``.
+    """
+    if current_run() is not None:
+        yield
+        return
+    try:
+        page = st.session_state.get("page", "")
+    except Exception:  # no script run context
+        page = ""
+    start_run(page, scope=f"fragment:{name}")
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        finish_run(status)
+
+
+@contextmanager
+def timed(stage: str, name: str, **info) -> Iterator[dict]:
+    """Record the wall time of the ``with`` block as a span of the current run.
+
+    The yielded dict is stored with the span, so callers can attach details
+    (``span["cache"] = "hit"``, ``span["payload_bytes"] = n``) while inside it.
+    Without an open run the block just executes.
+    """
+    span = {"stage": stage, "name": name, **info}
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        run = current_run()
+        if run is not None:
+            span["seconds"] = time.perf_counter() - start
+            run.spans.append(span)
+            if "cache" in span:
+                run.counters[f"{stage}.cache.{span['cache']}"] += 1
+
+
+def count(name: str, n: int = 1) -> None:
+    run = current_run()
+    if run is not None:
+        run.counters[name] += n
+
+
+def counter(name: str) -> int:
+    run = current_run()
+    return run.counters[name] if run is not None else 0
+
+
+def note_payload(fig, nbytes: int) -> None:
+    """Remember the serialized size of *fig* so :func:`plotly_chart` need not re-serialize it."""
+    run = current_run()
+    if run is not None and fig is not None:
+        run._payloads[id(fig)] = nbytes
+
+
+def plotly_chart(fig, name: str, **kwargs):
+    """``st.plotly_chart`` with its time and payload size recorded as a ``chart`` span."""
+    run = current_run()
+    with timed("chart", name) as span:
+        result = st.plotly_chart(fig, **kwargs)
+    if run is not None:
+        nbytes = run._payloads.get(id(fig))
+        if nbytes is None and (diagnostics_enabled() or os.environ.get(METRICS_LOG_ENV)):
+            nbytes = len(fig.to_json())
+        if nbytes is not None:
+            span["payload_bytes"] = nbytes
+            run.payload_bytes += nbytes
+    return result
+
+
+# ------------------------------------------------------------------ #
+# 📊  Reporting
+# ------------------------------------------------------------------ #
+def recent_runs() -> list[RunRecord]:
+    return list(_recent)
+
+
+def span_summary(runs: Optional[list[RunRecord]] = None) -> pd.DataFrame:
+    """Count / mean / max seconds per (page, stage, name) over *runs* (default: recent runs)."""
+    import pandas as pd
+
+    rows = [
+        {"page": run.page, **span}
+        for run in (recent_runs() if runs is None else runs)
+        for span in run.spans
+    ]
+    if not rows:
+        return pd.DataFrame(columns=["page", "stage", "name", "calls", "mean_ms", "max_ms"])
+    df = pd.DataFrame(rows)
+    return (
+        df.groupby(["page", "stage", "name"], as_index=False)["seconds"]
+        .agg(calls="count", mean_ms="mean", max_ms="max")
+        .assign(mean_ms=lambda d: d["mean_ms"] * 1000, max_ms=lambda d: d["max_ms"] * 1000)
+        .sort_values("mean_ms", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def diagnostics_enabled() -> bool:
+    """True when the diagnostics panel was requested (``?diagnostics=1`` or the env var)."""
+    if os.environ.get(DIAGNOSTICS_ENV, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return st.query_params.get("diagnostics", "") in ("1", "true", "yes")
+    except Exception:  # no script run context
+        return False
+
+
+def show_diagnostics(run: Optional[RunRecord]) -> None:
+    """Sidebar panel with the last run's spans, cache counters and process-wide summaries."""
+    if not diagnostics_enabled():
+        return
+    import pandas as pd
+
+    from dataset import ReadOnlyDatasetError, get_dataset, memory_report
+    from figure_cache import get_figure_cache
+    from query import _duckdb_available, get_query_engine
+
+    with st.sidebar.expander("🩺 Diagnostics", expanded=False):
+        if run is not None:
+            st.caption(
+                f"{run.page} · {run.seconds * 1000:.0f} ms · "
+                f"{run.payload_bytes / 1024:.0f} KiB sent · run {run.run_id}"
+            )
+            spans = pd.DataFrame(run.spans)
+            if not spans.empty:
+                spans["ms"] = spans.pop("seconds") * 1000
+                st.dataframe(spans, hide_index=True, use_container_width=True)
+            if run.counters:
+                st.json(dict(run.counters), expanded=False)
+
+        st.markdown("**Recent runs (this process)**")
+        st.dataframe(span_summary().round(1), hide_index=True, use_container_width=True)
+        st.markdown("**Figure cache**")
+        st.json(get_figure_cache().stats(), expanded=False)
+        if _duckdb_available():
+            st.markdown("**SQL queries**")
+            st.json(get_query_engine().stats(), expanded=False)
+        st.markdown("**Memory**")
+        report = memory_report()
+        report.pop("per_session_bytes")
+        st.json(report, expanded=False)
+        try:
+            get_dataset().verify()
+        except ReadOnlyDatasetError as exc:
+            st.error(f"{exc} Restart the server to reload it.")
+        else:
+            st.caption("Shared tables match their load-time fingerprints.")
+        log_path = os.environ.get(METRICS_LOG_ENV)
+        if log_path:
+            st.caption(f"Metrics log: {log_path}")
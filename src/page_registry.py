@@ -0,0 +1,60 @@
+"""
+page_registry.py
+----------------
+Lazy registry of the sidebar pages.
+
+``app.py`` used to import every page module up front, and through
+``Explore`` / ``Home`` that loaded pandas, NumPy, the dataset and the figure
+builders before the first paint of any page – About and Contact included.
+Pages are now listed by module path and imported on first navigation
+(Python keeps them in ``sys.modules`` afterwards). Each first import is
+recorded as an ``import`` span (see ``instrumentation.py``), so the cold
+cost of a page shows up in the diagnostics panel and the metrics log;
+``python src/benchmark.py --only startup`` measures it in a fresh
+interpreter.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from dataclasses import dataclass
+
+from instrumentation import timed
+
+
+@dataclass(frozen=True)
+class PageSpec:
+    """A sidebar entry: the module defining the page and the function that renders it."""
+
+    title: str
+    module: str
+    render: str
+
+
+PAGES = {
+    spec.title: spec
+    for spec in (
+        PageSpec("Home", "pages.Home", "show_home"),
+        PageSpec("About", "pages.About", "show_about"),
+        PageSpec("Explore", "pages.Explore", "show_explore"),
+        PageSpec("Insights", "pages.Insights", "show_insights"),
+        PageSpec("Contact", "pages.Contact", "show_contact"),
+    )
+}
+
+
+def load_page(title: str):
+    """Return the render function of page *title*, importing its module the first time."""
+    spec = PAGES[title]
+    module = sys.modules.get(spec.module)
+    if module is None:
+        with timed("import", spec.module):
+            module = importlib.import_module(spec.module)
+    return getattr(module, spec.render)
+
+
+def show_page(title: str) -> None:
+    load_page(title)()
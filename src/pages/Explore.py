@@ -1,16 +1,58 @@
 import streamlit as st
-import pandas as pd
-from pathlib import Path
+from data_store import CLEAN_DIR, MERGED_LONG
+from dataset import get_dataset
 from embed_visualizations import (
     render_choropleth_map,
     render_defense_vs_gdp_scatter_excluding_usa_china,
     render_defense_gdp_indexed_trend,
     render_country_defense_bar_animation,
     render_country_defense_trend,
-    render_defense_spending_over_time
+    render_defense_spending_over_time,
+    render_arms_top_traders,
+    render_arms_market_share,
+    render_arms_trade_comparison,
+    render_top_donors_animation,
+    render_oda_trend,
+    render_oda_gni_heatmap,
+    render_oda_defense_ratio,
 )
 
-DATA_PATH = Path("data/clean/all/merged_long_1992-2023.csv")
+DATA_PATH = CLEAN_DIR / MERGED_LONG
+
+# Defense Spending charts: (key, section label, render function, dataset table).
+# Each sits in an expander and is only built and sent once it is opened, so the
+# first paint costs one chart however many are listed here.
+DEFENSE_SPENDING_CHARTS = [
+    ("choropleth", "🗺️ Choropleth Map: Defense Spending as % of GDP", render_choropleth_map, "merged"),
+    ("gdp_scatter", "📊 Scatter Plot: Defense vs GDP (Excl. USA & China)", render_defense_vs_gdp_scatter_excluding_usa_china, "gdp_scatter"),
+    ("indexed_trend", "📈 Indexed Trend: Defense & GDP Over Time", render_defense_gdp_indexed_trend, "cube"),
+    ("bar_race", "🏆 Animated Bar Chart: Top 20 Defense Spenders", render_country_defense_bar_animation, "top20_per_year"),
+    ("country_trend", "🧭 Country Comparison: Defense Spending Trends", render_country_defense_trend, "cube"),
+    ("continent_trend", "🕒 Continental Trends: Defense Spending Over Time", render_defense_spending_over_time, "continent_totals"),
+]
+ARMS_TRADE_CHARTS = [
+    ("arms_top", "🚢 Top Arms Exporters & Importers Over Time", render_arms_top_traders, "arms_trade"),
+    ("arms_share", "🧩 Exporter / Importer Share", render_arms_market_share, "arms_trade"),
+    ("arms_compare", "🔁 Country Comparison: Arms Exports vs Imports", render_arms_trade_comparison, "arms_trade"),
+]
+AID_CHARTS = [
+    ("aid_top", "💸 Animated Bar Chart: Top Aid Donors", render_top_donors_animation, "aid_donors"),
+    ("aid_trend", "📈 Donor Comparison: Net ODA with 5-Year Average", render_oda_trend, "aid_donors"),
+    ("aid_gni", "🎯 ODA as % of GNI vs the UN 0.7% Target", render_oda_gni_heatmap, "aid_donors"),
+    ("aid_ratio", "⚖️ Aid per Dollar of Defense Spending", render_oda_defense_ratio, "aid_donors"),
+]
+OPEN_BY_DEFAULT = {"choropleth", "arms_top", "aid_top"}
+
+
+def render_lazy_sections(dataset, charts):
+    """Render each chart inside an expander, building it only while the expander is open."""
+    for key, label, render, table in charts:
+        section = st.expander(label, expanded=key in OPEN_BY_DEFAULT, key=f"explore_{key}", on_change="rerun")
+        # .open is None when the expander does not track state: render eagerly.
+        if section.open is False:
+            continue
+        with section:
+            render(dataset.view(table), fingerprint=dataset.fingerprints[table])
 
 def show_explore():
     st.markdown(
@@ -27,31 +69,30 @@ def show_explore():
 
         if defense_option == "Defense Spending":
             if DATA_PATH.exists():
-                df = pd.read_csv(DATA_PATH)
-                df["Year"] = df["Year"].astype(str)
+                dataset = get_dataset()
 
                 st.markdown("<br>", unsafe_allow_html=True)
 
-                render_choropleth_map(df)
-                render_defense_vs_gdp_scatter_excluding_usa_china(df)
-                render_defense_gdp_indexed_trend(df)
-                render_country_defense_bar_animation(df)
-                render_country_defense_trend(df)
-                render_defense_spending_over_time(df)
+                render_lazy_sections(dataset, DEFENSE_SPENDING_CHARTS)
+
+        if defense_option == "Arms Trade":
+            st.markdown(
+                "<p style='font-size:16px; color:#E0E0E0;'>SIPRI trend-indicator values (TIV) of major arms transfers "
+                "for the main exporting and importing countries.</p>",
+                unsafe_allow_html=True,
+            )
+            render_lazy_sections(get_dataset(), ARMS_TRADE_CHARTS)
 
     if explore_section == "Aid":
         aid_option = st.selectbox("Choose Aid Topic", [
-            "Top Donors & Recipients"
+            "Top Donors"
         ])
 
-        if DATA_PATH.exists():
-            df = pd.read_csv(DATA_PATH)
-            df["Year"] = df["Year"].astype(str)
-
-            if aid_option == "Top Donors & Recipients":
-                st.markdown("### 💸 Top Aid Donors and Recipients Over Time")
-                st.markdown(
-                    "<p style='font-size:16px; color:#E0E0E0;'>Visualize the most generous donor countries and major recipient countries from 1992 to 2023.</p>",
-                    unsafe_allow_html=True,
-                )
-                # Placeholder: Call Aid visualizations here when ready
+        if aid_option == "Top Donors":
+            st.markdown("### 💸 Top Aid Donors Over Time")
+            st.markdown(
+                "<p style='font-size:16px; color:#E0E0E0;'>Net official development assistance (ODA) of the "
+                "OECD DAC donor countries, as reported by the World Bank.</p>",
+                unsafe_allow_html=True,
+            )
+            render_lazy_sections(get_dataset(), AID_CHARTS)
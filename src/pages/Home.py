@@ -1,6 +1,8 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from dataset import get_dataset
+from figure_cache import cached_figure
+from instrumentation import plotly_chart
+from visualisations.defense_spending import create_global_defense_bubbles
 
 def show_home():
     st.markdown(
@@ -50,82 +52,6 @@ def show_home():
     st.markdown("<hr style='border-color:#444;'>", unsafe_allow_html=True)
     st.info("🚧 More features coming soon!")
 
-    data_path = "data/clean/all/merged_long_1992-2023.csv"
-    df = pd.read_csv(data_path)
-
-    codes_path = "data/clean/all/country_coordinates.csv"
-    codes_df = pd.read_csv(codes_path)
-
-    df = df.merge(codes_df[['Country', 'ISO3']], on='Country', how='left')
-    df = df[df["Defense_USD"].notna()]
-
-    df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
-    df = df.dropna(subset=["Year"])
-    df["Year"] = df["Year"].astype(int)
-    df = df.sort_values(["Year", "Country"])
-    years_sorted = sorted(df["Year"].unique())
-    df["Year"] = pd.Categorical(df["Year"], categories=years_sorted, ordered=True)
-
-    fig = px.scatter(
-        df,
-        x="Continent",
-        y="Defense_USD",
-        animation_frame="Year",
-        animation_group="Country",
-        size="Defense_USD",
-        color="Continent",
-        hover_name="Country",
-        log_y=True,
-        size_max=55,  # smaller bubbles
-        #range_y=[100, 900000],
-        title="Global Defense Spending (1992–2023)",
-        labels={"Defense_USD": "Defense Spending (Million USD)", "Continent": "Region"}
-    )
-
-    fig.update_layout(
-        height=600,  
-        width=None,  
-        title_x=0.19,
-        title_y=0.93,
-        title_font=dict(size=16),
-        plot_bgcolor="black",
-        paper_bgcolor="black",
-        font=dict(color="white", size=10),  # smaller font
-        margin=dict(t=90, b=40, l=10, r=20),
-        showlegend=False,
-
-        xaxis=dict(
-            type='category',
-            categoryorder='array',
-            categoryarray=["Africa", "Asia", "Europe", "North America", "Oceania", "South America"],
-            tickangle=-45,
-            showgrid=True,
-            zeroline=True,
-            tickfont=dict(size=9),
-            automargin=True,
-        ),
-        yaxis=dict(
-            showgrid=False,
-            gridcolor='gray',
-            zeroline=False,
-            type='log',
-            range=[3, 6],
-            title="Defense Spending (Million USD)",
-            title_font=dict(size=11),
-            tickfont=dict(size=9),
-        ),
-        updatemenus=[dict(
-            type="buttons",
-            x=0.05,
-            y=-0.1,
-            buttons=[
-                dict(label="Play", method="animate",
-                     args=[None, dict(frame=dict(duration=500, redraw=True), fromcurrent=True)]),
-                dict(label="Pause", method="animate",
-                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate",
-                                        transition=dict(duration=0))])
-            ]
-        )]
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    dataset = get_dataset()
+    fig = cached_figure(create_global_defense_bubbles, dataset.merged, fingerprint=dataset.fingerprints["merged"])
+    plotly_chart(fig, "create_global_defense_bubbles", use_container_width=True)
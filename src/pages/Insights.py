@@ -1,5 +1,6 @@
 import streamlit as st
-from pathlib import Path
+from insights import get_insight_registry
+from utils import show_html_insight
 
 def show_insights():
     st.markdown(
@@ -7,17 +8,26 @@ def show_insights():
         <h1 style='font-size:42px;color:#A970FF;font-weight:bold;'>
             Insights
         </h1>
-        <p style='font-size:16px;color:#E0E0E0;line-height:1.6;'>
-            Coming Soon!
-        </p>
         """,
         unsafe_allow_html=True,
     )
 
-    st.write("...")
-    # You could dynamically display HTML reports from the assets/insights folder
-    #st.markdown(open("assets/insights/how_military_aid_affects_development.html", "r").read(), unsafe_allow_html=True)
+    # Titles come from the registry index; only the chosen report's body is loaded.
+    registry = get_insight_registry()
+    topics = registry.topics()
+    if not topics:
+        st.markdown(
+            "<p style='font-size:16px;color:#E0E0E0;line-height:1.6;'>Coming Soon!</p>",
+            unsafe_allow_html=True,
+        )
+        return
 
+    topic = st.selectbox("Choose Topic", topics, format_func=str.title)
+    reports = registry.reports(topic)
+    report = st.selectbox("Choose Report", reports, format_func=lambda meta: meta.title)
 
-#insight_path = Path("assets/insights/aid/oda.html")
-#show_html_insight(insight_path)
+    # Cached after the first view; an empty file is a placeholder for a report in progress.
+    if not registry.body(report.slug).strip():
+        st.info("🚧 This report is coming soon!")
+    else:
+        show_html_insight(report.path)
@@ -0,0 +1,17 @@
+"""
+paths.py
+--------
+Repository locations, resolved from the repo root rather than the working
+directory. Kept free of third-party imports so that pages which never touch
+the data (About, Contact, Insights) can use them without loading pandas;
+``data_store`` re-exports them.
+
+Author: DefaidX team
+"""
+
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CLEAN_DIR = ROOT_DIR / "data" / "clean"
+STORE_DIR = ROOT_DIR / "data" / "store"
+ASSETS_DIR = ROOT_DIR / "assets"
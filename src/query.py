@@ -0,0 +1,352 @@
+"""
+query.py
+--------
+Embedded SQL over the clean datasets (DuckDB, in-process – no server).
+
+Every table under ``data/clean`` is registered as a view named after its file
+stem, lower-cased and without the year range:
+
+- ``all/merged_long_1992-2023.csv``          → ``merged_long``
+- ``agg/continent_totals.csv``               → ``continent_totals``
+- ``wb/Net_ODA_Provided_USD_complete.csv``   → ``net_oda_provided_usd_complete``
+
+A view reads its Parquet mirror (``src/data_store.py``) when that is up to
+date and the CSV otherwise, straight from disk: DuckDB pushes the selected
+columns and ``WHERE`` filters into the scan and aggregates vectorized, so a
+question about the data no longer loads the whole table into pandas first::
+
+    engine = get_query_engine()
+    engine.sql("SELECT Country FROM merged_long WHERE Year = ? AND Defense_USD > ?", [2023, 50_000])
+    engine.table("merged_long", columns=["Year", "GDP"], where="Country = ?", params=["France"])
+    engine.run("spending_doubled", start=1992, end=2023)   # a named query from QUERIES
+
+Results come back with the store schema applied and are kept in an LRU keyed
+by (SQL, parameters, source-file stamps); the stamps are re-checked at most
+every ``check_interval`` seconds and a changed file re-registers the views.
+Each call is recorded as a ``query`` span (see ``instrumentation.py``).
+
+``duckdb`` is optional: without it :func:`get_query_engine` raises
+:class:`QueryEngineUnavailable` and the rest of the app is unaffected.
+
+Usage::
+
+    python src/query.py --list
+    python src/query.py "SELECT Continent, sum(GDP) FROM merged_long WHERE Year = 2023 GROUP BY 1"
+    python src/query.py --named continent_gdp_share year=2023
+    python src/query.py --explain "SELECT Country FROM merged_long WHERE Year = 2000"
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence
+
+import pandas as pd
+import streamlit as st
+
+from data_store import CLEAN_DIR, _parquet_available, apply_schema, clean_tables, store_path
+from instrumentation import timed
+
+DEFAULT_MAX_RESULTS = 128
+DEFAULT_CHECK_INTERVAL = 5.0
+_YEAR_RANGE_RE = re.compile(r"_\d{4}-\d{4}$")
+_NON_IDENT_RE = re.compile(r"\W+")
+
+
+class QueryEngineUnavailable(RuntimeError):
+    """Raised when ``duckdb`` is not installed."""
+
+
+def _duckdb_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# ------------------------------------------------------------------ #
+# 📁  Sources – one view per clean table
+# ------------------------------------------------------------------ #
+def view_name(relpath: str) -> str:
+    """SQL name of the clean table at *relpath* (``all/merged_long_1992-2023.csv`` → ``merged_long``)."""
+    stem = _YEAR_RANGE_RE.sub("", Path(relpath).stem)
+    return _NON_IDENT_RE.sub("_", stem).strip("_").lower()
+
+
+def discover_sources() -> dict[str, Path]:
+    """Map every view name to the file it should read (Parquet mirror if current, else CSV)."""
+    sources = {}
+    use_parquet = _parquet_available()
+    for relpath in clean_tables():
+        csv_path = CLEAN_DIR / relpath
+        pq_path = store_path(relpath)
+        fresh = use_parquet and pq_path.exists() and pq_path.stat().st_mtime >= csv_path.stat().st_mtime
+        name = view_name(relpath)
+        if name in sources:  # same stem in two folders: qualify with the folder
+            name = f"{Path(relpath).parent.name}_{name}"
+        sources[name] = pq_path if fresh else csv_path
+    return sources
+
+
+def _scan(path: Path) -> str:
+    literal = str(path).replace("'", "''")
+    if path.suffix == ".parquet":
+        return f"read_parquet('{literal}')"
+    return f"read_csv('{literal}', header = true)"
+
+
+# ------------------------------------------------------------------ #
+# 🗂️  Named queries
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class NamedQuery:
+    """A reusable query with ``$name`` parameters."""
+
+    sql: str
+    params: tuple[str, ...] = ()
+    description: str = ""
+
+
+QUERIES: dict[str, NamedQuery] = {
+    "continent_gdp_share": NamedQuery(
+        sql="""
+            SELECT Continent,
+                   sum(GDP) AS GDP,
+                   100 * sum(GDP) / sum(sum(GDP)) OVER () AS GDP_Share
+            FROM merged_long
+            WHERE Year = $year AND Continent IS NOT NULL AND GDP IS NOT NULL
+            GROUP BY Continent
+            ORDER BY GDP DESC
+        """,
+        params=("year",),
+        description="Each continent's share (%) of the GDP of the countries with data in a year.",
+    ),
+    "continent_defense_share": NamedQuery(
+        sql="""
+            SELECT Continent,
+                   sum(Defense_USD) AS Defense_USD,
+                   100 * sum(Defense_USD) / sum(sum(Defense_USD)) OVER () AS Defense_Share
+            FROM merged_long
+            WHERE Year = $year AND Continent IS NOT NULL AND Defense_USD IS NOT NULL
+            GROUP BY Continent
+            ORDER BY Defense_USD DESC
+        """,
+        params=("year",),
+        description="Each continent's share (%) of world defense spending in a year.",
+    ),
+    "spending_doubled": NamedQuery(
+        sql="""
+            SELECT a.Country, a.Continent,
+                   a.Defense_USD AS Defense_USD_Start,
+                   b.Defense_USD AS Defense_USD_End,
+                   b.Defense_USD / a.Defense_USD AS Ratio
+            FROM merged_long a
+            JOIN merged_long b ON a.Country = b.Country
+            WHERE a.Year = $start AND b.Year = $end
+              AND a.Defense_USD > 0 AND b.Defense_USD >= 2 * a.Defense_USD
+            ORDER BY Ratio DESC
+        """,
+        params=("start", "end"),
+        description="Countries whose defense spending at least doubled between two years.",
+    ),
+}
+
+
+# ------------------------------------------------------------------ #
+# 🦆  Engine
+# ------------------------------------------------------------------ #
+class QueryEngine:
+    """DuckDB connection with a view per clean table and a cache of query results."""
+
+    def __init__(self, sources: Optional[Mapping[str, Path]] = None,
+                 max_results: int = DEFAULT_MAX_RESULTS, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        if not _duckdb_available():
+            raise QueryEngineUnavailable("The SQL query layer needs duckdb (pip install duckdb).")
+        import duckdb
+
+        self._fixed_sources = dict(sources) if sources is not None else None
+        self.max_results = max_results
+        self.check_interval = check_interval
+        self._con = duckdb.connect(":memory:")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._results: OrderedDict[tuple, pd.DataFrame] = OrderedDict()
+        self._stamps: tuple = ()
+        self._checked = 0.0
+        self.sources: dict[str, Path] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._register()
+
+    # -------------------------------------------------------------- #
+    # Views
+    # -------------------------------------------------------------- #
+    def _current_sources(self) -> dict[str, Path]:
+        return dict(self._fixed_sources) if self._fixed_sources is not None else discover_sources()
+
+    @staticmethod
+    def _stamp(sources: Mapping[str, Path]) -> tuple:
+        return tuple(
+            (name, str(path), path.stat().st_mtime_ns, path.stat().st_size)
+            for name, path in sorted(sources.items())
+        )
+
+    def _register(self) -> None:
+        sources = self._current_sources()
+        with self._lock:
+            for name, path in sources.items():
+                self._con.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM {_scan(path)}')
+            for name in set(self.sources) - set(sources):
+                self._con.execute(f'DROP VIEW IF EXISTS "{name}"')
+            self.sources = sources
+            self._stamps = self._stamp(sources)
+            self._results.clear()
+            self._checked = time.monotonic()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-register the views if a source file changed; returns whether they were."""
+        if not force and time.monotonic() - self._checked < self.check_interval:
+            return False
+        if force or self._stamp(self._current_sources()) != self._stamps:
+            self._register()
+            self.refreshes += 1
+            return True
+        self._checked = time.monotonic()
+        return False
+
+    def _cursor(self):
+        # DuckDB connections are not shared across threads; each thread gets its own cursor.
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._con.cursor()
+        return cursor
+
+    # -------------------------------------------------------------- #
+    # Queries
+    # -------------------------------------------------------------- #
+    def sql(self, query: str, params: Sequence[Any] | Mapping[str, Any] | None = None, *,
+            name: str = "sql", cache: bool = True, typed: bool = True) -> pd.DataFrame:
+        """Run *query* (``?`` or ``$name`` parameters) and return the result as a DataFrame.
+
+        With *typed* the store schema (``data_store.apply_schema``) is applied to the result.
+        """
+        self.refresh()
+        if isinstance(params, Mapping):
+            frozen = tuple(sorted(params.items()))
+        else:
+            frozen = tuple(params or ())
+        key = (query, frozen, typed, self._stamps)
+        with timed("query", name) as span:
+            with self._lock:
+                cached = self._results.get(key) if cache else None
+                if cached is not None:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+            if cached is not None:
+                span["cache"] = "hit"
+                result = cached
+            else:
+                span["cache"] = "miss"
+                result = self._cursor().execute(query, params).df()
+                if typed:
+                    result = apply_schema(result)
+                with self._lock:
+                    self.misses += 1
+                    if cache:
+                        self._results[key] = result
+                        while len(self._results) > self.max_results:
+                            self._results.popitem(last=False)
+            span["rows"] = len(result)
+        return result.copy(deep=False)
+
+    def run(self, name: str, **params) -> pd.DataFrame:
+        """Run the named query *name* from :data:`QUERIES`."""
+        named = QUERIES[name]
+        missing = set(named.params) - set(params)
+        if missing:
+            raise TypeError(f"Query {name!r} needs parameter(s): {', '.join(sorted(missing))}")
+        return self.sql(named.sql, {p: params[p] for p in named.params}, name=name)
+
+    def table(self, view: str, columns: Optional[Sequence[str]] = None, where: Optional[str] = None,
+              params: Sequence[Any] | Mapping[str, Any] | None = None) -> pd.DataFrame:
+        """``SELECT <columns> FROM <view> [WHERE <where>]`` – only those columns / rows are read."""
+        if view not in self.sources:
+            raise KeyError(f"Unknown table: {view}")
+        select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        query = f'SELECT {select} FROM "{view}"' + (f" WHERE {where}" if where else "")
+        return self.sql(query, params, name=f"table:{view}")
+
+    def explain(self, query: str) -> str:
+        """DuckDB's physical plan for *query* (shows the projections / filters pushed into the scans)."""
+        self.refresh()
+        return "\n".join(row[1] for row in self._cursor().execute(f"EXPLAIN {query}").fetchall())
+
+    def views(self) -> dict[str, str]:
+        return {name: str(path) for name, path in sorted(self.sources.items())}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "views": len(self.sources),
+                "cached_results": len(self._results),
+                "max_results": self.max_results,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_engine() -> QueryEngine:
+    """Return the process-wide :class:`QueryEngine` over ``data/clean``."""
+    return QueryEngine()
+
+
+def _parse_param(text: str) -> tuple[str, Any]:
+    key, _, value = text.partition("=")
+    try:
+        return key, int(value)
+    except ValueError:
+        try:
+            return key, float(value)
+        except ValueError:
+            return key, value
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run SQL against the clean datasets.")
+    parser.add_argument("query", nargs="?", help="SQL to run (views are named after the clean files)")
+    parser.add_argument("--named", metavar="NAME", help="run a query from QUERIES")
+    parser.add_argument("params", nargs="*", default=[], help="key=value parameters for --named")
+    parser.add_argument("--list", action="store_true", help="list the views and named queries")
+    parser.add_argument("--explain", action="store_true", help="print the query plan instead of the result")
+    args = parser.parse_args(argv)
+
+    engine = QueryEngine()
+    if args.list:
+        for name, path in engine.views().items():
+            print(f"{name:<45} {path}")
+        for name, named in QUERIES.items():
+            print(f"\n{name}({', '.join(named.params)}): {named.description}")
+        return
+    if args.named:
+        params = dict(_parse_param(p) for p in ([args.query] if args.query else []) + args.params)
+        print(engine.run(args.named, **params).to_string(index=False))
+    elif args.query:
+        print(engine.explain(args.query) if args.explain else engine.sql(args.query).to_string(index=False))
+    else:
+        parser.error("give a query, --named NAME or --list")
+
+
+if __name__ == "__main__":
+    main()
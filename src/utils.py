@@ -1,59 +1,40 @@
 import streamlit as st
-import pandas as pd
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+from insights import get_insight_registry
+from paths import CLEAN_DIR
+
+if TYPE_CHECKING:
+    from country_index import CountryIndex
 
 # Path to the unified metadata file that contains Country, ISO3, lat, lon
-COUNTRY_COORDS_CSV = r"C:\Users\snaja\OneDrive\defaidX\data\clean\all\country_coordinates.csv"
+# (data_store.COUNTRY_COORDINATES, spelled out so this module does not import pandas).
+COUNTRY_COORDS_CSV = str(CLEAN_DIR / "all" / "country_coordinates.csv")
 
 ###############################################################################
 # Internal helpers
 ###############################################################################
 
-@st.cache_data(show_spinner=False, ttl=86400)
-def _load_country_metadata(csv_path: str = COUNTRY_COORDS_CSV) -> pd.DataFrame:
-    """Return a DataFrame with normalised column names.
-
-    The function trims white‑space and harmonises column names so that at the
-    Streamlit‑level we can rely on *exactly* the following columns being
-    present:
-    - ``Country``  – Country name as used across Defaidtics datasets.
-    - ``ISO3``     – 3‑letter ISO‑3166 alpha‑3 code.
-    - ``lat``      – Latitude.
-    - ``lon``      – Longitude.
-    """
-    df = pd.read_csv(csv_path)
-
-    # ── Normalise header casing / spelling ────────────────────────────────────
-    df.rename(columns=lambda c: c.strip(), inplace=True)
-
-    # ISO column
-    iso_candidates = {
-        c for c in df.columns if c.lower().replace("-", "_") in {"iso3", "alpha3", "alpha_3", "iso_3", "iso"}
-    }
-    if "ISO3" not in df.columns:
-        if iso_candidates:
-            df.rename(columns={iso_candidates.pop(): "ISO3"}, inplace=True)
-        else:
-            raise KeyError(
-                "Could not find an ISO3 column in the metadata CSV. "
-                "Add a column named 'ISO3' or a synonym like 'alpha‑3'.",
-            )
-
-    # Latitude / longitude columns – accept common variants
-    lat_candidates = [c for c in df.columns if c.lower() in {"lat", "latitude"}]
-    lon_candidates = [c for c in df.columns if c.lower() in {"lon", "lng", "long", "longitude"}]
-    if lat_candidates and lon_candidates:
-        df.rename(columns={lat_candidates[0]: "lat", lon_candidates[0]: "lon"}, inplace=True)
-    else:
-        raise KeyError("Could not find both latitude and longitude columns in the metadata CSV.")
-
-    return df[["Country", "ISO3", "lat", "lon"]]
+def _index_for(csv_path: str) -> "CountryIndex":
+    """Return the shared index, or a one-off index when *csv_path* is not the default."""
+    # Imported here: the index needs pandas / NumPy, the Insights page does not.
+    from country_index import get_country_index
+
+    if str(csv_path) == COUNTRY_COORDS_CSV:
+        return get_country_index()
+    return _index_for_path(str(csv_path))
+
+
+@st.cache_resource(show_spinner=False)
+def _index_for_path(csv_path: str) -> "CountryIndex":
+    from country_index import CountryIndex
+
+    return CountryIndex.from_files([csv_path])
 
 ###############################################################################
 # Public API used throughout Defaidtics
 ###############################################################################
 
-@st.cache_data(show_spinner=False, ttl=86400)
 def get_country_coords_from_csv(
     countries: tuple[str, ...],
     csv_path: str = COUNTRY_COORDS_CSV,
@@ -61,27 +42,26 @@ def get_country_coords_from_csv(
     """Return a mapping ``{country: (lat, lon)}`` for the requested countries.
 
     If a country is not present in the metadata file the value is
-    ``(None, None)`` so that calling code can decide how to handle it.
+    ``(None, None)`` so that calling code can decide how to handle it, and a
+    ``country_index.UnresolvedCountryWarning`` names it.
     """
-    df = _load_country_metadata(csv_path)
-    coords_lookup = {row["Country"]: (row["lat"], row["lon"]) for _, row in df.iterrows()}
-    return {country: coords_lookup.get(country, (None, None)) for country in countries}
+    index = _index_for(csv_path)
+    return {country: index.coords(country) for country in countries}
 
 
 def country_to_iso3(country_name: str, csv_path: str = COUNTRY_COORDS_CSV) -> str:
     """Return the ISO3 code for *country_name* or "N/A" if not found."""
-    df = _load_country_metadata(csv_path)
-    row = df.loc[df["Country"] == country_name]
-    if row.empty:
-        return "N/A"
-    return row.iloc[0]["ISO3"]
+    return _index_for(csv_path).iso3(country_name)
 
 ###############################################################################
 # Miscellaneous helpers
 ###############################################################################
 
 def show_html_insight(file_path: str) -> None:
-    """Render an HTML file inside Streamlit with a fixed height and scroll."""
-    with open(file_path, "r", encoding="utf-8") as handle:
-        html_content = handle.read()
+    """Render an HTML file inside Streamlit with a fixed height and scroll.
+
+    The content comes from the insight registry's body cache, so the file is
+    only read again when it changes.
+    """
+    html_content = get_insight_registry().read(file_path)
     st.components.v1.html(html_content, height=1000, scrolling=True)
@@ -0,0 +1,193 @@
+"""
+aid.py
+------
+Plotly builders for the Aid section (net official development assistance).
+
+Every builder takes ``aggregates.aid_donors`` – the 22 DAC donors per year
+with ODA (millions USD, % of GNI), yearly rank, 5-year rolling mean and the
+ratio to defense spending already computed – so a render only filters a
+~700-row table.
+
+Author: DefaidX team
+"""
+
+from typing import Optional
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from visualisations.animation import compact_animation
+from visualisations.defense_spending import COMMON_LAYOUT, COMPACT_ANIMATIONS
+
+UN_ODA_TARGET = 0.7  # % of GNI
+
+
+def _donors(df_aid: pd.DataFrame) -> pd.DataFrame:
+    return df_aid.assign(Country=df_aid["Country"].astype(str))
+
+
+# 1 ------------------------------------------------------------------ #
+# 💸  Animated bar chart – donors ranked by net ODA each year
+# ------------------------------------------------------------------ #
+def create_top_donors_animation(df_aid: pd.DataFrame, compact: bool = COMPACT_ANIMATIONS):
+    # df_aid: aggregates.aid_donors (Rank is per year)
+    df_aid = _donors(df_aid).dropna(subset=["ODA_USD"])
+    if df_aid.empty:
+        return None
+
+    if compact:
+        palette = qualitative.Plotly
+        colors = {c: palette[i % len(palette)] for i, c in enumerate(df_aid["Country"].unique())}
+        fig = compact_animation(
+            df_aid.assign(Color=df_aid["Country"].map(colors)),
+            frame="Year",
+            key="Rank",
+            values={"x": "ODA_USD", "y": "Country", "marker.color": "Color"},
+            decimals={"x": 1},
+            make_trace=lambda _, ranks: go.Bar(
+                orientation="h",
+                hovertemplate="Country=%{y}<br>Net ODA (millions USD)=%{x:,.0f}<extra></extra>",
+            ),
+        )
+        fig.update_layout(title="💸 Top Aid Donors Over Time", template="plotly_dark")
+    else:
+        import plotly.express as px
+
+        fig = px.bar(
+            df_aid,
+            x="ODA_USD",
+            y="Country",
+            orientation="h",
+            animation_frame="Year",
+            animation_group="Country",
+            color="Country",
+            title="💸 Top Aid Donors Over Time",
+            labels={"ODA_USD": "Net ODA (millions USD)"},
+            template="plotly_dark",
+            category_orders={"Country": df_aid["Country"].unique()},
+        )
+
+    fig.update_traces(marker_line_width=1, width=0.5)
+    fig.update_layout(
+        **COMMON_LAYOUT,
+        xaxis=dict(title="Net ODA (millions USD)", showgrid=False, tickfont=dict(color="white")),
+        yaxis=dict(title="", tickfont=dict(color="white"), categoryorder="total ascending"),
+        uirevision="top_donors_animation",
+        showlegend=False,
+    )
+    return fig
+
+
+# 2 ------------------------------------------------------------------ #
+# 📈  Lines – net ODA and its 5-year rolling mean for selected donors
+# ------------------------------------------------------------------ #
+def create_oda_trend(df_aid: pd.DataFrame, selected_donors: list[str]):
+    # df_aid: aggregates.aid_donors
+    if not selected_donors:
+        return None
+    sub = _donors(df_aid[df_aid["Country"].isin(selected_donors)])
+    if sub.empty:
+        return None
+
+    palette = qualitative.Plotly
+    fig = go.Figure()
+    for i, (country, rows) in enumerate(sub.sort_values("Year").groupby("Country", sort=True)):
+        color = palette[i % len(palette)]
+        fig.add_scatter(
+            x=rows["Year"], y=rows["ODA_USD"], name=country, legendgroup=country,
+            mode="lines+markers", line=dict(color=color),
+            hovertemplate=f"{country}<br>%{{x}}: %{{y:,.0f}} million USD<extra></extra>",
+        )
+        fig.add_scatter(
+            x=rows["Year"], y=rows["ODA_USD_Avg5"], name=f"{country} (5-yr avg)", legendgroup=country,
+            mode="lines", line=dict(color=color, dash="dot"),
+            hovertemplate=f"{country} 5-yr avg<br>%{{x}}: %{{y:,.0f}} million USD<extra></extra>",
+        )
+
+    fig.update_layout(
+        dragmode="pan",
+        uirevision="oda_trend",
+        hovermode="x unified",
+        title="📈 Net ODA by Donor with 5-Year Average",
+        template="plotly_dark",
+        xaxis=dict(title="Year", showgrid=False, zeroline=False, tickfont=dict(color="white")),
+        yaxis=dict(
+            title="Net ODA (millions USD)",
+            showgrid=False,
+            zeroline=False,
+            tickformat=".2s",
+            fixedrange=False,
+            tickfont=dict(color="white"),
+        ),
+        **COMMON_LAYOUT
+    )
+    return fig
+
+
+# 3 ------------------------------------------------------------------ #
+# 🎯  Heatmap – ODA as % of GNI against the UN 0.7 % target
+# ------------------------------------------------------------------ #
+def create_oda_gni_heatmap(df_aid: pd.DataFrame):
+    # df_aid: aggregates.aid_donors (ODA_GNI ends where the World Bank series does)
+    sub = _donors(df_aid).dropna(subset=["ODA_GNI"])
+    if sub.empty:
+        return None
+    share = sub.pivot_table(index="Country", columns="Year", values="ODA_GNI", aggfunc="sum")
+    share = share.loc[share.mean(axis=1).sort_values().index]  # most generous at the top
+
+    fig = go.Figure(go.Heatmap(
+        z=share.to_numpy().round(2),
+        x=share.columns,
+        y=share.index,
+        colorscale="RdBu",
+        zmid=UN_ODA_TARGET,
+        colorbar=dict(title="% of GNI"),
+        hovertemplate="%{y}, %{x}: %{z:.2f}% of GNI<extra></extra>",
+    ))
+    fig.update_layout(
+        uirevision="oda_gni_heatmap",
+        title=f"🎯 ODA as % of GNI (blue: above the UN {UN_ODA_TARGET}% target)",
+        template="plotly_dark",
+        xaxis=dict(title="Year", showgrid=False, tickfont=dict(color="white")),
+        yaxis=dict(title="", showgrid=False, tickfont=dict(color="white")),
+        **COMMON_LAYOUT
+    )
+    return fig
+
+
+# 4 ------------------------------------------------------------------ #
+# ⚖️  Bars – aid per dollar of defense spending in one year
+# ------------------------------------------------------------------ #
+def create_oda_defense_ratio(df_aid: pd.DataFrame, year: Optional[int] = None):
+    # df_aid: aggregates.aid_donors (ODA in current USD, Defense_USD in constant USD)
+    sub = _donors(df_aid).dropna(subset=["ODA_to_Defense"])
+    if sub.empty:
+        return None
+    if year is None:
+        year = int(sub["Year"].max())
+    sub = sub[sub["Year"] == year].sort_values("ODA_to_Defense")
+    if sub.empty:
+        return None
+
+    fig = go.Figure(go.Bar(
+        x=sub["ODA_to_Defense"].round(3),
+        y=sub["Country"],
+        orientation="h",
+        marker=dict(color=sub["ODA_to_Defense"], colorscale="Viridis"),
+        customdata=sub[["ODA_USD", "Defense_USD"]].round(0).to_numpy(),
+        hovertemplate=(
+            "%{y}: %{x:.2f} USD of aid per USD of defense"
+            "<br>ODA %{customdata[0]:,.0f}M · defense %{customdata[1]:,.0f}M<extra></extra>"
+        ),
+    ))
+    fig.update_layout(
+        uirevision="oda_defense_ratio",
+        title=f"⚖️ Aid per Dollar of Defense Spending, {year}",
+        template="plotly_dark",
+        xaxis=dict(title="Net ODA / defense spending", showgrid=False, tickfont=dict(color="white")),
+        yaxis=dict(title="", showgrid=False, tickfont=dict(color="white")),
+        showlegend=False,
+        **COMMON_LAYOUT
+    )
+    return fig
@@ -0,0 +1,191 @@
+"""
+animation.py
+------------
+Compact encoding for ``animation_frame`` figures.
+
+Plotly Express copies a full trace definition (locations, hover names,
+colours, templates) into every frame. ``compact_animation`` instead builds
+each trace once with everything that does not change between frames and
+lets every frame carry only the values that do (``z``, ``x``, ``y``,
+``marker.size`` ...), rounded to a fixed number of decimals. Rows are
+aligned on a stable key per trace (e.g. the country), so a key that is
+missing in some year is simply ``null`` in that frame.
+
+``figure_payload_report`` gives the serialized size of a figure split into
+data / frames / layout, to compare the two encodings.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Hashable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.basedatatypes import BaseTraceType
+from plotly.io.json import to_json_plotly
+
+
+def animation_controls(frame_names: list[str], label: str = "Year", redraw: bool = True) -> dict:
+    """Play / pause buttons and a frame slider, laid out like Plotly Express's."""
+
+    def frame_args(duration: int) -> dict:
+        return {
+            "frame": {"duration": duration, "redraw": redraw},
+            "mode": "immediate",
+            "fromcurrent": True,
+            "transition": {"duration": duration, "easing": "linear"},
+        }
+
+    return dict(
+        updatemenus=[{
+            "buttons": [
+                {"args": [None, frame_args(500)], "label": "&#9654;", "method": "animate"},
+                {"args": [[None], frame_args(0)], "label": "&#9724;", "method": "animate"},
+            ],
+            "direction": "left",
+            "pad": {"r": 10, "t": 70},
+            "showactive": False,
+            "type": "buttons",
+            "x": 0.1,
+            "xanchor": "right",
+            "y": 0,
+            "yanchor": "top",
+        }],
+        sliders=[{
+            "active": 0,
+            "yanchor": "top",
+            "xanchor": "left",
+            "currentvalue": {"prefix": f"{label}="},
+            "pad": {"b": 10, "t": 60},
+            "len": 0.9,
+            "x": 0.1,
+            "y": 0,
+            "steps": [
+                {"args": [[name], frame_args(0)], "label": name, "method": "animate"}
+                for name in frame_names
+            ],
+        }],
+    )
+
+
+def _nest(attr: str, values) -> dict:
+    """``("marker.size", v)`` → ``{"marker": {"size": v}}``."""
+    head, _, rest = attr.partition(".")
+    return {head: _nest(rest, values) if rest else values}
+
+
+def _merge(into: dict, update: dict) -> dict:
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(into.get(key), dict):
+            _merge(into[key], value)
+        else:
+            into[key] = value
+    return into
+
+
+def _frame_matrix(sub: pd.DataFrame, frame: str, key: str, column: str, frames: list, keys: list, decimals: Optional[int]) -> np.ndarray:
+    """Frame × key matrix of *column* (object values become ``None`` where missing)."""
+    values = sub[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    matrix = (
+        sub.assign(**{column: values})
+        .pivot(index=frame, columns=key, values=column)
+        .reindex(index=frames, columns=keys)
+    )
+    if pd.api.types.is_numeric_dtype(values):
+        out = matrix.to_numpy(dtype="float64")
+        return np.round(out, decimals) if decimals is not None else out
+    return matrix.astype(object).where(matrix.notna(), None).to_numpy()
+
+
+def _frame_values(mats: Mapping[str, np.ndarray], row: int) -> dict:
+    out: dict = {}
+    for attr, mat in mats.items():
+        _merge(out, _nest(attr, mat[row]))
+    return out
+
+
+def compact_animation(
+    df: pd.DataFrame,
+    *,
+    frame: str,
+    key: str,
+    values: Mapping[str, str],
+    make_trace: Callable[[Optional[Hashable], list], BaseTraceType],
+    group: Optional[str] = None,
+    decimals: Optional[Mapping[str, int]] = None,
+    fill: Optional[Mapping[str, float]] = None,
+    redraw: bool = True,
+    frame_label: Optional[str] = None,
+) -> go.Figure:
+    """Build an animated figure whose frames only carry the changing values.
+
+    Parameters
+    ----------
+    df          Long table with one row per (*frame*, *key*) within each group.
+    frame       Column holding the animation step (e.g. ``"Year"``).
+    key         Column identifying a point / bar / location within a trace.
+    values      Trace attribute → column, e.g. ``{"x": "GDP", "marker.size": "Defense_USD"}``.
+    make_trace  ``make_trace(group_value, keys)`` returns the invariant trace
+                (type, name, colours, hover text, ...) for one group.
+    group       Optional column splitting the data into one trace per value.
+    decimals    Per-attribute rounding of numeric values.
+    fill        Per-attribute value for missing keys, for attributes whose
+                validator rejects NaN (``{"marker.size": 0}``).
+    """
+    decimals = decimals or {}
+    fill = fill or {}
+    frames = sorted(df[frame].dropna().unique().tolist())
+    if group is None:
+        groups = [None]
+    elif isinstance(df[group].dtype, pd.CategoricalDtype):
+        groups = [g for g in df[group].cat.categories if (df[group] == g).any()]
+    else:
+        groups = sorted(df[group].dropna().unique().tolist())
+
+    traces, matrices = [], []
+    for group_value in groups:
+        sub = df if group_value is None else df[df[group] == group_value]
+        keys = sorted(sub[key].dropna().unique().tolist())
+        mats = {
+            attr: _frame_matrix(sub, frame, key, column, frames, keys, decimals.get(attr))
+            for attr, column in values.items()
+        }
+        for attr, value in fill.items():
+            mats[attr] = np.where(pd.isna(mats[attr]), value, mats[attr])
+        trace = make_trace(group_value, keys)
+        for attr, mat in mats.items():
+            trace.update(_nest(attr, mat[0]))
+        traces.append(trace)
+        matrices.append(mats)
+
+    names = [str(f) for f in frames]
+    fig = go.Figure(data=traces)
+    fig.frames = [
+        go.Frame(
+            name=name,
+            traces=list(range(len(traces))),
+            data=[{"type": trace.type, **_frame_values(mats, i)} for trace, mats in zip(traces, matrices)],
+        )
+        for i, name in enumerate(names)
+    ]
+    fig.update_layout(**animation_controls(names, frame_label or frame, redraw=redraw))
+    return fig
+
+
+def figure_payload_report(fig: go.Figure) -> dict:
+    """Serialized size in bytes of *fig*, split into data / frames / layout."""
+    spec = fig.to_plotly_json()
+    sizes = {part: len(to_json_plotly(spec.get(part, []))) for part in ("data", "frames", "layout")}
+    return {
+        "total_bytes": len(fig.to_json()),
+        "data_bytes": sizes["data"],
+        "frames_bytes": sizes["frames"],
+        "layout_bytes": sizes["layout"],
+        "frames": len(spec.get("frames", [])),
+    }
+
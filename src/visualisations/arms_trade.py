@@ -0,0 +1,151 @@
+"""
+arms_trade.py
+-------------
+Plotly builders for the Arms Trade section (SIPRI trend-indicator values).
+
+Every builder takes ``aggregates.arms_trade`` – already melted, normalised
+and ranked (Year × Country × Flow with TIV, Share and Rank) – so a render
+only filters a ~1 600-row table.
+
+Author: DefaidX team
+"""
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from visualisations.defense_spending import COMMON_LAYOUT
+
+FLOWS = ["Exports", "Imports"]
+TOP_TRADERS = 8
+
+
+def _flow(df_arms: pd.DataFrame, flow: str) -> pd.DataFrame:
+    sub = df_arms[df_arms["Flow"] == flow]
+    return sub.assign(Country=sub["Country"].astype(str))
+
+
+def _leaders(sub: pd.DataFrame, n: int) -> list[str]:
+    """The *n* countries with the largest TIV over the whole period."""
+    return sub.groupby("Country")["TIV"].sum().nlargest(n).index.tolist()
+
+
+# 1 ------------------------------------------------------------------ #
+# 🚢  Stacked area – top exporters / importers over time
+# ------------------------------------------------------------------ #
+def create_arms_top_traders(df_arms: pd.DataFrame, flow: str, top_n: int = TOP_TRADERS):
+    # df_arms: aggregates.arms_trade
+    sub = _flow(df_arms, flow)
+    if sub.empty:
+        return None
+    leaders = _leaders(sub, top_n)
+    wide = sub.pivot_table(index="Year", columns="Country", values="TIV", aggfunc="sum", observed=True)
+    others = wide.drop(columns=leaders).sum(axis=1)
+
+    fig = go.Figure()
+    for country in leaders:
+        fig.add_scatter(
+            x=wide.index, y=wide[country].fillna(0), name=country,
+            mode="lines", stackgroup="tiv",
+            hovertemplate=f"{country}<br>%{{x}}: %{{y:,.0f}} TIV (millions)<extra></extra>",
+        )
+    if (others > 0).any():
+        fig.add_scatter(
+            x=others.index, y=others, name="Others listed",
+            mode="lines", stackgroup="tiv", line=dict(color="#555555"),
+            hovertemplate="Others listed<br>%{x}: %{y:,.0f} TIV (millions)<extra></extra>",
+        )
+
+    label = "Exporters" if flow == "Exports" else "Importers"
+    fig.update_layout(
+        dragmode="pan",
+        uirevision=f"arms_top_traders_{flow}",
+        hovermode="x unified",
+        title=f"🚢 Top Arms {label} Over Time",
+        template="plotly_dark",
+        xaxis=dict(title="Year", showgrid=False, zeroline=False, tickfont=dict(color="white")),
+        yaxis=dict(
+            title="Arms transfers (TIV, millions)",
+            showgrid=False,
+            zeroline=False,
+            tickformat=".2s",
+            tickfont=dict(color="white"),
+        ),
+        **COMMON_LAYOUT
+    )
+    return fig
+
+
+# 2 ------------------------------------------------------------------ #
+# 🧩  Heatmap – each country's share of the listed exporters / importers
+# ------------------------------------------------------------------ #
+def create_arms_market_share(df_arms: pd.DataFrame, flow: str, top_n: int = 15):
+    # df_arms: aggregates.arms_trade (Share is % of the year's total for the flow)
+    sub = _flow(df_arms, flow)
+    if sub.empty:
+        return None
+    leaders = _leaders(sub, top_n)
+    share = (
+        sub[sub["Country"].isin(leaders)]
+        .pivot_table(index="Country", columns="Year", values="Share", aggfunc="sum", observed=True)
+        .reindex(leaders[::-1])  # largest at the top
+    )
+
+    fig = go.Figure(go.Heatmap(
+        z=share.to_numpy().round(1),
+        x=share.columns,
+        y=share.index,
+        colorscale="Magma",
+        colorbar=dict(title="Share (%)"),
+        hovertemplate="%{y}, %{x}: %{z:.1f}%<extra></extra>",
+    ))
+    label = "exporters" if flow == "Exports" else "importers"
+    fig.update_layout(
+        uirevision=f"arms_market_share_{flow}",
+        title=f"🧩 Share of Arms {flow} Among the Listed {label.title()}",
+        template="plotly_dark",
+        xaxis=dict(title="Year", showgrid=False, tickfont=dict(color="white")),
+        yaxis=dict(title="", showgrid=False, tickfont=dict(color="white")),
+        **COMMON_LAYOUT
+    )
+    return fig
+
+
+# 3 ------------------------------------------------------------------ #
+# 🔁  Lines – exports vs imports for selected countries
+# ------------------------------------------------------------------ #
+def create_arms_trade_comparison(df_arms: pd.DataFrame, selected_countries: list[str]):
+    # df_arms: aggregates.arms_trade
+    import plotly.express as px
+
+    if not selected_countries:
+        return None
+    sub = df_arms[df_arms["Country"].isin(selected_countries)]
+    if sub.empty:
+        return None
+    sub = sub.assign(Country=sub["Country"].astype(str), Flow=sub["Flow"].astype(str))
+
+    fig = px.line(
+        sub.sort_values(["Country", "Flow", "Year"]),
+        x="Year", y="TIV", color="Country", line_dash="Flow",
+        markers=True,
+        category_orders={"Flow": FLOWS},
+        title="🔁 Arms Exports vs Imports by Country",
+        labels={"TIV": "Arms transfers (TIV, millions)"},
+        template="plotly_dark",
+    )
+    fig.update_layout(
+        dragmode="pan",
+        uirevision="arms_trade_comparison",
+        hovermode="x unified",
+        xaxis=dict(title="Year", showgrid=False, zeroline=False, tickfont=dict(color="white")),
+        yaxis=dict(
+            title="Arms transfers (TIV, millions)",
+            showgrid=False,
+            zeroline=False,
+            tickformat=".2s",
+            fixedrange=False,
+            tickfont=dict(color="white"),
+        ),
+        **COMMON_LAYOUT
+    )
+    return fig
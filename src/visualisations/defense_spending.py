@@ -5,12 +5,44 @@ defense_spending.py
 Reusable Plotly visualisation builder functions
 (mobile-optimised for Streamlit).
 
+``plotly.express`` is imported inside the builders that call it (the
+non-compact animation paths and the line charts), so importing this module –
+and the pages that do – only costs ``graph_objects``, which Streamlit has
+already loaded.
+
+The scatter, bubble and country-trend builders switch to WebGL traces above
+``large_data.WEBGL_THRESHOLD`` points, and the country trend can downsample
+long series with LTTB (see ``visualisations/large_data.py``).
+
 Author: DefaidX team
 """
 
+from typing import Optional
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from cube import DataCube
+from geometry import iso3_many
+from indicators import engine_for, label_of
+from visualisations.animation import compact_animation
+from visualisations.large_data import (
+    DOWNSAMPLE_POINTS,
+    downsample,
+    points_per_frame,
+    render_mode,
+    scatter_class,
+    use_webgl,
+)
+
+# Animated figures send invariant trace data once and only per-frame values
+# (see visualisations/animation.py). Set to False to fall back to Plotly Express.
+COMPACT_ANIMATIONS = True
+
+# Indicators the indexed trend needs; only countries with both are offered.
+INDEXED_TREND_INDICATORS = ["Defense_USD", "GDP"]
 
 # ------------------------------------------------------------------ #
 # 🔧  Common layout applied to every figure for consistent dark theme
@@ -34,19 +66,54 @@ COMMON_LAYOUT = dict(
 )
 
 # 1 ------------------------------------------------------------------ #
-def create_choropleth_map(df: pd.DataFrame):
-    fig = px.choropleth(
-        df,
-        locations="Country",
-        locationmode="country names",
-        color="Defense_Share_GDP",
-        hover_name="Country",
-        hover_data={"Defense_Share_GDP": ':.2f'},
-        animation_frame="Year",
-        color_continuous_scale="Plasma",
-        title="🗺️ Global Defense Spending as % of GDP Over Time",
-        template="plotly_dark"
+def create_choropleth_map(df: pd.DataFrame, compact: bool = COMPACT_ANIMATIONS):
+    # Countries are matched to the offline geometry by ISO3 here (see
+    # geometry.py), not by name in the browser; unmapped micro-states drop out.
+    # Where two spellings share a code ("Congo, Rep." / "Congo (Brazzaville)")
+    # the row with a value wins.
+    df = (
+        df.assign(Country=df["Country"].astype(str), ISO3=iso3_many(df["Country"]))
+        .dropna(subset=["ISO3"])
+        .sort_values("Defense_Share_GDP", na_position="last", kind="stable")
+        .drop_duplicates(["Year", "ISO3"])
+        .sort_index()
     )
+    names = dict(zip(df["ISO3"], df["Country"]))
+    if compact:
+        fig = compact_animation(
+            df,
+            frame="Year",
+            key="ISO3",
+            values={"z": "Defense_Share_GDP"},
+            decimals={"z": 2},
+            make_trace=lambda _, codes: go.Choropleth(
+                locations=codes,
+                locationmode="ISO-3",
+                hovertext=[names[c] for c in codes],
+                coloraxis="coloraxis",
+                hovertemplate="<b>%{hovertext}</b><br>Defense_Share_GDP=%{z:.2f}<extra></extra>",
+            ),
+        )
+        fig.update_layout(
+            title="🗺️ Global Defense Spending as % of GDP Over Time",
+            template="plotly_dark",
+            coloraxis=dict(colorscale="Plasma"),
+        )
+    else:
+        import plotly.express as px
+
+        fig = px.choropleth(
+            df,
+            locations="ISO3",
+            locationmode="ISO-3",
+            color="Defense_Share_GDP",
+            hover_name="Country",
+            hover_data={"Defense_Share_GDP": ':.2f'},
+            animation_frame="Year",
+            color_continuous_scale="Plasma",
+            title="🗺️ Global Defense Spending as % of GDP Over Time",
+            template="plotly_dark"
+        )
 
     fig.update_geos(
         showframe=False,
@@ -75,35 +142,70 @@ def create_choropleth_map(df: pd.DataFrame):
 
 #2-------------------------------------------------------------------------------
 
-def create_defense_vs_gdp_scatter_excluding_usa_china(df: pd.DataFrame):
+def create_defense_vs_gdp_scatter_excluding_usa_china(df_scatter: pd.DataFrame, compact: bool = COMPACT_ANIMATIONS):
+    # df_scatter: aggregates.gdp_scatter (rows already NaN-free in the plotted columns)
     # Filter out USA and China
-    df = df[(df['Country'] != 'United States') & (df['Country'] != 'China')]
-
-    # Drop rows with NaNs in columns used
-    df_clean = df.dropna(subset=['Defense_USD', 'GDP', 'Year', 'Country', 'Continent'])
+    df_clean = df_scatter[(df_scatter['Country'] != 'United States') & (df_scatter['Country'] != 'China')]
 
     if df_clean.empty: 
         return None
-
-    fig = px.scatter(
-        df_clean,
-        x='GDP',
-        y='Defense_USD',
-        animation_frame='Year',
-        animation_group='Country',
-        color='Continent',
-        hover_name='Country',
-        size='Defense_USD',
-        size_max=40,
-        log_x=True,
-        log_y=True,
-        labels={
-            "GDP": "GDP (trillion USD)",
-            "Defense_USD": "Defense Spending (millions USD)"
-        },
-        title="Defense Spending vs GDP (Without USA & China)",
-        template="plotly_dark"
-    )
+    webgl = use_webgl(points_per_frame(df_clean, "Year"))
+
+    if compact:
+        sizeref = float(df_clean["Defense_USD"].max()) / 40 ** 2  # same as px size_max=40
+        trace_type = go.Scattergl if webgl else go.Scatter
+        fig = compact_animation(
+            df_clean,
+            frame="Year",
+            key="Country",
+            group="Continent",
+            values={"x": "GDP", "y": "Defense_USD", "marker.size": "Defense_USD"},
+            decimals={"x": 0, "y": 1, "marker.size": 1},
+            fill={"marker.size": 0},
+            redraw=webgl,  # WebGL traces cannot tween, so each frame is redrawn
+            make_trace=lambda continent, countries: trace_type(
+                mode="markers",
+                name=str(continent),
+                legendgroup=str(continent),
+                ids=countries,
+                hovertext=countries,
+                marker=dict(sizemode="area", sizeref=sizeref, symbol="circle"),
+                hovertemplate=(
+                    f"<b>%{{hovertext}}</b><br><br>Continent={continent}"
+                    "<br>GDP (trillion USD)=%{x}<br>Defense Spending (millions USD)=%{y}<extra></extra>"
+                ),
+            ),
+        )
+        fig.update_layout(
+            title="Defense Spending vs GDP (Without USA & China)",
+            template="plotly_dark",
+            legend_title_text="Continent",
+            xaxis=dict(type="log", title="GDP (trillion USD)"),
+            yaxis=dict(type="log", title="Defense Spending (millions USD)"),
+        )
+    else:
+        import plotly.express as px
+
+        fig = px.scatter(
+            df_clean,
+            x='GDP',
+            y='Defense_USD',
+            animation_frame='Year',
+            animation_group='Country',
+            color='Continent',
+            hover_name='Country',
+            size='Defense_USD',
+            size_max=40,
+            log_x=True,
+            log_y=True,
+            render_mode="webgl" if webgl else "svg",
+            labels={
+                "GDP": "GDP (trillion USD)",
+                "Defense_USD": "Defense Spending (millions USD)"
+            },
+            title="Defense Spending vs GDP (Without USA & China)",
+            template="plotly_dark"
+        )
 
     # Clean layout: remove grid lines
     fig.update_xaxes(showgrid=False, zeroline=False)
@@ -117,9 +219,10 @@ def create_defense_vs_gdp_scatter_excluding_usa_china(df: pd.DataFrame):
 #3------------------------------------------------------------------
 # 🕒  Line – Defense spending over time by continent
 # ------------------------------------------------------------------ 
-def create_defense_spending_over_time(df: pd.DataFrame):
-    df_time = df.groupby(["Year", "Continent"], as_index=False)["Defense_USD"].sum()
-    df_time["Year"] = df_time["Year"].astype(int)
+def create_defense_spending_over_time(df_time: pd.DataFrame):
+    # df_time: aggregates.continent_totals (Year × Continent sums)
+    import plotly.express as px
+
     fig = px.line(
         df_time,
         x="Year", y="Defense_USD", color="Continent",
@@ -149,33 +252,44 @@ def create_defense_spending_over_time(df: pd.DataFrame):
     )
     return fig
 
-def create_country_defense_bar_animation(df: pd.DataFrame):
-    # Aggregate and rank
-    df_ranked = (
-        df.groupby(["Year", "Country"], as_index=False)["Defense_USD"].sum()
-        .sort_values(["Year", "Defense_USD"], ascending=[True, False])
-    )
-    df_ranked["Rank"] = df_ranked.groupby("Year")["Defense_USD"].rank(ascending=False, method="first")
-
-    # Keep only Top 20 per year
-    df_top20 = df_ranked[df_ranked["Rank"] <= 20]
-
+def create_country_defense_bar_animation(df_top20: pd.DataFrame, compact: bool = COMPACT_ANIMATIONS):
+    # df_top20: aggregates.top20_per_year (already ranked, Top 20 per year)
     # Ensure Country is string type
-    df_top20["Country"] = df_top20["Country"].astype(str)
-
-    fig = px.bar(
-        df_top20,
-        x="Defense_USD",
-        y="Country",
-        orientation="h",
-        animation_frame="Year",
-        animation_group="Country",
-        color="Country",
-        title="🏆 Top 20 Defense Spenders Over Time",
-        labels={"Defense_USD": "Defense Spending (millions USD)"},
-        template="plotly_dark",
-        category_orders={"Country": df_top20["Country"].unique()}
-    )
+    df_top20 = df_top20.assign(Country=df_top20["Country"].astype(str))
+
+    if compact:
+        # One bar trace keyed by rank; each frame carries the 20 names, values
+        # and colours (coloured per country, in order of first appearance like px).
+        palette = qualitative.Plotly
+        colors = {c: palette[i % len(palette)] for i, c in enumerate(df_top20["Country"].unique())}
+        fig = compact_animation(
+            df_top20.assign(Color=df_top20["Country"].map(colors)),
+            frame="Year",
+            key="Rank",
+            values={"x": "Defense_USD", "y": "Country", "marker.color": "Color"},
+            decimals={"x": 1},
+            make_trace=lambda _, ranks: go.Bar(
+                orientation="h",
+                hovertemplate="Country=%{y}<br>Defense Spending (millions USD)=%{x}<extra></extra>",
+            ),
+        )
+        fig.update_layout(title="🏆 Top 20 Defense Spenders Over Time", template="plotly_dark")
+    else:
+        import plotly.express as px
+
+        fig = px.bar(
+            df_top20,
+            x="Defense_USD",
+            y="Country",
+            orientation="h",
+            animation_frame="Year",
+            animation_group="Country",
+            color="Country",
+            title="🏆 Top 20 Defense Spenders Over Time",
+            labels={"Defense_USD": "Defense Spending (millions USD)"},
+            template="plotly_dark",
+            category_orders={"Country": df_top20["Country"].unique()}
+        )
 
     # Make bars thicker
     fig.update_traces(marker_line_width=1, width=0.5)
@@ -201,38 +315,52 @@ def create_country_defense_bar_animation(df: pd.DataFrame):
 
 #5--------------------------------------------------------------------
 # ------------------------------------------------------------------ #
-# 📈  Indexed trend – Defense & GDP (dropdown country selector)
+# 📈  Indexed trend – Defense & GDP (multi-country, selectable base year)
 # ------------------------------------------------------------------ #
-def create_defense_gdp_indexed_trend(df: pd.DataFrame, country: str):
-    df = df.dropna(subset=["Defense_USD", "GDP"]).copy()
-    df["Year"] = df["Year"].astype(int)
-
-    sub = df[df["Country"] == country].sort_values("Year")
-    if sub.empty:
+def create_defense_gdp_indexed_trend(cube: DataCube, countries: str | list[str], base_year: Optional[int] = None):
+    # cube: cube.DataCube over the merged table; countries: a name or a list of names.
+    # base 100 = base_year, or each country's first year with both values when None.
+    # The indexes of every country come from cube.indexed (computed once per base year),
+    # so each selected country costs one row lookup.
+    if isinstance(countries, str):
+        countries = [countries]
+    if base_year is not None and not cube.years[0] <= base_year <= cube.years[-1]:
+        return None
+    index, base_years = cube.indexed(INDEXED_TREND_INDICATORS, base_year)
+    rows = [cube.country_index(c) for c in countries if c in cube]
+    rows = [i for i in rows if base_years[i] >= 0]
+    if not rows:
         return None
 
-    base_def, base_gdp = sub.iloc[0][["Defense_USD", "GDP"]]
-    sub["Defense_Indexed"] = sub["Defense_USD"] / base_def * 100
-    sub["GDP_Indexed"] = sub["GDP"] / base_gdp * 100
-
+    years = cube.years.astype(int)
+    single = len(rows) == 1
+    trace_type = scatter_class(2 * len(rows) * len(years))
+    palette = qualitative.Plotly
     fig = go.Figure()
-    fig.add_scatter(
-        x=sub["Year"], y=sub["Defense_Indexed"],
-        mode="lines+markers", name="Defense (Base 100)",
-        text=sub.apply(lambda r: f"{r['Year']}<br>Defense Indexed: {r['Defense_Indexed']:.1f}", axis=1),
-        hoverinfo="text"
-    )
-    fig.add_scatter(
-        x=sub["Year"], y=sub["GDP_Indexed"],
-        mode="lines+markers", name="GDP (Base 100)",
-        text=sub.apply(lambda r: f"{r['Year']}<br>GDP Indexed: {r['GDP_Indexed']:.1f}", axis=1),
-        hoverinfo="text"
+    for n, i in enumerate(rows):
+        country = cube.countries[i]
+        present = np.isfinite(index[i, :, 0])
+        color = None if single else palette[n % len(palette)]
+        for k, label in enumerate(("Defense", "GDP")):
+            fig.add_trace(trace_type(
+                x=years[present], y=index[i, present, k].round(1),
+                mode="lines+markers",
+                name=f"{label} (Base 100)" if single else f"{country} – {label}",
+                legendgroup=country,
+                line=dict(color=color, dash="solid" if k == 0 else "dot"),
+                hovertemplate=f"{country}<br>%{{x}}<br>{label} Indexed: %{{y:.1f}}<extra></extra>",
+            ))
+
+    base_label = f"{base_year}" if base_year is not None else (
+        f"{base_years[rows[0]]}" if single else "first year with data"
     )
-
     fig.update_layout(
         dragmode="pan",
-        uirevision=f"defense_gdp_indexed_trend_{country}",
-        title=f"📈 Defense vs GDP Indexed Trend — {country}",
+        uirevision="defense_gdp_indexed_trend",
+        title=(
+            f"📈 Defense vs GDP Indexed Trend — {cube.countries[rows[0]]}" if single
+            else f"📈 Defense vs GDP Indexed Trend — {len(rows)} countries"
+        ),
         xaxis=dict(
             title="Year",
             showgrid=False,
@@ -240,7 +368,7 @@ def create_defense_gdp_indexed_trend(df: pd.DataFrame, country: str):
             tickfont=dict(color="white")
         ),
         yaxis=dict(
-            title="Indexed Value (Base 100)",
+            title=f"Indexed Value (Base 100 = {base_label})",
             showgrid=False,
             zeroline=False,
             tickfont=dict(color="white")
@@ -250,17 +378,27 @@ def create_defense_gdp_indexed_trend(df: pd.DataFrame, country: str):
     return fig
 
 #6--------------------------------------------------------------------------------
-def create_country_defense_trend(df: pd.DataFrame, selected_countries: list[str]):
-    if not selected_countries:
+def create_country_defense_trend(cube: DataCube, selected_countries: list[str], indicator: str = "Defense_USD",
+                                 max_points: Optional[int] = DOWNSAMPLE_POINTS):
+    # indicator: a cube measure or a derived one from indicators.py (YoY, 5-yr average, shares, ...)
+    # max_points: LTTB-downsample each country's series to at most this many points (None: all)
+    import plotly.express as px
+
+    engine = engine_for(cube)
+    countries = sorted(c for c in selected_countries if c in cube)
+    if not countries or indicator not in engine:
         return None
 
-    filt = df[df["Country"].isin(selected_countries)].copy()
-    filt["Year"] = filt["Year"].astype(int)
+    # One row per (country, year) from the engine's all-country array; years without data drop out.
+    filt = engine.frame(countries, [indicator]).dropna(subset=[indicator])
+    filt = downsample(filt, "Year", indicator, max_points, by="Country")
+    label, unit = label_of(indicator)
 
     fig = px.line(
-        filt, x="Year", y="Defense_USD", color="Country",
+        filt, x="Year", y=indicator, color="Country",
         markers=True,
-        title="🧭 Defense Spending Over Time by Country",
+        render_mode=render_mode(len(filt)),
+        title=f"🧭 {label} Over Time by Country",
         template="plotly_dark"
     )
     fig.update_layout(
@@ -274,14 +412,120 @@ def create_country_defense_trend(df: pd.DataFrame, selected_countries: list[str]
             tickfont=dict(color="white")
         ),
         yaxis=dict(
-            title="Defense Spending (millions USD)",
+            title=f"{label} ({unit})",
             showgrid=False,
             zeroline=False,
             #range=[0,1000000],
-            tickformat=".2s",  
+            tickformat=".1f" if unit.startswith("%") else ".2s",
             fixedrange=False,
             tickfont=dict(color="white")
         ),
         **COMMON_LAYOUT
     )
-    return fig
\ No newline at end of file
+    return fig
+
+
+#7--------------------------------------------------------------------------------
+# ------------------------------------------------------------------ #
+# 🫧  Bubbles – Defense spending per region over time (Home page)
+# ------------------------------------------------------------------ #
+def create_global_defense_bubbles(df: pd.DataFrame, compact: bool = COMPACT_ANIMATIONS):
+    df = df[df["Defense_USD"].notna()]
+    df = df.sort_values(["Year", "Country"])
+    years_sorted = sorted(df["Year"].unique())
+    df["Year"] = pd.Categorical(df["Year"], categories=years_sorted, ordered=True)
+    title = f"Global Defense Spending ({years_sorted[0]}–{years_sorted[-1]})"
+
+    n_points = points_per_frame(df, "Year")
+
+    if compact:
+        sizeref = float(df["Defense_USD"].max()) / 55 ** 2  # same as px size_max=55
+        trace_type = scatter_class(n_points)
+        fig = compact_animation(
+            df,
+            frame="Year",
+            key="Country",
+            group="Continent",
+            values={"y": "Defense_USD", "marker.size": "Defense_USD"},
+            decimals={"y": 1, "marker.size": 1},
+            fill={"marker.size": 0},
+            make_trace=lambda continent, countries: trace_type(
+                mode="markers",
+                name=str(continent),
+                x=[str(continent)] * len(countries),
+                ids=countries,
+                hovertext=countries,
+                marker=dict(sizemode="area", sizeref=sizeref, symbol="circle"),
+                hovertemplate=(
+                    "<b>%{hovertext}</b><br><br>Region=%{x}"
+                    "<br>Defense Spending (Million USD)=%{y}<extra></extra>"
+                ),
+            ),
+        )
+        fig.update_layout(title=title, xaxis_title="Region")
+    else:
+        import plotly.express as px
+
+        fig = px.scatter(
+            df,
+            x="Continent",
+            y="Defense_USD",
+            animation_frame="Year",
+            animation_group="Country",
+            size="Defense_USD",
+            color="Continent",
+            hover_name="Country",
+            log_y=True,
+            render_mode=render_mode(n_points),
+            size_max=55,  # smaller bubbles
+            #range_y=[100, 900000],
+            title=title,
+            labels={"Defense_USD": "Defense Spending (Million USD)", "Continent": "Region"}
+        )
+
+    fig.update_layout(
+        height=600,  
+        width=None,  
+        title_x=0.19,
+        title_y=0.93,
+        title_font=dict(size=16),
+        plot_bgcolor="black",
+        paper_bgcolor="black",
+        font=dict(color="white", size=10),  # smaller font
+        margin=dict(t=90, b=40, l=10, r=20),
+        showlegend=False,
+
+        xaxis=dict(
+            type='category',
+            categoryorder='array',
+            categoryarray=["Africa", "Asia", "Europe", "North America", "Oceania", "South America"],
+            tickangle=-45,
+            showgrid=True,
+            zeroline=True,
+            tickfont=dict(size=9),
+            automargin=True,
+        ),
+        yaxis=dict(
+            showgrid=False,
+            gridcolor='gray',
+            zeroline=False,
+            type='log',
+            range=[3, 6],
+            title="Defense Spending (Million USD)",
+            title_font=dict(size=11),
+            tickfont=dict(size=9),
+        ),
+        updatemenus=[dict(
+            type="buttons",
+            x=0.05,
+            y=-0.1,
+            buttons=[
+                dict(label="Play", method="animate",
+                     args=[None, dict(frame=dict(duration=500, redraw=True), fromcurrent=True)]),
+                dict(label="Pause", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate",
+                                        transition=dict(duration=0))])
+            ]
+        )]
+    )
+    return fig
@@ -0,0 +1,108 @@
+"""
+large_data.py
+-------------
+Render-mode and downsampling helpers for figures whose point count grows
+with the data (many countries, sub-national or monthly series).
+
+SVG traces (``go.Scatter``) put one DOM node per marker in the browser and
+slow down sharply past a few thousand points; ``go.Scattergl`` draws them on
+the GPU at roughly constant cost. ``use_webgl`` decides per figure from the
+number of points on screen at once (a frame, for animations) against
+``WEBGL_THRESHOLD`` – 1 000 by default, the point at which Plotly Express's
+own ``render_mode="auto"`` switches, overridable with
+``DEFAIDX_WEBGL_THRESHOLD``. WebGL traces cannot tween between animation
+frames, so animated builders ask for a redraw per frame when they switch.
+
+For line series, ``downsample`` keeps at most *max_points* per series with
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first and last points
+are kept and each bucket in between contributes the point spanning the
+largest triangle with its neighbours, so peaks and troughs survive.
+``DOWNSAMPLE_POINTS`` (``DEFAIDX_DOWNSAMPLE_POINTS``) is the builders'
+default and is off (``None``) unless set.
+
+Both settings change the figure a builder returns, so :func:`render_settings`
+is part of ``artifacts.code_version()``: pre-rendered artifacts and the
+figure cache's disk tier built under other values are not served.
+
+Author: DefaidX team
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+WEBGL_THRESHOLD = int(os.environ.get("DEFAIDX_WEBGL_THRESHOLD", 1000))
+DOWNSAMPLE_POINTS = int(os.environ["DEFAIDX_DOWNSAMPLE_POINTS"]) if os.environ.get("DEFAIDX_DOWNSAMPLE_POINTS") else None
+
+
+def render_settings() -> dict:
+    """The environment settings that change what the builders draw."""
+    return {"webgl_threshold": WEBGL_THRESHOLD, "downsample_points": DOWNSAMPLE_POINTS}
+
+
+# ------------------------------------------------------------------ #
+# 🖥️  SVG or WebGL
+# ------------------------------------------------------------------ #
+def use_webgl(n_points: int, threshold: Optional[int] = None) -> bool:
+    """True when *n_points* drawn at once should go to WebGL traces."""
+    return n_points > (WEBGL_THRESHOLD if threshold is None else threshold)
+
+
+def scatter_class(n_points: int, threshold: Optional[int] = None) -> type:
+    """``go.Scattergl`` above the threshold, else ``go.Scatter``."""
+    return go.Scattergl if use_webgl(n_points, threshold) else go.Scatter
+
+
+def render_mode(n_points: int, threshold: Optional[int] = None) -> str:
+    """The Plotly Express ``render_mode`` for *n_points*."""
+    return "webgl" if use_webgl(n_points, threshold) else "svg"
+
+
+def points_per_frame(df: pd.DataFrame, frame: str) -> int:
+    """Largest number of rows in one animation frame of *df*."""
+    return int(df.groupby(frame, observed=True).size().max()) if len(df) else 0
+
+
+# ------------------------------------------------------------------ #
+# 📉  Largest-Triangle-Three-Buckets
+# ------------------------------------------------------------------ #
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the *n_out* points of ``(x, y)`` (sorted by x, NaN-free) that LTTB keeps."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+
+    # n_out - 2 buckets between the fixed first and last points.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: Optional[int], by: Optional[str] = None) -> pd.DataFrame:
+    """Rows of *df* kept by LTTB, at most *max_points* per *by* group (all rows if ``None``)."""
+    if not max_points or len(df) <= max_points:
+        return df
+    df = df.sort_values([by, x] if by else x)
+    groups = df.groupby(by, observed=True, sort=False).indices.values() if by else [np.arange(len(df))]
+    xs, ys = df[x].to_numpy(dtype="float64"), df[y].to_numpy(dtype="float64")
+    keep = np.concatenate([rows[lttb_indices(xs[rows], ys[rows], max_points)] for rows in groups])
+    return df.iloc[np.sort(keep)]
@@ -0,0 +1,16 @@
+"""
+conftest.py
+-----------
+Shared test setup: the modules under ``src/`` import each other by bare
+name (``from data_store import ...``), as they do when Streamlit runs
+``app.py``, so the tests put ``src/`` on ``sys.path`` first.
+
+Author: DefaidX team
+"""
+
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,144 @@
+"""
+test_api.py
+-----------
+End-to-end checks of ``src/api.py`` against a live server on a free port.
+
+Author: DefaidX team
+"""
+
+import io
+import json
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+import api
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = api.serve_in_thread(port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server, path, method="GET", headers=None):
+    """``(status, headers, body)`` of *path*; error statuses are returned, not raised."""
+    request = Request(f"http://127.0.0.1:{server.server_port}{path}", method=method, headers=headers or {})
+    try:
+        with urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as exc:
+        return exc.code, exc.headers, exc.read()
+
+
+# ------------------------------------------------------------------ #
+# ✅  200
+# ------------------------------------------------------------------ #
+def test_index_lists_endpoints(server):
+    status, headers, body = fetch(server, "/")
+    assert status == 200
+    assert headers["Content-Type"] == api.JSON_TYPE
+    assert "/trends" in json.loads(body)["endpoints"]
+
+
+def test_trends_rows(server):
+    status, _, body = fetch(server, "/trends?countries=France,India&indicators=Defense_USD,Defense_USD_YoY&years=2000-2004")
+    assert status == 200
+    payload = json.loads(body)
+    assert payload["count"] == 10
+    assert {row["Country"] for row in payload["rows"]} == {"France", "India"}
+    assert {"Year", "Defense_USD", "Defense_USD_YoY"} <= set(payload["rows"][0])
+
+
+def test_top_is_ranked_within_continent(server):
+    status, _, body = fetch(server, "/top?n=3&years=2020&continent=Europe")
+    assert status == 200
+    assert [row["Rank"] for row in json.loads(body)["rows"]] == [1, 2, 3]
+
+
+# ------------------------------------------------------------------ #
+# ❌  400 / 404
+# ------------------------------------------------------------------ #
+@pytest.mark.parametrize("path", ["/trends", "/top?n=x", "/continent_totals?years=abc", "/continent_totals?format=xml"])
+def test_bad_request(server, path):
+    status, headers, body = fetch(server, path)
+    assert status == 400
+    assert headers["Cache-Control"] == "no-store"
+    assert "error" in json.loads(body)
+
+
+@pytest.mark.parametrize("path", ["/nope", "/trends?countries=Atlantis", "/trends?countries=France&indicators=Nope",
+                                  "/continent_totals?continent=Atlantis"])
+def test_not_found(server, path):
+    status, _, body = fetch(server, path)
+    assert status == 404
+    assert "error" in json.loads(body)
+
+
+# ------------------------------------------------------------------ #
+# 🔁  Conditional requests
+# ------------------------------------------------------------------ #
+def test_if_none_match(server):
+    status, headers, _ = fetch(server, "/continent_totals?years=2020")
+    assert status == 200
+    status, headers_304, body = fetch(server, "/continent_totals?years=2020", headers={"If-None-Match": headers["ETag"]})
+    assert status == 304
+    assert body == b""
+    assert headers_304["ETag"] == headers["ETag"]
+
+
+def test_if_none_match_stale_etag(server):
+    status, _, body = fetch(server, "/continent_totals?years=2020", headers={"If-None-Match": '"stale"'})
+    assert status == 200
+    assert body
+
+
+def test_if_modified_since(server):
+    status, headers, _ = fetch(server, "/indicators")
+    assert status == 200
+    status, _, body = fetch(server, "/indicators", headers={"If-Modified-Since": headers["Last-Modified"]})
+    assert status == 304
+    assert body == b""
+    status, _, _ = fetch(server, "/indicators", headers={"If-Modified-Since": "Mon, 01 Jan 1990 00:00:00 GMT"})
+    assert status == 200
+
+
+# ------------------------------------------------------------------ #
+# 🏹  Arrow and HEAD
+# ------------------------------------------------------------------ #
+def test_arrow_output(server):
+    pa = pytest.importorskip("pyarrow")
+    status, headers, body = fetch(server, "/trends?countries=France&years=2010-2019&format=arrow")
+    assert status == 200
+    assert headers["Content-Type"] == api.ARROW_TYPE
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    assert table.num_rows == 10
+    assert table.column_names == ["Year", "Country", "Defense_USD"]
+    assert b"dataset_version" in table.schema.metadata
+
+
+def test_arrow_by_accept_header(server):
+    pytest.importorskip("pyarrow")
+    status, headers, _ = fetch(server, "/top?n=1&years=2020", headers={"Accept": api.ARROW_TYPE})
+    assert status == 200
+    assert headers["Content-Type"] == api.ARROW_TYPE
+
+
+def test_head_matches_get_without_body(server):
+    _, get_headers, get_body = fetch(server, "/top?n=5")
+    status, headers, body = fetch(server, "/top?n=5", method="HEAD")
+    assert status == 200
+    assert body == b""
+    assert headers["ETag"] == get_headers["ETag"]
+    assert int(headers["Content-Length"]) == len(get_body)
+
+
+def test_responses_are_cached(server):
+    api_ = server.RequestHandlerClass.api
+    fetch(server, "/top?n=7&years=2015")
+    hits = api_.hits
+    fetch(server, "/top?years=2015&n=7")
+    assert api_.hits == hits + 1
@@ -0,0 +1,29 @@
+"""
+test_artifacts.py
+-----------------
+The pre-rendered artifacts are only served for the builder code and render
+settings they were built with.
+
+Author: DefaidX team
+"""
+
+import pytest
+
+from artifacts import ArtifactStore, code_version
+from visualisations import large_data
+
+
+def test_committed_artifacts_match_the_code():
+    store = ArtifactStore()
+    assert not store.stale
+    assert len(store) > 0
+
+
+@pytest.mark.parametrize("setting, value", [("DOWNSAMPLE_POINTS", 100), ("WEBGL_THRESHOLD", 10)])
+def test_render_settings_invalidate_artifacts(monkeypatch, setting, value):
+    before = code_version()
+    monkeypatch.setattr(large_data, setting, value)
+    assert code_version() != before
+    store = ArtifactStore()
+    assert store.stale
+    assert len(store) == 0
@@ -0,0 +1,58 @@
+"""
+test_build_data.py
+------------------
+Editing the module that computes a stage schedules that stage (and what
+depends on it) in ``build_data.py --dry-run``, and nothing upstream of it.
+
+Runs in a copy of the repository whose build state is marked up to date.
+
+Author: DefaidX team
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from data_store import ROOT_DIR
+
+
+def run_script(root: Path, *args: str) -> str:
+    result = subprocess.run([sys.executable, *args], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return result.stdout
+
+
+def dry_run(root: Path) -> set[str]:
+    line = run_script(root, "src/build_data.py", "--dry-run").strip().splitlines()[-1]
+    stages = line.removeprefix("would run: ")
+    return set() if stages == "nothing (up to date)" else set(stages.split(", "))
+
+
+@pytest.fixture()
+def built_tree(tmp_path):
+    for name in ("src", "data", "assets", "static"):
+        shutil.copytree(ROOT_DIR / name, tmp_path / name, ignore=shutil.ignore_patterns("__pycache__", "codes"))
+    run_script(tmp_path / "src", "-c", "import ingest; ingest.mark_built()")
+    return tmp_path
+
+
+@pytest.mark.parametrize("module, stage", [
+    ("aggregates.py", "aggregates"),
+    ("geometry.py", "geometry"),
+    ("cleaning.py", "sipri_usd"),
+    ("cube.py", "cube"),
+    ("data_store.py", "store"),
+])
+def test_editing_a_stage_module_schedules_the_stage(built_tree, module, stage):
+    before = dry_run(built_tree)
+    assert stage not in before
+
+    with open(built_tree / "src" / module, "a", encoding="utf-8") as handle:
+        handle.write("\n# edited\n")
+    after = dry_run(built_tree)
+    assert stage in after
+    if module != "cleaning.py":
+        assert "sipri_usd" not in after
@@ -0,0 +1,51 @@
+"""
+test_country_index.py
+---------------------
+Country metadata coverage of the merged data, the warnings on names the
+index cannot resolve, and the error when no metadata file exists.
+
+Author: DefaidX team
+"""
+
+import numpy as np
+import pytest
+
+from country_index import MISSING_ISO3, CountryIndex, UnresolvedCountryWarning
+from data_store import MERGED_LONG, read_table
+
+HISTORICAL = {"Yugoslavia"}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CountryIndex.from_files()
+
+
+def test_merged_countries_resolve(index):
+    countries = read_table(MERGED_LONG)["Country"].astype(str).unique()
+    assert set(index.unresolved(countries)) <= HISTORICAL
+
+
+@pytest.mark.parametrize("country, iso3", [
+    ("Bahrain", "BHR"), ("Cabo Verde", "CPV"), ("Mauritius", "MUS"), ("Seychelles", "SYC"), ("Singapore", "SGP"),
+])
+def test_supplementary_points(index, country, iso3):
+    lat, lon = index.coords(country)
+    assert lat is not None and lon is not None
+    assert index.iso3(country) == iso3
+
+
+def test_unresolved_names_warn(index):
+    with pytest.warns(UnresolvedCountryWarning, match="Atlantis"):
+        assert index.coords("Atlantis") == (None, None)
+    with pytest.warns(UnresolvedCountryWarning, match="Atlantis"):
+        assert index.iso3("Atlantis") == MISSING_ISO3
+    with pytest.warns(UnresolvedCountryWarning, match="Atlantis, Lemuria"):
+        lat, _ = index.coords_many(["France", "Atlantis", "Lemuria", "Atlantis"])
+    assert np.isnan(lat).tolist() == [False, True, True, True]
+
+
+def test_missing_metadata_files(tmp_path):
+    missing = tmp_path / "country_coordinates.csv"
+    with pytest.raises(FileNotFoundError, match="country_coordinates.csv"):
+        CountryIndex.from_files([missing])
@@ -0,0 +1,55 @@
+"""
+test_dataset.py
+---------------
+The shared dataset stays read-only: page-side writes land on the view,
+element writes to the shared frame are refused, and ``verify()`` catches
+changes that replace its data (reordering).
+
+Author: DefaidX team
+"""
+
+import pandas as pd
+import pytest
+
+from dataset import ReadOnlyDatasetError, SharedDataset, frame_fingerprint
+
+
+@pytest.fixture()
+def dataset():
+    return SharedDataset.load()
+
+
+def test_writes_to_a_view_stay_private(dataset):
+    view = dataset.view("merged")
+    view.loc[view.index[0], "Defense_USD"] = -1.0
+    view["Year"] = 0
+    dataset.verify()
+    assert (dataset.tables["merged"]["Year"] > 0).all()
+
+
+def test_in_place_edit_is_refused(dataset):
+    merged = dataset.tables["merged"]
+    with pytest.raises(ValueError, match="read-only"):
+        merged.loc[merged.index[0], "Defense_USD"] = -1.0
+    dataset.verify()
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda df: df.sort_values("Defense_USD", inplace=True),
+    lambda df: df.sort_index(ascending=False, inplace=True),
+])
+def test_verify_detects_reordering(dataset, mutate):
+    mutate(dataset.tables["merged"])
+    with pytest.raises(ReadOnlyDatasetError, match="merged"):
+        dataset.verify()
+
+
+def test_fingerprint_is_order_sensitive():
+    df = pd.DataFrame({"Year": [2000, 2001], "Defense_USD": [1.0, 2.0]})
+    fingerprints = {
+        frame_fingerprint(df),
+        frame_fingerprint(df.iloc[::-1]),
+        frame_fingerprint(df.iloc[::-1].reset_index(drop=True)),
+        frame_fingerprint(df[["Defense_USD", "Year"]]),
+    }
+    assert len(fingerprints) == 4
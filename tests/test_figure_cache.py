@@ -0,0 +1,55 @@
+"""
+test_figure_cache.py
+--------------------
+``FigureCache.get_or_build`` keys: a precomputed fingerprint reuses the entry
+of the hashed frame without hashing it again, and the disk tier only serves
+figures built by the current builder code.
+
+Author: DefaidX team
+"""
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import figure_cache
+from dataset import frame_fingerprint
+from figure_cache import FigureCache
+
+
+def bar(df):
+    return go.Figure(go.Bar(x=df["Year"], y=df["Defense_USD"]))
+
+
+@pytest.fixture()
+def frame():
+    return pd.DataFrame({"Year": [2000, 2001], "Defense_USD": [1.0, 2.0]})
+
+
+def test_precomputed_fingerprint_skips_hashing(monkeypatch, frame):
+    cache = FigureCache(maxsize=4)
+    cache.get_or_build(bar, frame)
+    assert cache.misses == 1
+
+    def fail(data):
+        raise AssertionError("fingerprint_of called despite fingerprint=")
+
+    monkeypatch.setattr(figure_cache, "fingerprint_of", fail)
+    cache.get_or_build(bar, frame, fingerprint=frame_fingerprint(frame))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_tier_is_per_code_version(tmp_path, monkeypatch, frame):
+    FigureCache(disk_dir=tmp_path).get_or_build(bar, frame)
+
+    restarted = FigureCache(disk_dir=tmp_path)
+    restarted.get_or_build(bar, frame)
+    assert restarted.disk_hits == 1
+
+    monkeypatch.setattr(figure_cache, "code_version", lambda: "changed-builders")
+    deployed = FigureCache(disk_dir=tmp_path)
+    deployed.get_or_build(bar, frame)
+    assert (deployed.disk_hits, deployed.misses) == (0, 1)
+
+    deployed.clear(disk=True)
+    assert not list(tmp_path.glob("*/*.json"))
@@ -0,0 +1,113 @@
+"""
+test_ingest.py
+--------------
+Appending a year with ``src/ingest.py`` gives the same clean tables (up to
+row order) as rebuilding them with ``src/build_data.py``, and a rebuild that
+changes nothing keeps the dataset version.
+
+The ingest test runs both scripts in a copy of the repository whose raw
+exports get a synthetic 2024 (2023 × 1.05).
+
+Author: DefaidX team
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import data_store
+from data_store import CLEAN_DIR, ROOT_DIR
+
+NEW_YEAR = 2024
+RAW_YEAR_COLUMNS = {
+    "data/raw/sipri/defense_spending_constant.csv": ("2023", "2024"),
+    "data/raw/sipri/defense_spending_share_gdp.csv": ("2023", "2024"),
+    "data/raw/sipri/defense_spending_share_gov.csv": ("2023", "2024"),
+    "data/raw/wb/gdp_wb.csv": ("2023 [YR2023]", "2024 [YR2024]"),
+}
+
+
+def copy_tree(dest: Path) -> Path:
+    ignore = shutil.ignore_patterns("store", ".build_state.json", "__pycache__", "codes")
+    for name in ("src", "data", "assets"):
+        shutil.copytree(ROOT_DIR / name, dest / name, ignore=ignore)
+    return dest
+
+
+def add_synthetic_year(root: Path) -> None:
+    """Fill each raw export's 2024 column from its 2023 column (blank where 2023 is)."""
+    for relpath, (last, new) in RAW_YEAR_COLUMNS.items():
+        raw = pd.read_csv(root / relpath, dtype=str, keep_default_na=False)
+        values = pd.to_numeric(raw[last], errors="coerce") * 1.05
+        filled = values.map(lambda v: repr(float(v)), na_action="ignore")
+        raw[new] = filled.where(values.notna(), raw[new] if new in raw else "")
+        raw.to_csv(root / relpath, index=False)
+
+
+def run_script(root: Path, *args: str) -> None:
+    result = subprocess.run([sys.executable, *args], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+def clean_csvs(root: Path) -> dict[str, pd.DataFrame]:
+    clean = root / "data" / "clean"
+    return {path.relative_to(clean).as_posix(): pd.read_csv(path) for path in sorted(clean.rglob("*.csv"))}
+
+
+def sorted_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+# ------------------------------------------------------------------ #
+# 📥  Ingest == rebuild
+# ------------------------------------------------------------------ #
+def test_ingest_matches_full_rebuild(tmp_path):
+    root = copy_tree(tmp_path)
+    add_synthetic_year(root)
+
+    run_script(root, "src/ingest.py", str(NEW_YEAR), "--no-artifacts")
+    ingested = clean_csvs(root)
+    assert (ingested[data_store.MERGED_LONG]["Year"] == NEW_YEAR).any()
+
+    run_script(root, "src/build_data.py", "--force", "merge_long", "merge_complete", "aggregates")
+    rebuilt = clean_csvs(root)
+
+    assert ingested.keys() == rebuilt.keys()
+    for relpath in ingested:
+        assert list(ingested[relpath].columns) == list(rebuilt[relpath].columns), relpath
+        pd.testing.assert_frame_equal(
+            sorted_rows(ingested[relpath]), sorted_rows(rebuilt[relpath]), check_dtype=False, obj=relpath,
+        )
+
+
+# ------------------------------------------------------------------ #
+# 🔖  Dataset version
+# ------------------------------------------------------------------ #
+@pytest.fixture()
+def clean_copy(tmp_path, monkeypatch):
+    clean = tmp_path / "clean"
+    shutil.copytree(CLEAN_DIR, clean)
+    monkeypatch.setattr(data_store, "CLEAN_DIR", clean)
+    monkeypatch.setattr(data_store, "DATASET_VERSION_FILE", clean / "dataset_version.json")
+    return clean
+
+
+def test_unchanged_rebuild_keeps_version(clean_copy):
+    before = (clean_copy / "dataset_version.json").read_bytes()
+    manifest = data_store.write_dataset_version("build")
+    assert manifest == data_store.read_dataset_version()
+    assert (clean_copy / "dataset_version.json").read_bytes() == before
+
+
+def test_changed_table_bumps_version(clean_copy):
+    previous = data_store.read_dataset_version()
+    with open(clean_copy / data_store.COUNTRY_ISO3, "a", encoding="utf-8") as handle:
+        handle.write("Atlantis,ATL\n")
+    manifest = data_store.write_dataset_version("edit")
+    assert manifest["version"] == previous["version"] + 1
+    assert manifest["digest"] != previous["digest"]
+    assert manifest["history"][-1]["change"] == "edit"